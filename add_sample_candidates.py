@@ -15,10 +15,11 @@ load_dotenv()
 # Import after environment variables are loaded
 from app import db, create_app
 from models import Candidate, Recruiter, Job, JobCandidateMatch
+from utils.match_stats import rebuild_job_match_stats
 
 def add_sample_candidates():
     """Add sample candidates to the database"""
-    app = create_app()
+    app = create_app(start_workers=False)
     
     with app.app_context():
         # Check if we already have a recruiter to assign the candidates to
@@ -154,6 +155,7 @@ def add_sample_candidates():
             added_candidates.append(candidate)
             print(f"Added sample candidate: {candidate_data['name']}")
         
+        rebuild_job_match_stats({candidate.job_id for candidate in added_candidates if candidate.job_id})
         db.session.commit()
         print(f"Added {len(added_candidates)} sample candidates.")
         return added_candidates
@@ -17,7 +17,7 @@ from models import Job, Recruiter, JobToken
 
 def add_sample_job():
     """Add a sample job to the database"""
-    app = create_app()
+    app = create_app(start_workers=False)
     
     with app.app_context():
         # Check if we already have a recruiter to assign the job to
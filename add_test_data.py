@@ -29,7 +29,7 @@ def add_test_data():
     - Sample candidates with various skills
     - Job-candidate matches
     """
-    app = create_app()
+    app = create_app(start_workers=False)
     
     with app.app_context():
         # Step 1: Make sure we have a recruiter (admin)
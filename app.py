@@ -7,20 +7,36 @@ import logging
 import threading
 import time
 import re
+import math
 from datetime import datetime, timedelta
 from functools import wraps
-from flask import Flask, request, jsonify, render_template, make_response, redirect, url_for, flash, send_file
-from werkzeug.utils import secure_filename
-from PIL import Image
-import pytesseract
-from io import BytesIO
+from flask import Flask, request, jsonify, render_template, stream_template, make_response, redirect, url_for, flash, send_file, Response, stream_with_context
 import openai
-from google.cloud import storage
 
-from models import db, Recruiter, Job, Candidate, JobCandidateMatch, Session, Invitation, CandidateRating, Role, RecruiterSharing
+from models import db, Recruiter, Job, Candidate, JobCandidateMatch, Session, Invitation, CandidateRating, Role, RecruiterSharing, IngestionJob, UploadBatch
+from models import candidate_profile_options, candidate_matching_options, candidate_contact_options, job_matching_options, job_preview_options
 from utils.roles import initialize_roles
 from utils.role_manager import get_all_roles, get_all_recruiters, change_recruiter_role, can_change_role
 from utils.job_expiration_service import expire_jobs, mark_expiring_soon_jobs, renew_job, get_expiring_jobs_by_recruiter
+from utils.resume_parser import get_parser_metrics
+from utils.text_compaction import compact_text, compact_for_embedding, JOB_TOKEN_BUDGET
+from utils.persona_queue import enqueue_persona, get_persona_status, pending_persona
+from utils.http_clients import get_openai_client, get_gcs_client, get_gcs_timeout, get_client_metrics
+from utils.persona_queue import get_queue_metrics as get_persona_queue_metrics
+from utils.job_queue import enqueue_job, notify_workers, start_ingest_workers, get_job, get_queue_metrics as get_ingest_queue_metrics
+from utils.upload_batches import create_batch, get_batch_status, stream_batch_events
+from utils.upload_storage import save_upload, save_text_upload, UploadRejected, UPLOAD_MAX_FILE_BYTES
+from utils.resume_files import find_duplicate_candidate, discard_upload
+from utils.admission import check_admission, get_admission_metrics
+from utils.dashboard_stats import get_dashboard_stats, invalidate_dashboard_stats, get_dashboard_stats_metrics
+from utils.listings import list_visible_jobs, list_visible_candidates, list_job_matches, count_label
+from utils.access import get_visibility, load_by_ids
+from utils.phone import normalize_phone
+from utils.match_stats import rebuild_job_match_stats
+from utils.db_routing import replica_reads, init_db_routing, get_routing_metrics, REPLICA_BIND
+from utils.idempotency import begin_request, finish_request, release_request, request_fingerprint, IDEMPOTENCY_HEADER, MAX_KEY_LENGTH
+from utils.ingest_pipeline import calculate_match_score
+from utils.ocr_service import get_ocr_metrics
 
 # Configure logging
 logging.basicConfig(
@@ -29,35 +45,50 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-def create_app():
+def create_app(start_workers=True):
     app = Flask(__name__)
     app.secret_key = os.environ.get("SESSION_SECRET", os.environ.get('SECRET_KEY', 'fallback-dev-key'))
     app.config.update({
-        'MAX_CONTENT_LENGTH': 5 * 1024 * 1024,
+        'MAX_CONTENT_LENGTH': int(float(os.environ.get('MAX_CONTENT_LENGTH_MB', 5)) * 1024 * 1024),
+        # Bulk uploads are streamed to disk file by file, so they get a much larger request limit
+        'BULK_UPLOAD_MAX_FILES': int(os.environ.get('BULK_UPLOAD_MAX_FILES', 200)),
+        'BULK_UPLOAD_MAX_BYTES': int(float(os.environ.get('BULK_UPLOAD_MAX_MB', 500)) * 1024 * 1024),
         'ALLOWED_EXTENSIONS': {'pdf', 'docx', 'txt', 'png', 'jpg', 'jpeg'},
         'RATE_LIMITS': {'auth': '5/minute', 'jobs': '10/minute', 'uploads': '10/minute'},
+        # Send the match list page as it renders instead of after
+        'STREAM_MATCH_PAGES': os.environ.get('STREAM_MATCH_PAGES', 'false').lower() in ('1', 'true', 'yes'),
         'SQLALCHEMY_DATABASE_URI': os.environ.get('DATABASE_URL'),
         'SQLALCHEMY_TRACK_MODIFICATIONS': False,
         'SQLALCHEMY_ENGINE_OPTIONS': {
             'pool_pre_ping': True,
-            'pool_recycle': 280,
-            'connect_args': {
-                'keepalives': 1,
-                'keepalives_idle': 30,
-                'keepalives_interval': 10,
-                'keepalives_count': 5
-            }
+            'pool_recycle': 280
         }
     })
+    # TCP keepalives are a libpq setting; SQLite scratch databases (benchmarks) take none
+    keepalive_args = {
+        'keepalives': 1,
+        'keepalives_idle': 30,
+        'keepalives_interval': 10,
+        'keepalives_count': 5
+    }
+    if not (app.config['SQLALCHEMY_DATABASE_URI'] or '').startswith('sqlite'):
+        app.config['SQLALCHEMY_ENGINE_OPTIONS']['connect_args'] = keepalive_args
+    
+    # Read-only pages read from a replica when one is configured (see utils/db_routing.py).
+    # Binds do not inherit SQLALCHEMY_ENGINE_OPTIONS, so the replica gets its own.
+    replica_url = os.environ.get('DATABASE_REPLICA_URL')
+    if replica_url:
+        replica_options = {'url': replica_url, 'pool_pre_ping': True, 'pool_recycle': 280}
+        if not replica_url.startswith('sqlite'):
+            replica_options['connect_args'] = keepalive_args
+        app.config['SQLALCHEMY_BINDS'] = {REPLICA_BIND: replica_options}
     
     # Initialize services
     openai.api_key = os.environ.get('OPENAI_API_KEY')
     
     # Initialize GCS client only if credentials are available and valid
-    gcs_client = None
     try:
-        if os.environ.get('GOOGLE_APPLICATION_CREDENTIALS'):
-            gcs_client = storage.Client()
+        if get_gcs_client():
             logger.info("Google Cloud Storage client initialized successfully")
     except Exception as e:
         logger.error(f"Failed to initialize GCS client: {str(e)}")
@@ -65,6 +96,7 @@ def create_app():
     
     # Initialize database
     db.init_app(app)
+    init_db_routing(app)
     
     with app.app_context():
         db.create_all()
@@ -116,6 +148,11 @@ def create_app():
                 
         # Start the scheduler in a background thread
         threading.Thread(target=schedule_daily_expiration_check, daemon=True).start()
+        
+        # Resume processing and personas run on the durable ingestion queue;
+        # set INGEST_WORKERS=0 when they are handled by worker.py instead
+        if start_workers:
+            start_ingest_workers(app, int(os.environ.get('INGEST_WORKERS', 2)))
     
     # Rate Limiter
     class RateLimiter:
@@ -154,6 +191,67 @@ def create_app():
             return wrapper
         return decorator
     
+    def admission_refused(decision):
+        response = jsonify({
+            'error': 'Resume processing is busy, please retry later',
+            'reason': decision.reason,
+            'retry_after': decision.retry_after
+        })
+        response.headers['Retry-After'] = str(decision.retry_after)
+        return response, 429
+    
+    # Goes above decorators that read the body (idempotent hashes JSON bodies), so a
+    # refused upload is never read
+    def admission_controlled(priority):
+        """Refuse uploads with 429 and Retry-After while the resume pipeline is overloaded"""
+        def decorator(f):
+            @wraps(f)
+            def wrapper(*args, **kwargs):
+                decision = check_admission(priority)
+                if not decision.admitted:
+                    return admission_refused(decision)
+                return f(*args, **kwargs)
+            return wrapper
+        return decorator
+    
+    def idempotent(endpoint):
+        """Run a request once per Idempotency-Key and replay its response to retries"""
+        def decorator(f):
+            @wraps(f)
+            def wrapper(*args, **kwargs):
+                key = request.headers.get(IDEMPOTENCY_HEADER)
+                if not key:
+                    return f(*args, **kwargs)
+                if len(key) > MAX_KEY_LENGTH:
+                    return jsonify({'error': f'{IDEMPOTENCY_HEADER} must be at most {MAX_KEY_LENGTH} characters'}), 400
+                
+                # Keys are per caller, so one client cannot replay another's response
+                recruiter = kwargs.get('recruiter')
+                scope = f"{endpoint}:{recruiter.id if recruiter else request.remote_addr}"
+                outcome, record = begin_request(scope, key, request_fingerprint(request))
+                
+                if outcome == 'replay':
+                    response = app.response_class(record.response_body, status=record.response_status,
+                                                  mimetype=record.response_mimetype)
+                    response.headers['Idempotent-Replayed'] = 'true'
+                    return response
+                if outcome == 'mismatch':
+                    return jsonify({'error': f'{IDEMPOTENCY_HEADER} was already used for a different request'}), 422
+                if outcome == 'busy':
+                    response = jsonify({'error': f'A request with this {IDEMPOTENCY_HEADER} is still being processed'})
+                    response.headers['Retry-After'] = '1'
+                    return response, 409
+                
+                try:
+                    response = app.make_response(f(*args, **kwargs))
+                except Exception:
+                    release_request(record)
+                    raise
+                finish_request(record, response)
+                return response
+            return wrapper
+        return decorator
+    
     def recruiter_required(f):
         @wraps(f)
         def decorated(*args, **kwargs):
@@ -230,6 +328,12 @@ def create_app():
         Upload a file to Google Cloud Storage or fall back to local storage
         """
         # Try to use GCS if client is available
+        try:
+            gcs_client = get_gcs_client()
+        except Exception as e:
+            logger.error(f"GCS client unavailable: {str(e)}")
+            gcs_client = None
+        
         if gcs_client:
             try:
                 bucket_name = os.environ.get('GCS_BUCKET_NAME')
@@ -240,9 +344,9 @@ def create_app():
                     blob = bucket.blob(f"resumes/{filename}")
                     if isinstance(content, str):
                         content = content.encode('utf-8')
-                    blob.upload_from_string(content)
+                    blob.upload_from_string(content, timeout=get_gcs_timeout())
                     # Make blob publicly accessible
-                    blob.make_public()
+                    blob.make_public(timeout=get_gcs_timeout())
                     logger.info(f"Successfully uploaded file to GCS: {blob.public_url}")
                     return blob.public_url
             except Exception as e:
@@ -326,17 +430,29 @@ def create_app():
     
     @app.route('/dashboard')
     @recruiter_required
+    @replica_reads
     def dashboard(recruiter):
         try:
             logger.debug(f"Dashboard accessed by recruiter ID: {recruiter.id}")
             # Get jobs created by this recruiter
-            recruiter_jobs = Job.query.filter_by(recruiter_id=recruiter.id).all()
+            recruiter_jobs = Job.query.options(*job_preview_options()).filter_by(recruiter_id=recruiter.id).all()
             logger.debug(f"Found {len(recruiter_jobs)} jobs for recruiter")
             
+            # Match counts and averages for every job, plus the candidate total, in one cached query
+            stats = get_dashboard_stats(app, recruiter.id)
+            total_candidates = stats['total_candidates']
+            
             # Add match info and expiration data to each job
+            job_stats = []
             for job in recruiter_jobs:
-                matches = JobCandidateMatch.query.filter_by(job_id=job.id).all()
-                job.match_score = round(sum([m.score for m in matches]) / max(1, len(matches)) * 100) if matches else 0
+                # Jobs created since the stats were cached have no matches yet
+                job_stat = stats['jobs'].get(job.id, {'applications': 0, 'match_score': 0})
+                job.match_score = job_stat['match_score']
+                job_stats.append({
+                    'id': job.id,
+                    'title': job.title,
+                    'applications': job_stat['applications']
+                })
                 
                 # Add expiration information
                 if job.expires_at:
@@ -344,20 +460,6 @@ def create_app():
                     job.days_until_expiry = days_until_expiry
                     job.is_expiring_soon = job.is_expiring_soon(7)  # Check if job is expiring within 7 days
             
-            # Calculate statistics
-            # 1. Total candidates in the system
-            total_candidates = Candidate.query.count()
-            
-            # 2. Job statistics - applications per job
-            job_stats = []
-            for job in recruiter_jobs:
-                applications = JobCandidateMatch.query.filter_by(job_id=job.id).count()
-                job_stats.append({
-                    'id': job.id,
-                    'title': job.title,
-                    'applications': applications
-                })
-            
             return render_template(
                 'dashboard.html', 
                 jobs=recruiter_jobs, 
@@ -1003,6 +1105,7 @@ def create_app():
     @recruiter_required
     @rate_limited('jobs')
     @requires_permission('jobs:create')
+    @idempotent('jobs')
     def create_job(recruiter):
         try:
             logger.debug("Job creation started")
@@ -1020,14 +1123,14 @@ def create_app():
                 # The newest OpenAI model is "gpt-4o" which was released May 13, 2024.
                 # do not change this unless explicitly requested by the user
                 logger.debug("Calling OpenAI for job analysis")
-                analysis = openai.chat.completions.create(
+                analysis = get_openai_client().chat.completions.create(
                     model="gpt-4o",
                     messages=[{
                         "role": "system",
                         "content": "You are a job analyst. Analyze the job description and extract the following information: title, location, experience (in years), required skills (list), preferred skills (list), education requirements, job type (full-time, part-time, contract, etc.), salary range (if mentioned), and company name (if mentioned). Return the data as a structured JSON object."
                     }, {
                         "role": "user",
-                        "content": description
+                        "content": compact_text(description, JOB_TOKEN_BUDGET)
                     }],
                     response_format={"type": "json_object"}
                 )
@@ -1038,8 +1141,8 @@ def create_app():
                 
                 # Generate embeddings for matching
                 logger.debug("Generating embeddings")
-                embedding_response = openai.embeddings.create(
-                    input=description,
+                embedding_response = get_openai_client().embeddings.create(
+                    input=compact_for_embedding(description),
                     model="text-embedding-3-small"
                 )
                 logger.debug("Embeddings generated")
@@ -1070,7 +1173,7 @@ def create_app():
                 # Find matching candidates
                 try:
                     logger.debug("Finding matching candidates")
-                    candidates = Candidate.query.all()
+                    candidates = Candidate.query.options(*candidate_matching_options()).all()
                     logger.debug(f"Found {len(candidates)} candidates to match")
                     
                     for candidate in candidates:
@@ -1083,7 +1186,9 @@ def create_app():
                             )
                             db.session.add(match)
                     
+                    rebuild_job_match_stats([job.id])
                     db.session.commit()
+                    invalidate_dashboard_stats([recruiter.id])
                     logger.debug("Candidate matching complete")
                 except Exception as match_error:
                     logger.error(f"Error during candidate matching: {str(match_error)}")
@@ -1238,6 +1343,8 @@ def create_app():
     
     @app.route('/api/candidates', methods=['POST'])
     @rate_limited('uploads')
+    @admission_controlled('interactive')
+    @idempotent('candidates')
     def upload_resume():
         if 'file' not in request.files:
             return jsonify({'error': 'No file uploaded'}), 400
@@ -1251,87 +1358,26 @@ def create_app():
             
         try:
             logger.debug("Resume upload started")
-            content = file.read()
-            filename = secure_filename(file.filename)
-            logger.debug(f"Processing file: {filename}")
-            
-            # For a temporary upload without GCS
-            local_path = os.path.join('static', 'uploads', filename)
-            os.makedirs(os.path.dirname(local_path), exist_ok=True)
-            
-            with open(local_path, 'wb') as f:
-                f.write(content)
-            
-            logger.debug(f"File saved locally at: {local_path}")
-            
-            # Extract text from content based on file type
-            text = ""
-            if isinstance(content, bytes):
-                try:
-                    img = Image.open(BytesIO(content))
-                    text = pytesseract.image_to_string(img)
-                    logger.debug("Extracted text from image")
-                except Exception as img_error:
-                    logger.error(f"Image processing failed: {str(img_error)}")
-                    # Assume it's raw text
-                    text = content.decode('utf-8', errors='ignore')
-                    logger.debug("Decoded text from bytes")
-            else:
-                text = str(content)
-                logger.debug("Converted content to string")
-            
-            # Limit text size to avoid rate limits
-            if len(text) > 10000:
-                logger.debug(f"Text is too large ({len(text)} chars), truncating...")
-                text = text[:10000]
-                
-            # Simple parsing if OpenAI fails
-            basic_resume_data = {
-                "skills": extract_skills_from_text(text),
-                "experience": [],
-                "education": [],
-                "summary": text[:500] + "..."
-            }
-            
             try:
-                # Use OpenAI to analyze the resume
-                # The newest OpenAI model is "gpt-4o" which was released May 13, 2024.
-                # do not change this unless explicitly requested by the user
-                logger.debug("Calling OpenAI for resume analysis")
-                analysis = openai.chat.completions.create(
-                    model="gpt-3.5-turbo",  # Use cheaper model to avoid rate limits
-                    messages=[{
-                        "role": "system",
-                        "content": "You are a resume parser. Extract the following information from the resume text and return it as JSON: skills (list), experience (list of jobs with company, title, years), education (list of degrees with school, degree, field, year), summary (brief overview). Format all text properly and ensure lists are well-structured."
-                    }, {
-                        "role": "user",
-                        "content": text
-                    }],
-                    response_format={"type": "json_object"},
-                    max_tokens=500
-                )
-                
-                resume_data = json.loads(analysis.choices[0].message.content)
-                logger.debug("OpenAI resume analysis complete")
-            except Exception as openai_error:
-                logger.error(f"OpenAI resume analysis failed: {str(openai_error)}")
-                resume_data = basic_resume_data
-                logger.debug("Using basic resume data as fallback")
+                # Streamed to disk in chunks while it is hashed and its type checked
+                stored = save_upload(file)
+            except UploadRejected as e:
+                return jsonify({'error': str(e)}), 400
+            
+            # The exact same file was processed before; answer with that candidate
+            duplicate = find_duplicate_candidate(stored['sha256'])
+            if duplicate:
+                discard_upload(stored)
+                logger.debug(f"Upload is a duplicate of candidate {duplicate.id}")
+                return jsonify({
+                    'status': 'duplicate',
+                    'message': 'This resume has already been received.',
+                    'candidate_id': duplicate.id
+                }), 200
             
-            try:
-                # Generate embeddings for matching
-                logger.debug("Generating embeddings")
-                embedding_response = openai.embeddings.create(
-                    input=text[:1000],  # Use shorter text for embeddings
-                    model="text-embedding-3-small"
-                )
-                embedding_vector = embedding_response.data[0].embedding
-                logger.debug("Embeddings generated")
-            except Exception as embed_error:
-                logger.error(f"Embedding generation failed: {str(embed_error)}")
-                # Use a dummy embedding of correct size if OpenAI fails
-                embedding_vector = [0.0] * 1536
-                logger.debug("Using dummy embedding as fallback")
+            filename = stored['filename']
+            local_path = stored['local_path']
+            logger.debug(f"File saved locally at: {local_path}")
             
             # Handle candidate record creation or update
             try:
@@ -1351,28 +1397,11 @@ def create_app():
                 if existing_candidate:
                     # Update existing candidate
                     logger.debug("Updating existing candidate record")
-                    
-                    # Update candidate fields
                     existing_candidate.name = request.form.get('name', existing_candidate.name)
                     existing_candidate.phone = request.form.get('phone', existing_candidate.phone)
                     existing_candidate.resume_file = filename
                     existing_candidate.gcs_url = '/static/uploads/' + filename
-                    existing_candidate.parsed_data = resume_data
-                    existing_candidate.embedding = embedding_vector
-                    
                     candidate = existing_candidate
-                    db.session.commit()
-                    logger.debug(f"Candidate record updated with ID: {candidate.id}")
-                    
-                    # Delete old matches for this candidate to re-calculate
-                    try:
-                        JobCandidateMatch.query.filter_by(candidate_id=candidate.id).delete()
-                        db.session.commit()
-                        logger.debug("Old job matches deleted for re-calculation")
-                    except Exception as delete_error:
-                        logger.error(f"Error deleting old matches: {str(delete_error)}")
-                        db.session.rollback()
-                    
                 else:
                     # Create new candidate
                     logger.debug("Creating new candidate record")
@@ -1381,42 +1410,22 @@ def create_app():
                         email=email,
                         phone=request.form.get('phone', ''),
                         resume_file=filename,
-                        gcs_url='/static/uploads/' + filename,
-                        parsed_data=resume_data,
-                        embedding=embedding_vector
+                        gcs_url='/static/uploads/' + filename
                     )
-                    
                     db.session.add(candidate)
-                    db.session.commit()
-                    logger.debug(f"New candidate record created with ID: {candidate.id}")
                 
-                # Find matching jobs
-                try:
-                    logger.debug("Finding matching jobs")
-                    jobs = Job.query.filter_by(status='active').all()
-                    logger.debug(f"Found {len(jobs)} active jobs")
-                    
-                    for job in jobs:
-                        score = calculate_match_score(candidate, job)
-                        if score > 0.3:  # Reduced threshold from 0.6 to 0.3 (30%)
-                            match = JobCandidateMatch(
-                                job_id=job.id,
-                                candidate_id=candidate.id,
-                                score=score
-                            )
-                            db.session.add(match)
-                    
-                    db.session.commit()
-                    logger.debug("Job matching complete")
-                except Exception as match_error:
-                    logger.error(f"Job matching failed: {str(match_error)}")
-                    # Continue even if matching fails
+                db.session.commit()
+                logger.debug(f"Candidate record saved with ID: {candidate.id}")
+                
+                # Parsing, embedding and matching run on the ingestion queue
+                ingest_job = enqueue_job('resume', stored, candidate_id=candidate.id)
                 
                 return jsonify({
-                    'status': 'success', 
-                    'message': 'Your resume has been processed. We will email you when matches are found.',
-                    'candidate_id': candidate.id
-                }), 201
+                    'status': 'queued',
+                    'message': 'Your resume has been received and is being processed. We will email you when matches are found.',
+                    'candidate_id': candidate.id,
+                    'job_id': ingest_job.id
+                }), 202
                 
             except Exception as db_error:
                 logger.error(f"Database operation failed: {str(db_error)}")
@@ -1427,40 +1436,12 @@ def create_app():
             logger.error(f"Resume upload failed: {str(e)}")
             return jsonify({'error': 'Upload failed: ' + str(e)}), 500
             
-    # Helper function to extract skills from text without OpenAI
-    def extract_skills_from_text(text):
-        # Common programming languages and technologies
-        tech_skills = [
-            "Python", "Java", "JavaScript", "HTML", "CSS", "SQL", "C++", "C#", "Ruby",
-            "PHP", "Swift", "Go", "Rust", "TypeScript", "React", "Angular", "Vue", 
-            "Node.js", "Django", "Flask", "Rails", "Spring", "ASP.NET", "Laravel",
-            "AWS", "Azure", "GCP", "Docker", "Kubernetes", "Git", "GitHub", "CI/CD",
-            "TensorFlow", "PyTorch", "Machine Learning", "AI", "Data Science",
-            "Agile", "Scrum", "DevOps", "Microservices", "RESTful API", "GraphQL"
-        ]
-        
-        # Soft skills
-        soft_skills = [
-            "Communication", "Teamwork", "Leadership", "Problem Solving", 
-            "Critical Thinking", "Time Management", "Adaptability", "Creativity",
-            "Project Management", "Customer Service", "Presentation", "Negotiation"
-        ]
-        
-        # Combine all skills
-        all_skills = tech_skills + soft_skills
-        
-        # Extract skills that appear in the text
-        found_skills = []
-        for skill in all_skills:
-            if skill.lower() in text.lower():
-                found_skills.append(skill)
-                
-        return found_skills
-    
     @app.route('/api/resume/text', methods=['POST'])
     @rate_limited('uploads')
     @recruiter_required
     @requires_permission('candidates:add')
+    @admission_controlled('interactive')
+    @idempotent('resume_text')
     def upload_resume_text(recruiter):
         try:
             logger.debug("Resume text upload started")
@@ -1483,16 +1464,25 @@ def create_app():
             
             # Save the text as a file
             timestamp = int(time.time())
-            filename = f"{name.lower().replace(' ', '_')}_{timestamp}.txt"
-            
-            # Make sure the directory exists
-            os.makedirs(os.path.join('static', 'uploads'), exist_ok=True)
-            local_path = os.path.join('static', 'uploads', filename)
-            
-            with open(local_path, 'w') as f:
-                f.write(resume_text)
+            try:
+                stored = save_text_upload(resume_text, f"{name.lower().replace(' ', '_')}_{timestamp}.txt")
+            except UploadRejected as e:
+                return jsonify({'error': str(e)}), 400
+            
+            # The exact same text was processed before; answer with that candidate
+            duplicate = find_duplicate_candidate(stored['sha256'])
+            if duplicate:
+                discard_upload(stored)
+                logger.debug(f"Resume text is a duplicate of candidate {duplicate.id}")
+                return jsonify({
+                    'message': 'This resume has already been uploaded.',
+                    'candidate_id': duplicate.id,
+                    'is_update': False,
+                    'duplicate': True
+                }), 200
+            filename = stored['filename']
             
-            logger.debug(f"Resume text saved locally at: {local_path}")
+            logger.debug(f"Resume text saved locally at: {stored['local_path']}")
             
             # Check for exact duplicate by email
             duplicate_candidate = None
@@ -1511,86 +1501,29 @@ def create_app():
             if not duplicate_candidate and phone:
                 logger.debug(f"Checking for duplicate by phone: {phone}")
                 
-                # Normalize phone numbers for comparison (remove all non-digit characters)
-                normalized_phone = re.sub(r'\D', '', phone)
+                # Compare normalized numbers, so formatting differences still match
+                normalized_phone = normalize_phone(phone)
                 
                 if normalized_phone:
-                    # Get all candidates to check normalized phone numbers
-                    candidates = Candidate.query.all()
-                    for candidate in candidates:
-                        if candidate.phone:
-                            candidate_phone = re.sub(r'\D', '', candidate.phone)
-                            if normalized_phone == candidate_phone:
-                                logger.debug(f"Found duplicate by phone: {candidate.id}")
-                                duplicate_candidate = candidate
-                                is_update = True
-                                message = 'Your resume has been updated based on matching phone number!'
-                                break
-            
-            # Parse the resume text to extract structured data
-            # Simple parsing if OpenAI fails
-            basic_resume_data = {
-                "skills": extract_skills_from_text(resume_text),
-                "experience": [],
-                "education": [],
-                "summary": resume_text[:500] + "..."
-            }
-            
-            try:
-                # Use OpenAI to analyze the resume
-                logger.debug("Calling OpenAI for resume analysis")
-                analysis = openai.chat.completions.create(
-                    model="gpt-3.5-turbo",  # Use cheaper model to avoid rate limits
-                    messages=[{
-                        "role": "system",
-                        "content": "You are a resume parser. Extract the following information from the resume text and return it as JSON: skills (list), experience (list of jobs with company, title, years), education (list of degrees with school, degree, field, year), summary (brief overview). Format all text properly and ensure lists are well-structured."
-                    }, {
-                        "role": "user",
-                        "content": resume_text
-                    }],
-                    response_format={"type": "json_object"},
-                    max_tokens=500
-                )
-                
-                resume_data = json.loads(analysis.choices[0].message.content)
-                logger.debug("OpenAI resume analysis complete")
-            except Exception as openai_error:
-                logger.error(f"OpenAI resume analysis failed: {str(openai_error)}")
-                resume_data = basic_resume_data
-                logger.debug("Using basic resume data as fallback")
-            
-            try:
-                # Generate embeddings for matching
-                logger.debug("Generating embeddings")
-                embedding_response = openai.embeddings.create(
-                    input=resume_text[:1000],  # Use shorter text for embeddings
-                    model="text-embedding-3-small"
-                )
-                embedding_vector = embedding_response.data[0].embedding
-                logger.debug("Embeddings generated")
-            except Exception as embed_error:
-                logger.error(f"Embedding generation failed: {str(embed_error)}")
-                # Use a dummy embedding of correct size if OpenAI fails
-                embedding_vector = [0.0] * 1536
-                logger.debug("Using dummy embedding as fallback")
+                    duplicate_candidate = (Candidate.query.options(*candidate_contact_options())
+                                           .filter_by(phone_normalized=normalized_phone)
+                                           .order_by(Candidate.id).first())
+                    if duplicate_candidate:
+                        logger.debug(f"Found duplicate by phone: {duplicate_candidate.id}")
+                        is_update = True
+                        message = 'Your resume has been updated based on matching phone number!'
             
             # Update or create candidate
             if duplicate_candidate:
-                candidate_id = duplicate_candidate.id
+                candidate = duplicate_candidate
                 
                 # Update the candidate's information
-                duplicate_candidate.name = name
+                candidate.name = name
                 if email:
-                    duplicate_candidate.email = email
+                    candidate.email = email
                 if phone:
-                    duplicate_candidate.phone = phone
-                duplicate_candidate.resume_file = filename
-                duplicate_candidate.parsed_data = resume_data
-                duplicate_candidate.embedding = embedding_vector
-                duplicate_candidate.updated_at = datetime.utcnow()
-                
-                db.session.commit()
-                logger.debug(f"Updated candidate ID: {candidate_id}")
+                    candidate.phone = phone
+                candidate.resume_file = filename
             else:
                 # Create a new candidate
                 candidate = Candidate(
@@ -1598,22 +1531,24 @@ def create_app():
                     email=email,
                     phone=phone,
                     resume_file=filename,
-                    parsed_data=resume_data,
-                    embedding=embedding_vector,
                     uploaded_by=recruiter.id
                 )
-                
                 db.session.add(candidate)
-                db.session.commit()
-                candidate_id = candidate.id
-                logger.debug(f"Created new candidate ID: {candidate_id}")
+            
+            db.session.commit()
+            candidate_id = candidate.id
+            logger.debug(f"{'Updated' if is_update else 'Created new'} candidate ID: {candidate_id}")
+            
+            # Parsing, embedding and matching run on the ingestion queue
+            ingest_job = enqueue_job('resume', stored, recruiter_id=recruiter.id, candidate_id=candidate_id)
             
             # Return success response
             return jsonify({
                 'message': message,
                 'candidate_id': candidate_id,
-                'is_update': is_update
-            }), 200
+                'is_update': is_update,
+                'job_id': ingest_job.id
+            }), 202
             
         except Exception as e:
             logger.error(f"Resume text upload error: {str(e)}")
@@ -1623,7 +1558,20 @@ def create_app():
     @recruiter_required
     @rate_limited('uploads')
     @requires_permission('candidates:bulk_add')
+    @idempotent('candidates_bulk')
     def bulk_upload_resumes(recruiter):
+        # Must be raised before request.files parses the body
+        max_files = app.config['BULK_UPLOAD_MAX_FILES']
+        request.max_content_length = app.config['BULK_UPLOAD_MAX_BYTES']
+        request.max_form_parts = max(request.max_form_parts or 0, max_files + 100)
+        
+        # Refuse before the body is read and spooled, counting the fewest files that fit
+        # in its length; checked again with the real count below
+        estimate = min(max_files, max(1, math.ceil((request.content_length or 0) / UPLOAD_MAX_FILE_BYTES)))
+        decision = check_admission('bulk', estimate, provisional=True)
+        if not decision.admitted:
+            return admission_refused(decision)
+        
         if 'files' not in request.files:
             return jsonify({'error': 'No files uploaded'}), 400
             
@@ -1631,18 +1579,20 @@ def create_app():
         if not files:
             return jsonify({'error': 'Empty upload'}), 400
         
-        # Limit to 10 files
-        files = files[:10]
+        # Bulk batches only get the capacity not reserved for single uploads
+        decision = check_admission('bulk', min(len(files), max_files))
+        if not decision.admitted:
+            return admission_refused(decision)
             
         try:
             logger.debug(f"Bulk upload started with {len(files)} files")
             results = []
+            files, overflow = files[:max_files], files[max_files:]
             processed_count = 0
+            batch = None
+            # sha256 -> filename of files queued by this request
+            queued_hashes = {}
             
-            # Create a task queue to track processing
-            if not hasattr(app, 'task_queue'):
-                app.task_queue = []
-                
             for file in files:
                 if file.filename == '':
                     results.append({'filename': 'unknown', 'status': 'error', 'message': 'Empty filename'})
@@ -1653,41 +1603,52 @@ def create_app():
                     continue
                     
                 try:
-                    # Read file content
-                    content = file.read()
-                    filename = secure_filename(file.filename)
+                    # Streamed to disk in chunks, so memory use does not grow with the batch
+                    try:
+                        stored = save_upload(file)
+                    except UploadRejected as e:
+                        results.append({'filename': file.filename, 'status': 'error', 'message': str(e)})
+                        continue
+                    finally:
+                        file.close()
+                    
+                    # Identical bytes are answered with the existing candidate, not reprocessed
+                    duplicate = find_duplicate_candidate(stored['sha256'])
+                    if duplicate or stored['sha256'] in queued_hashes:
+                        discard_upload(stored)
+                        result = {'filename': file.filename, 'status': 'duplicate'}
+                        if duplicate:
+                            result.update({'message': f'Already uploaded as {duplicate.name}', 'candidate_id': duplicate.id})
+                        else:
+                            result['message'] = f"Same file as {queued_hashes[stored['sha256']]}"
+                        results.append(result)
+                        continue
+                    
+                    filename = stored['filename']
+                    queued_hashes[stored['sha256']] = filename
                     logger.debug(f"Processing file: {filename}")
                     
-                    # Save file locally
-                    local_path = os.path.join('static', 'uploads', filename)
-                    os.makedirs(os.path.dirname(local_path), exist_ok=True)
-                    with open(local_path, 'wb') as f:
-                        f.write(content)
+                    # Group the files so their progress can be followed as one batch
+                    if batch is None:
+                        batch = create_batch(recruiter.id, 0)
                     
-                    # Add to processing queue
-                    app.task_queue.append({
-                        'type': 'resume_processing',
-                        'filename': filename,
-                        'local_path': local_path,
-                        'recruiter_id': recruiter.id,
-                        'created_at': datetime.utcnow().isoformat()
-                    })
+                    # Add to the ingestion queue; the worker finds or creates the candidate
+                    ingest_job = enqueue_job(
+                        'resume',
+                        stored,
+                        recruiter_id=recruiter.id,
+                        batch_id=batch.id,
+                        commit=False
+                    )
+                    db.session.flush()
                     
                     processed_count += 1
                     results.append({
                         'filename': filename, 
                         'status': 'queued', 
-                        'message': 'Added to processing queue'
+                        'message': 'Added to processing queue',
+                        'job_id': ingest_job.id
                     })
-                    
-                    # Process first file immediately if there's only a few
-                    if processed_count <= 3:
-                        # Start background thread for processing
-                        threading.Thread(
-                            target=process_resume_in_background,
-                            args=(app, local_path, filename, recruiter.id),
-                            daemon=True
-                        ).start()
                         
                 except Exception as file_error:
                     logger.error(f"Error processing file {file.filename}: {str(file_error)}")
@@ -1697,177 +1658,59 @@ def create_app():
                         'message': f'Processing error: {str(file_error)}'
                     })
                     
-            logger.debug(f"Bulk upload completed. Processed: {processed_count}, Total results: {len(results)}")
-            return jsonify({
+            for file in overflow:
+                results.append({'filename': file.filename, 'status': 'error', 'message': f'Only {max_files} files can be uploaded at once'})
+            
+            response = {
                 'results': results,
                 'message': f"Successfully queued {processed_count} files for processing.",
-                'queued_files': processed_count
-            }), 202
+                'queued_files': processed_count,
+                'duplicate_files': sum(1 for result in results if result['status'] == 'duplicate')
+            }
+            if batch is not None:
+                batch.total_files = processed_count
+                db.session.commit()
+                notify_workers()
+                response.update({
+                    'batch_id': batch.id,
+                    'status_url': url_for('get_upload_batch_api', batch_id=batch.id),
+                    'events_url': url_for('upload_batch_events', batch_id=batch.id)
+                })
+            
+            logger.debug(f"Bulk upload completed. Processed: {processed_count}, Total results: {len(results)}")
+            return jsonify(response), 202
             
         except Exception as e:
+            db.session.rollback()
             logger.error(f"Bulk upload failed: {str(e)}")
             return jsonify({'error': 'Bulk processing failed: ' + str(e)}), 500
             
-    # Background processing function
-    def process_resume_in_background(app, file_path, filename, recruiter_id):
-        try:
-            with app.app_context():
-                logger.debug(f"Background processing started for {filename}")
-                
-                # Read file content
-                with open(file_path, 'rb') as f:
-                    content = f.read()
-                
-                # Extract text
-                text = ""
-                try:
-                    img = Image.open(BytesIO(content))
-                    text = pytesseract.image_to_string(img)
-                    logger.debug("Extracted text from image")
-                except Exception:
-                    # Assume it's raw text
-                    text = content.decode('utf-8', errors='ignore')
-                    logger.debug("Decoded text from bytes")
-                
-                # Limit text size
-                if len(text) > 10000:
-                    text = text[:10000]
-                    
-                # Basic parsing
-                basic_resume_data = {
-                    "skills": extract_skills_from_text(text),
-                    "experience": [],
-                    "education": [],
-                    "summary": text[:500] + "..."
-                }
-                
-                # Try OpenAI analysis
-                try:
-                    logger.debug("Calling OpenAI for resume analysis")
-                    analysis = openai.chat.completions.create(
-                        model="gpt-3.5-turbo",
-                        messages=[{
-                            "role": "system",
-                            "content": "You are a resume parser. Extract the following information from the resume text and return it as JSON: skills (list), experience (list of jobs with company, title, years), education (list of degrees with school, degree, field, year), summary (brief overview). Format all text properly and ensure lists are well-structured."
-                        }, {
-                            "role": "user",
-                            "content": text
-                        }],
-                        response_format={"type": "json_object"},
-                        max_tokens=500
-                    )
-                    resume_data = json.loads(analysis.choices[0].message.content)
-                    logger.debug("OpenAI resume analysis complete")
-                except Exception as openai_error:
-                    logger.error(f"OpenAI resume analysis failed: {str(openai_error)}")
-                    resume_data = basic_resume_data
-                
-                # Generate embeddings
-                try:
-                    logger.debug("Generating embeddings")
-                    embedding_response = openai.embeddings.create(
-                        input=text[:1000],
-                        model="text-embedding-3-small"
-                    )
-                    embedding_vector = embedding_response.data[0].embedding
-                    logger.debug("Embeddings generated")
-                except Exception:
-                    embedding_vector = [0.0] * 1536
-                
-                # Extract email from resume if possible
-                extracted_email = None
-                email_pattern = r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b'
-                email_matches = re.findall(email_pattern, text)
-                if email_matches:
-                    extracted_email = email_matches[0]
-                    logger.debug(f"Extracted email: {extracted_email}")
-                
-                # Generate a unique name based on filename
-                name_from_file = os.path.splitext(filename)[0].replace('_', ' ').title()
-                
-                # Check for existing candidate with this email
-                existing_candidate = None
-                if extracted_email:
-                    existing_candidate = Candidate.query.filter_by(email=extracted_email).first()
-                
-                if existing_candidate:
-                    logger.debug(f"Updating existing candidate: {existing_candidate.id}")
-                    # Update fields
-                    existing_candidate.resume_file = filename
-                    existing_candidate.gcs_url = '/static/uploads/' + filename
-                    existing_candidate.parsed_data = resume_data
-                    existing_candidate.embedding = embedding_vector
-                    
-                    candidate = existing_candidate
-                    db.session.commit()
-                    
-                    # Delete old matches
-                    JobCandidateMatch.query.filter_by(candidate_id=candidate.id).delete()
-                    db.session.commit()
-                else:
-                    logger.debug("Creating new candidate from bulk upload")
-                    # Create new candidate
-                    candidate = Candidate(
-                        name=name_from_file,
-                        email=extracted_email if extracted_email else "",
-                        phone="",
-                        resume_file=filename,
-                        gcs_url='/static/uploads/' + filename,
-                        parsed_data=resume_data,
-                        embedding=embedding_vector
-                    )
-                    db.session.add(candidate)
-                    db.session.commit()
-                
-                # Find matching jobs
-                logger.debug("Finding job matches")
-                jobs = Job.query.filter_by(status='active').all()
-                
-                for job in jobs:
-                    score = calculate_match_score(candidate, job)
-                    if score > 0.3:  # Reduced threshold from 0.6 to 0.3 (30%)
-                        match = JobCandidateMatch(
-                            job_id=job.id,
-                            candidate_id=candidate.id,
-                            score=score
-                        )
-                        db.session.add(match)
-                
-                db.session.commit()
-                logger.debug(f"Background processing completed for {filename}")
-                
-        except Exception as process_error:
-            logger.error(f"Background processing failed: {str(process_error)}")
-            
     @app.route('/api/candidates/<job_id>', methods=['GET'])
+    @app.route('/jobs/<int:job_id>/matches', methods=['GET'])
     @recruiter_required
     @requires_permission('candidates:view')
+    @replica_reads
     def get_candidates_for_job(recruiter, job_id):
-        # Find the job
-        job = Job.query.filter_by(id=job_id, recruiter_id=recruiter.id).first()
+        # /api/candidates/<number> is served by get_candidate_api, so links use /jobs/<id>/matches
+        job = db.session.get(Job, job_id)
         
-        if not job:
+        if not job or not get_visibility(recruiter).can_view_job(job):
             return jsonify({'error': 'Job not found'}), 404
             
-        # Get matches
-        matches = JobCandidateMatch.query.filter_by(job_id=job.id).order_by(JobCandidateMatch.score.desc()).all()
+        # One page of matches, best first; later pages load as the list scrolls
+        page = list_job_matches(
+            job,
+            after=request.args.get('after'),
+            limit=request.args.get('limit', type=int)
+        )
         
-        candidates_list = []
-        for match in matches:
-            candidate = Candidate.query.get(match.candidate_id)
-            if candidate:
-                candidates_list.append({
-                    'id': candidate.id,
-                    'name': candidate.name,
-                    'email': candidate.email,
-                    'phone': candidate.phone,
-                    'score': match.score,
-                    'skills': candidate.parsed_data.get('skills', []) if candidate.parsed_data else [],
-                    'experience': candidate.parsed_data.get('experience', []) if candidate.parsed_data else [],
-                    'resume_url': candidate.gcs_url
-                })
+        if request.args.get('fragment'):
+            return render_template('candidate_match_rows.html', matches=page['matches'],
+                                   next_cursor=page['next_cursor'], job=job)
         
-        return render_template('candidate_matches.html', matches=candidates_list, job=job)
+        render = stream_template if app.config['STREAM_MATCH_PAGES'] else render_template
+        return render('candidate_matches.html', matches=page['matches'], next_cursor=page['next_cursor'],
+                      total_matches=page['total'], is_first_page=not request.args.get('after'), job=job)
     
     @app.route('/api/matches/refresh', methods=['POST'])
     @recruiter_required
@@ -1879,10 +1722,10 @@ def create_app():
             db.session.commit()
             
             # Get all active jobs
-            jobs = Job.query.filter_by(status='active').all()
+            jobs = Job.query.options(*job_matching_options()).filter_by(status='active').all()
             
             # Get all candidates
-            candidates = Candidate.query.all()
+            candidates = Candidate.query.options(*candidate_matching_options()).all()
             
             match_count = 0
             
@@ -1899,7 +1742,10 @@ def create_app():
                         db.session.add(match)
                         match_count += 1
             
+            # Every job's aggregates are recomputed in the transaction that stores the new matches
+            rebuild_job_match_stats()
             db.session.commit()
+            invalidate_dashboard_stats()
             logger.debug(f"Refreshed matches: {match_count} new matches created")
             
             return jsonify({
@@ -1918,52 +1764,32 @@ def create_app():
     @app.route('/my-candidates')
     @recruiter_required
     @requires_permission('candidates:view')
+    @replica_reads
     def view_candidates(recruiter):
         try:
             logger.debug(f"My Candidates page accessed by recruiter ID: {recruiter.id}")
             
-            # Get candidates uploaded by this recruiter
-            own_candidates = Candidate.query.filter_by(uploaded_by=recruiter.id).all()
-            
-            # For admin users, show all candidates in the system
-            if recruiter.has_permission('candidates:view_all'):
-                logger.debug("Admin user accessing all candidates")
-                shared_candidates = Candidate.query.filter(
-                    Candidate.uploaded_by != recruiter.id
-                ).all()
-                is_admin_view = True
-            else:
-                # Get candidates shared with this recruiter through sharing relationships
-                logger.debug("Regular user accessing shared candidates")
-                shared_candidates = []
-                
-                # Get sharing relationships where this recruiter has access to candidates
-                sharing_relationships = RecruiterSharing.query.filter_by(
-                    shared_with_id=recruiter.id,
-                    share_candidates=True
-                ).all()
-                
-                # Get candidates from those relationships
-                for relationship in sharing_relationships:
-                    owner_candidates = Candidate.query.filter_by(uploaded_by=relationship.owner_id).all()
-                    shared_candidates.extend(owner_candidates)
-                    
-                is_admin_view = False
-            
-            # Combine own and shared candidates
-            candidates = own_candidates + shared_candidates
+            # Admins see every candidate; everyone else their own and those shared with them
+            is_admin_view = recruiter.has_permission('candidates:view_all')
+            page = list_visible_candidates(
+                recruiter,
+                view_all=is_admin_view,
+                after=request.args.get('after'),
+                limit=request.args.get('limit', type=int)
+            )
                 
-            logger.debug(f"Found {len(candidates)} candidates for display ({len(own_candidates)} own, {len(shared_candidates)} shared)")
-            
-            # Get recruiter names for displaying who uploaded each candidate
-            recruiter_ids = set(c.uploaded_by for c in candidates if c.uploaded_by is not None)
-            recruiters = {r.id: r for r in Recruiter.query.filter(Recruiter.id.in_(recruiter_ids)).all()}
+            logger.debug(f"Showing {len(page['candidates'])} candidates ({count_label(page['total'])} visible)")
                 
             return render_template('candidates.html', 
-                                  candidates=candidates, 
+                                  candidates=page['candidates'], 
                                   current_user=recruiter, 
                                   is_admin_view=is_admin_view,
-                                  recruiters=recruiters)
+                                  total_candidates=count_label(page['total']),
+                                  own_candidates_count=count_label(page['own_total']),
+                                  shared_candidates_count=count_label(page['shared_total']),
+                                  has_shared_candidates=page['shared_total'] > 0,
+                                  next_cursor=page['next_cursor'],
+                                  is_first_page=not request.args.get('after'))
         except Exception as e:
             logger.error(f"View candidates error: {str(e)}")
             return render_template('error.html', error=str(e))
@@ -1971,57 +1797,47 @@ def create_app():
     @app.route('/candidates/<int:candidate_id>')
     @recruiter_required
     @requires_permission('candidates:view')
+    @replica_reads
     def view_candidate_detail(recruiter, candidate_id):
         try:
-            candidate = Candidate.query.get_or_404(candidate_id)
-            
-            # Check if recruiter has permission to view this candidate
-            can_view = False
+            candidate = Candidate.query.options(*candidate_profile_options()).get_or_404(candidate_id)
             
-            # Admin can view all
-            if recruiter.has_permission('candidates:view_all'):
-                can_view = True
-            # Uploaded by the current recruiter
-            elif candidate.uploaded_by == recruiter.id:
-                can_view = True
-            # Shared via sharing relationships
-            else:
-                sharing = RecruiterSharing.query.filter_by(
-                    owner_id=candidate.uploaded_by,
-                    shared_with_id=recruiter.id,
-                    share_candidates=True
-                ).first()
-                
-                if sharing:
-                    can_view = True
+            # Whose jobs and candidates this recruiter can see, loaded once for the request
+            visibility = get_visibility(recruiter)
             
-            if not can_view:
+            if not visibility.can_view_candidate(candidate):
                 flash('You do not have permission to view this candidate.', 'error')
                 return redirect(url_for('view_candidates'))
             
+            # Queue the persona if it was never generated; the page polls for it.
+            # Queueing commits, so it happens before the matched jobs are loaded
+            # (a commit expires them, and each would then be reloaded on its own)
+            persona_status = get_persona_status(candidate)
+            if persona_status == 'missing':
+                enqueue_persona(candidate.id)
+                persona_status = 'pending'
+            
             # Get all matches for this candidate
             matches = JobCandidateMatch.query.filter_by(candidate_id=candidate.id).all()
             
-            # Get the jobs this candidate matches with
+            # Get the jobs this candidate matches with, in batches, keeping the ones the recruiter can view
+            jobs_by_id = load_by_ids(Job, [match.job_id for match in matches])
             matched_jobs = []
             for match in matches:
-                job = Job.query.get(match.job_id)
-                # Check if recruiter can view this job
-                if job and recruiter.can_access_job(job):
+                job = jobs_by_id.get(match.job_id)
+                if job and visibility.can_view_job(job):
                     job.match_score = round(match.score * 100)
                     matched_jobs.append(job)
             
             # Sort by match score (descending)
             matched_jobs.sort(key=lambda x: x.match_score, reverse=True)
             
-            # Get candidate ratings
-            candidate_ratings = CandidateRating.query.filter_by(candidate_id=candidate.id).order_by(CandidateRating.created_at.desc()).all()
+            # Get candidate ratings, with the recruiters who gave them
+            candidate_ratings = CandidateRating.query.options(db.selectinload(CandidateRating.recruiter)) \
+                .filter_by(candidate_id=candidate.id).order_by(CandidateRating.created_at.desc()).all()
             
             # Get current recruiter's rating if it exists
-            candidate_rating = CandidateRating.query.filter_by(
-                candidate_id=candidate.id,
-                recruiter_id=recruiter.id
-            ).first()
+            candidate_rating = next((rating for rating in candidate_ratings if rating.recruiter_id == recruiter.id), None)
             
             return render_template(
                 'candidate_detail.html', 
@@ -2029,6 +1845,7 @@ def create_app():
                 matched_jobs=matched_jobs,
                 candidate_ratings=candidate_ratings,
                 candidate_rating=candidate_rating,
+                persona_status=persona_status,
                 current_user=recruiter
             )
         except Exception as e:
@@ -2038,6 +1855,7 @@ def create_app():
     @app.route('/api/candidates/<int:candidate_id>', methods=['GET'])
     @recruiter_required
     @requires_permission('candidates:view')
+    @replica_reads
     def get_candidate_api(recruiter, candidate_id):
         try:
             # Check if the request is coming from an XHR/AJAX call or direct browser access
@@ -2050,46 +1868,41 @@ def create_app():
                 return redirect(url_for('view_candidate_detail', candidate_id=candidate_id))
             
             # Otherwise proceed with API response for programmatic access
-            candidate = Candidate.query.get_or_404(candidate_id)
+            candidate = Candidate.query.options(*candidate_profile_options()).get_or_404(candidate_id)
             
-            # Check if recruiter has permission to view this candidate
-            can_view = False
+            # Whose jobs and candidates this recruiter can see, loaded once for the request
+            visibility = get_visibility(recruiter)
             
-            # Admin can view all
-            if recruiter.has_permission('candidates:view_all'):
-                can_view = True
-            # Uploaded by the current recruiter
-            elif candidate.uploaded_by == recruiter.id:
-                can_view = True
-            # Shared via sharing relationships
-            else:
-                sharing = RecruiterSharing.query.filter_by(
-                    owner_id=candidate.uploaded_by,
-                    shared_with_id=recruiter.id,
-                    share_candidates=True
-                ).first()
-                
-                if sharing:
-                    can_view = True
-            
-            if not can_view:
+            if not visibility.can_view_candidate(candidate):
                 return jsonify({
                     'error': 'You do not have permission to view this candidate.'
                 }), 403
             
+            # Personas are generated in the background; queue one if it is missing
+            # (before loading matches, as queueing commits and expires loaded rows)
+            persona_status = get_persona_status(candidate)
+            if persona_status == 'missing':
+                enqueue_persona(candidate.id)
+                persona_status = 'pending'
+            
             # Get job matches
             matches = JobCandidateMatch.query.filter_by(candidate_id=candidate.id).all()
             
+            # Load the matched jobs and, for jobs of other recruiters, their owners in batches
+            jobs_by_id = load_by_ids(Job, [match.job_id for match in matches])
+            owners_by_id = load_by_ids(Recruiter, [job.recruiter_id for job in jobs_by_id.values()
+                                                   if job.recruiter_id != recruiter.id])
+            
             # Format matches data
             matches_data = []
             for match in matches:
-                job = Job.query.get(match.job_id)
+                job = jobs_by_id.get(match.job_id)
                 # For admin users, show all job matches, not just their own
-                if job and (recruiter.has_permission('jobs:view_all') or job.recruiter_id == recruiter.id):
+                if job and (visibility.view_all_jobs or job.recruiter_id == recruiter.id):
                     # For non-recruiter jobs, indicate the owner
                     job_recruiter = None
                     if job.recruiter_id != recruiter.id:
-                        job_recruiter = Recruiter.query.get(job.recruiter_id)
+                        job_recruiter = owners_by_id.get(job.recruiter_id)
                         
                     matches_data.append({
                         'job_id': job.id,
@@ -2101,11 +1914,12 @@ def create_app():
                         'owner_name': job_recruiter.name if job_recruiter else None
                     })
             
-            # Get ratings for this candidate
-            ratings = CandidateRating.query.filter_by(candidate_id=candidate.id).all()
+            # Get ratings for this candidate, with the recruiters who gave them
+            ratings = CandidateRating.query.options(db.selectinload(CandidateRating.recruiter)) \
+                .filter_by(candidate_id=candidate.id).all()
             ratings_data = []
             for rating in ratings:
-                rater = Recruiter.query.get(rating.recruiter_id)
+                rater = rating.recruiter
                 ratings_data.append({
                     'id': rating.id,
                     'recruiter_id': rating.recruiter_id,
@@ -2116,21 +1930,6 @@ def create_app():
                     'updated_at': rating.updated_at.isoformat()
                 })
             
-            # Check if candidate has a persona, if not generate one
-            if not candidate.persona:
-                try:
-                    from utils.persona_generator import generate_candidate_persona
-                    candidate.persona = generate_candidate_persona(candidate.parsed_data)
-                    db.session.commit()
-                except Exception as e:
-                    logger.error(f"Error generating persona: {str(e)}")
-                    candidate.persona = {
-                        "ideal_roles": [],
-                        "key_strengths": [],
-                        "growth_areas": [],
-                        "team_fit": "Not analyzed"
-                    }
-            
             # Format candidate data
             candidate_data = {
                 'id': candidate.id,
@@ -2142,7 +1941,8 @@ def create_app():
                 'created_at': candidate.created_at.isoformat(),
                 'matches': matches_data,
                 'ratings': ratings_data,
-                'persona': candidate.persona,
+                'persona': candidate.persona if persona_status == 'ready' else pending_persona(persona_status),
+                'persona_status': persona_status,
                 'uploaded_by': candidate.uploaded_by,
                 'job_id': candidate.job_id
             }
@@ -2296,6 +2096,97 @@ def create_app():
             else:
                 return jsonify({'error': str(e)}), 500
     
+    @app.route('/api/candidates/<int:candidate_id>/persona', methods=['GET'])
+    @recruiter_required
+    @requires_permission('candidates:view')
+    def get_candidate_persona_api(recruiter, candidate_id):
+        """
+        Get the background-generated persona for a candidate
+        """
+        try:
+            candidate = Candidate.query.get_or_404(candidate_id)
+            
+            if not recruiter.can_access_candidate(candidate):
+                return jsonify({
+                    'error': 'You do not have permission to view this candidate.'
+                }), 403
+            
+            persona_status = get_persona_status(candidate)
+            if persona_status == 'missing':
+                enqueue_persona(candidate.id)
+                persona_status = 'pending'
+            
+            return jsonify({
+                'candidate_id': candidate.id,
+                'status': persona_status,
+                'persona': candidate.persona if persona_status == 'ready' else pending_persona(persona_status)
+            })
+        except Exception as e:
+            logger.error(f"Get persona error: {str(e)}")
+            return jsonify({'error': str(e)}), 500
+
+    @app.route('/api/ingest/jobs/<int:job_id>', methods=['GET'])
+    @recruiter_required
+    def get_ingest_job_api(recruiter, job_id):
+        """
+        Get the status of a queued resume or persona job
+        """
+        try:
+            ingest_job = get_job(job_id)
+            if not ingest_job:
+                return jsonify({'error': 'Job not found'}), 404
+
+            candidate = Candidate.query.get(ingest_job.candidate_id) if ingest_job.candidate_id else None
+            if not (recruiter.is_admin() or ingest_job.recruiter_id == recruiter.id
+                    or (candidate and recruiter.can_access_candidate(candidate))):
+                return jsonify({'error': 'You do not have permission to view this job.'}), 403
+
+            return jsonify(ingest_job.to_dict())
+        except Exception as e:
+            logger.error(f"Get ingest job error: {str(e)}")
+            return jsonify({'error': str(e)}), 500
+
+    def _get_visible_batch(recruiter, batch_id):
+        batch = db.session.get(UploadBatch, batch_id)
+        if batch and (recruiter.is_admin() or batch.recruiter_id == recruiter.id):
+            return batch
+        return None
+
+    @app.route('/api/uploads/batches/<int:batch_id>', methods=['GET'])
+    @recruiter_required
+    def get_upload_batch_api(recruiter, batch_id):
+        """
+        Get the progress of a bulk upload: files per stage, per-file status and timings
+        """
+        try:
+            batch = _get_visible_batch(recruiter, batch_id)
+            if not batch:
+                return jsonify({'error': 'Upload batch not found'}), 404
+
+            return jsonify(get_batch_status(batch))
+        except Exception as e:
+            logger.error(f"Get upload batch error: {str(e)}")
+            return jsonify({'error': str(e)}), 500
+
+    @app.route('/api/uploads/batches/<int:batch_id>/events', methods=['GET'])
+    @recruiter_required
+    def upload_batch_events(recruiter, batch_id):
+        """
+        Stream the progress of a bulk upload as server-sent events
+        """
+        if not _get_visible_batch(recruiter, batch_id):
+            return jsonify({'error': 'Upload batch not found'}), 404
+
+        return Response(
+            stream_with_context(stream_batch_events(batch_id)),
+            mimetype='text/event-stream',
+            headers={
+                'Cache-Control': 'no-cache',
+                # Stop nginx-style proxies from buffering the stream
+                'X-Accel-Buffering': 'no'
+            }
+        )
+
     @app.route('/api/candidates/<int:candidate_id>/generate-persona', methods=['POST'])
     @recruiter_required
     @requires_permission('candidates:generate_persona')
@@ -2324,62 +2215,31 @@ def create_app():
     @app.route('/my-jobs')
     @recruiter_required
     @requires_permission('jobs:view')
+    @replica_reads
     def view_jobs(recruiter):
         try:
             logger.debug(f"My Jobs page accessed by recruiter ID: {recruiter.id}")
             
-            # Get jobs created by this recruiter
-            own_jobs = Job.query.filter_by(recruiter_id=recruiter.id).all()
-            
-            # For admin users, show all jobs in the system
-            if recruiter.has_permission('jobs:view_all'):
-                logger.debug("Admin user accessing all jobs")
-                shared_jobs = Job.query.filter(Job.recruiter_id != recruiter.id).all()
-                is_admin_view = True
-            else:
-                # Get jobs shared with this recruiter through sharing relationships
-                logger.debug("Regular user accessing shared jobs")
-                shared_jobs = []
-                
-                # Get sharing relationships where this recruiter has access to jobs
-                sharing_relationships = RecruiterSharing.query.filter_by(
-                    shared_with_id=recruiter.id,
-                    share_jobs=True
-                ).all()
-                
-                # Get jobs from those relationships
-                for relationship in sharing_relationships:
-                    owner_jobs = Job.query.filter_by(recruiter_id=relationship.owner_id).all()
-                    shared_jobs.extend(owner_jobs)
-                    
-                is_admin_view = False
-            
-            # Combine own and shared jobs
-            jobs = own_jobs + shared_jobs
+            # Admins see every job; everyone else their own and those shared with them
+            is_admin_view = recruiter.has_permission('jobs:view_all')
+            page = list_visible_jobs(
+                recruiter,
+                view_all=is_admin_view,
+                after=request.args.get('after'),
+                limit=request.args.get('limit', type=int)
+            )
                 
-            logger.debug(f"Found {len(jobs)} jobs for display ({len(own_jobs)} own, {len(shared_jobs)} shared)")
-            
-            # Get recruiter names for displaying who owns each job
-            recruiter_ids = set(job.recruiter_id for job in jobs)
-            recruiters = {r.id: r for r in Recruiter.query.filter(Recruiter.id.in_(recruiter_ids)).all()}
-            
-            # Add match info and application count to each job
-            for job in jobs:
-                matches = JobCandidateMatch.query.filter_by(job_id=job.id).all()
-                job.matches = matches
-                job.match_score = round(sum([m.score for m in matches]) / max(1, len(matches)) * 100) if matches else 0
-            
-            # If admin view, get all recruiters for displaying owner info
-            recruiters = {}
-            if is_admin_view:
-                all_recruiters = Recruiter.query.all()
-                recruiters = {r.id: r for r in all_recruiters}
+            logger.debug(f"Showing {len(page['jobs'])} of {page['total']} jobs ({page['own_total']} own)")
             
             return render_template('jobs.html', 
-                                  jobs=jobs, 
+                                  jobs=page['jobs'], 
                                   current_user=recruiter,
                                   is_admin_view=is_admin_view,
-                                  recruiters=recruiters)
+                                  total_jobs=page['total'],
+                                  own_jobs_count=page['own_total'],
+                                  shared_jobs_count=page['total'] - page['own_total'],
+                                  next_cursor=page['next_cursor'],
+                                  is_first_page=not request.args.get('after'))
         except Exception as e:
             logger.error(f"View jobs error: {str(e)}")
             return render_template('error.html', error=str(e))
@@ -2464,6 +2324,28 @@ def create_app():
             logger.error(f"Error getting expiring jobs: {str(e)}")
             return jsonify({'error': f"Failed to get expiring jobs: {str(e)}"}), 500
     
+    @app.route('/api/system/metrics', methods=['GET'])
+    @recruiter_required
+    @requires_permission('system:metrics')
+    def get_system_metrics(recruiter):
+        """
+        Get runtime counters for this worker process
+        """
+        try:
+            return jsonify({
+                'http_clients': get_client_metrics(),
+                'ingest_queue': get_ingest_queue_metrics(),
+                'dashboard_stats': get_dashboard_stats_metrics(),
+                'admission': get_admission_metrics(),
+                'persona_queue': get_persona_queue_metrics(),
+                'ocr': get_ocr_metrics(),
+                'resume_parser': get_parser_metrics(),
+                'db_routing': get_routing_metrics()
+            })
+        except Exception as e:
+            logger.error(f"Error getting system metrics: {str(e)}")
+            return jsonify({'error': f"Failed to get system metrics: {str(e)}"}), 500
+    
     # Template filters
     @app.template_filter('datetimeformat')
     def datetimeformat(value, format='%b %d, %Y'):
@@ -2485,52 +2367,6 @@ def create_app():
         return jsonify({'error': 'Internal server error'}), 500
     
     # Helper functions
-    def calculate_match_score(candidate, job):
-        try:
-            # Get embeddings similarity using dot product
-            candidate_embedding = candidate.embedding
-            job_embedding = job.embedding
-            
-            if not candidate_embedding or not job_embedding:
-                return 0.0
-                
-            embedding_similarity = sum(a * b for a, b in zip(candidate_embedding, job_embedding))
-            
-            # Get skills match
-            candidate_skills = candidate.parsed_data.get('skills', []) if candidate.parsed_data else []
-            required_skills = job.required_skills or []
-            preferred_skills = job.preferred_skills or []
-            
-            # Normalize skills to lowercase for comparison
-            candidate_skills_norm = set(s.lower() for s in candidate_skills)
-            required_skills_norm = set(s.lower() for s in required_skills)
-            preferred_skills_norm = set(s.lower() for s in preferred_skills)
-            
-            # Calculate match percentages
-            if required_skills_norm:
-                required_match = len(candidate_skills_norm.intersection(required_skills_norm)) / len(required_skills_norm)
-            else:
-                required_match = 1.0  # Full match if no required skills
-                
-            if preferred_skills_norm:
-                preferred_match = len(candidate_skills_norm.intersection(preferred_skills_norm)) / len(preferred_skills_norm)
-            else:
-                preferred_match = 0.5  # Neutral score if no preferred skills
-                
-            # Weight required skills higher than preferred
-            skills_match = (required_match * 0.7) + (preferred_match * 0.3)
-            
-            # Calculate combined score (60% embedding, 40% skills)
-            combined_score = (embedding_similarity * 0.6) + (skills_match * 0.4)
-            
-            # Normalize to 0-1 range
-            normalized_score = max(0.0, min(1.0, combined_score))
-            return normalized_score
-            
-        except Exception as e:
-            logger.error(f"Match score calculation failed: {str(e)}")
-            return 0.0
-    
     def parse_rate_limit(limit_str):
         limit, _, window = limit_str.partition('/')
         return int(limit), {'minute': 60, 'hour': 3600}.get(window, 60)
@@ -0,0 +1,58 @@
+#!/usr/bin/env python
+"""
+Script to run mass re-parse, persona and re-embedding jobs through the OpenAI Batch API.
+Run it again with the same --run-id to resume an interrupted backfill.
+"""
+
+import os
+import json
+import argparse
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+# Import after environment variables are loaded
+from app import create_app
+from utils.batch_jobs import BatchRun, BATCH_KINDS, DEFAULT_CHUNK_SIZE, DEFAULT_POLL_INTERVAL
+
+def run_backfill(args):
+    """Create or resume a batch run and print its throughput report"""
+    app = create_app(start_workers=False)
+
+    with app.app_context():
+        batch_run = BatchRun(
+            args.kind,
+            run_id=args.run_id,
+            workdir=args.workdir,
+            use_stub=args.stub,
+            chunk_size=args.chunk_size,
+            poll_interval=args.poll_interval,
+            only_missing=not args.all,
+            limit=args.limit
+        )
+        print(f"Batch run: {batch_run.run_id} ({batch_run.run_dir})")
+
+        report = batch_run.run()
+
+        print("\n== Batch backfill report ==")
+        print(json.dumps(report, indent=2))
+        return report
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run AI Recruiter Pro backfills through the OpenAI Batch API")
+    parser.add_argument("kind", choices=sorted(BATCH_KINDS), help="What to backfill")
+    parser.add_argument("--run-id", help="Resume an existing run instead of starting a new one")
+    parser.add_argument("--workdir", default=os.environ.get('BATCH_WORKDIR', 'batch_jobs'),
+                        help="Directory for request files and checkpoints (default: batch_jobs)")
+    parser.add_argument("--all", action="store_true",
+                        help="Include rows that already have a value instead of only missing ones")
+    parser.add_argument("--limit", type=int, help="Only process this many rows")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE,
+                        help=f"Requests per batch file (default: {DEFAULT_CHUNK_SIZE})")
+    parser.add_argument("--poll-interval", type=int, default=DEFAULT_POLL_INTERVAL,
+                        help=f"Seconds between status checks (default: {DEFAULT_POLL_INTERVAL})")
+    parser.add_argument("--stub", action="store_true",
+                        help="Run requests locally through the synchronous API instead of the Batch API")
+
+    run_backfill(parser.parse_args())
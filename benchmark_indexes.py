@@ -0,0 +1,207 @@
+#!/usr/bin/env python
+"""
+Script to measure the hot queries with and without their indexes.
+
+A scratch database (SQLite by default, never DATABASE_URL) is seeded with a large
+dataset: recruiters, jobs, candidates, matches, ratings and sessions, without the
+large JSON columns, which do not affect index use. Every hot query (candidate
+lookups, match lists, job listings and expiry scans, session and rating lookups)
+is then timed and its query plan recorded twice: with every secondary index on
+those tables dropped, and with the indexes declared in models.py (the ones
+migrations.py creates) in place.
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import argparse
+from datetime import datetime, timedelta
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+SEED_CHUNK = 5000
+HOT_TABLES = ['candidates', 'job_candidate_matches', 'jobs', 'sessions', 'candidate_ratings', 'recruiter_sharing']
+
+def seed(db, args, rng):
+    """Fill the scratch database, unless it was seeded by an earlier run"""
+    from sqlalchemy import insert, func
+    from models import Recruiter, Job, Candidate, JobCandidateMatch, CandidateRating, Session, RecruiterSharing
+
+    if db.session.query(func.count(Candidate.id)).scalar():
+        return
+
+    now = datetime.utcnow()
+    print(f"Seeding {args.candidates} candidates, {args.jobs} jobs and {args.jobs * args.matches_per_job} matches...")
+    db.session.execute(insert(Recruiter), [
+        {'name': f"Recruiter {i}", 'email': f"index-benchmark-{i}@example.com", 'password_hash': 'x'}
+        for i in range(args.recruiters)
+    ])
+    recruiter_ids = [recruiter_id for (recruiter_id,) in db.session.query(Recruiter.id)]
+    db.session.execute(insert(RecruiterSharing), [
+        {'owner_id': owner_id, 'shared_with_id': rng.choice(recruiter_ids), 'share_jobs': True, 'share_candidates': True}
+        for owner_id in recruiter_ids[:len(recruiter_ids) // 2]
+    ])
+
+    def chunks(total, make_row):
+        for start in range(0, total, SEED_CHUNK):
+            yield [make_row(i) for i in range(start, min(start + SEED_CHUNK, total))]
+
+    for rows in chunks(args.jobs, lambda i: {
+        'title': f"Job {i}", 'description': 'Benchmark job', 'recruiter_id': rng.choice(recruiter_ids),
+        'status': rng.choice(['active', 'active', 'active', 'expired', 'archived']),
+        'created_at': now - timedelta(minutes=i), 'expires_at': now + timedelta(hours=rng.randint(-2000, 2000)),
+        'notification_sent': False
+    }):
+        db.session.execute(insert(Job), rows)
+    for rows in chunks(args.candidates, lambda i: {
+        'name': f"Candidate {i}", 'email': f"candidate{i}@example.com", 'phone': f"+1555{i:07d}",
+        'uploaded_by': rng.choice(recruiter_ids), 'created_at': now - timedelta(seconds=i)
+    }):
+        db.session.execute(insert(Candidate), rows)
+    db.session.commit()
+
+    job_ids = [job_id for (job_id,) in db.session.query(Job.id)]
+    candidate_ids = [candidate_id for (candidate_id,) in db.session.query(Candidate.id)]
+    for rows in chunks(args.jobs * args.matches_per_job, lambda i: {
+        'job_id': job_ids[i // args.matches_per_job], 'candidate_id': rng.choice(candidate_ids),
+        'score': round(rng.random(), 4)
+    }):
+        db.session.execute(insert(JobCandidateMatch), rows)
+    for rows in chunks(args.candidates // 4, lambda i: {
+        'candidate_id': rng.choice(candidate_ids), 'recruiter_id': rng.choice(recruiter_ids), 'score': rng.random()
+    }):
+        db.session.execute(insert(CandidateRating), rows)
+    for rows in chunks(args.recruiters * 20, lambda i: {
+        'id': os.urandom(16).hex(), 'recruiter_id': rng.choice(recruiter_ids), 'expires_at': now + timedelta(hours=1)
+    }):
+        db.session.execute(insert(Session), rows)
+    db.session.commit()
+
+def hot_queries(db, rng):
+    """The queries the indexes are for, with parameters picked from the seeded data"""
+    from sqlalchemy import select, func, tuple_
+    from models import Job, Candidate, JobCandidateMatch, CandidateRating, Session, RecruiterSharing
+
+    def pick(column):
+        return db.session.execute(select(column).order_by(func.random()).limit(1)).scalar()
+
+    now = datetime.utcnow()
+    recruiter_id = pick(Candidate.uploaded_by)
+    candidate_id = pick(JobCandidateMatch.candidate_id)
+    job_id = pick(JobCandidateMatch.job_id)
+    rating = db.session.execute(select(CandidateRating.candidate_id, CandidateRating.recruiter_id).limit(1)).one()
+    email = f"candidate{rng.randrange(db.session.query(func.count(Candidate.id)).scalar())}@example.com"
+    cursor = db.session.execute(select(Candidate.created_at, Candidate.id).order_by(Candidate.id).limit(1)
+                                .offset(db.session.query(func.count(Candidate.id)).scalar() // 2)).one()
+
+    return {
+        'candidate_by_email': select(Candidate.id).where(Candidate.email == email),
+        'candidates_by_uploader': select(Candidate.id, Candidate.name).where(Candidate.uploaded_by == recruiter_id)
+            .order_by(Candidate.created_at.desc(), Candidate.id.desc()).limit(25),
+        'candidates_page_after_cursor': select(Candidate.id, Candidate.name)
+            .where(tuple_(Candidate.created_at, Candidate.id) < tuple_(*cursor))
+            .order_by(Candidate.created_at.desc(), Candidate.id.desc()).limit(25),
+        'matches_for_job_by_score': select(JobCandidateMatch.candidate_id, JobCandidateMatch.score)
+            .where(JobCandidateMatch.job_id == job_id).order_by(JobCandidateMatch.score.desc()),
+        'matches_for_candidate': select(JobCandidateMatch.job_id, JobCandidateMatch.score)
+            .where(JobCandidateMatch.candidate_id == candidate_id),
+        'jobs_by_recruiter': select(Job.id, Job.title).where(Job.recruiter_id == recruiter_id)
+            .order_by(Job.created_at.desc(), Job.id.desc()).limit(25),
+        'jobs_newest_page': select(Job.id, Job.title).order_by(Job.created_at.desc(), Job.id.desc()).limit(25),
+        'expired_jobs': select(Job.id).where(Job.status == 'active', Job.expires_at < now),
+        'expiring_jobs': select(Job.id).where(Job.status == 'active', Job.notification_sent == False,
+                                              Job.expires_at >= now, Job.expires_at <= now + timedelta(days=7)),
+        'dashboard_match_stats': select(Job.id, func.count(JobCandidateMatch.id), func.avg(JobCandidateMatch.score))
+            .select_from(Job).outerjoin(JobCandidateMatch, JobCandidateMatch.job_id == Job.id)
+            .where(Job.recruiter_id == recruiter_id).group_by(Job.id),
+        'sharing_for_recruiter': select(RecruiterSharing.owner_id).where(RecruiterSharing.shared_with_id == recruiter_id),
+        'sessions_by_recruiter': select(Session.id).where(Session.recruiter_id == recruiter_id),
+        'rating_by_candidate_and_recruiter': select(CandidateRating.id)
+            .where(CandidateRating.candidate_id == rating[0], CandidateRating.recruiter_id == rating[1])
+    }
+
+def query_plan(conn, stmt):
+    """The database's plan for a statement, as one line"""
+    compiled = stmt.compile(dialect=conn.dialect, compile_kwargs={'literal_binds': True})
+    if conn.dialect.name == 'sqlite':
+        return '; '.join(row[-1] for row in conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {compiled}"))
+    return ' / '.join(row[0].strip() for row in conn.exec_driver_sql(f"EXPLAIN {compiled}"))
+
+def time_queries(conn, queries, runs):
+    """Median time and plan of each query"""
+    results = {}
+    for name, stmt in queries.items():
+        timings = []
+        for _ in range(runs):
+            started = time.perf_counter()
+            conn.execute(stmt).fetchall()
+            timings.append((time.perf_counter() - started) * 1000)
+        results[name] = {'ms': round(sorted(timings)[len(timings) // 2], 3), 'plan': query_plan(conn, stmt)}
+    return results
+
+def run_benchmark(args):
+    """Seed the scratch database and time every hot query without and with its indexes"""
+    from app import create_app
+    from models import db
+
+    app = create_app(start_workers=False)
+    with app.app_context():
+        db.create_all()
+        seed(db, args, random.Random(args.seed))
+        queries = hot_queries(db, random.Random(args.seed))
+        indexes = [index for table in HOT_TABLES for index in db.metadata.tables[table].indexes]
+        engine = db.engine
+        db.session.remove()
+
+    report = {}
+    for phase in ('without', 'with'):
+        with engine.connect() as conn:
+            for index in indexes:
+                if phase == 'without':
+                    index.drop(conn, checkfirst=True)
+                else:
+                    index.create(conn, checkfirst=True)
+            conn.exec_driver_sql('ANALYZE')
+            conn.commit()
+            report[phase] = time_queries(conn, queries, args.runs)
+
+    print(f"\n{'Query':<36} {'Without (ms)':>13} {'With (ms)':>10} {'Speedup':>8}")
+    for name in queries:
+        without, with_indexes = report['without'][name]['ms'], report['with'][name]['ms']
+        speedup = f"{without / with_indexes:.0f}x" if with_indexes else '-'
+        print(f"{name:<36} {without:>13} {with_indexes:>10} {speedup:>8}")
+    if args.plans:
+        for name in queries:
+            print(f"\n{name}\n  without: {report['without'][name]['plan']}\n  with:    {report['with'][name]['plan']}")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"\nResults written to {args.output}")
+    return report
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Time the hot queries with and without their indexes")
+    parser.add_argument("--database-url", default=f"sqlite:///{os.path.abspath('benchmark_indexes.db')}",
+                        help="Scratch database to seed and query (default: ./benchmark_indexes.db)")
+    parser.add_argument("--candidates", type=int, default=100000, help="Candidates to seed (default: 100000)")
+    parser.add_argument("--jobs", type=int, default=5000, help="Jobs to seed (default: 5000)")
+    parser.add_argument("--matches-per-job", type=int, default=100, help="Matches seeded per job (default: 100)")
+    parser.add_argument("--recruiters", type=int, default=200, help="Recruiters to seed (default: 200)")
+    parser.add_argument("--runs", type=int, default=5, help="Runs per query; the median is reported (default: 5)")
+    parser.add_argument("--seed", type=int, default=1, help="Random seed for the generated data")
+    parser.add_argument("--plans", action="store_true", help="Print each query's plan without and with the indexes")
+    parser.add_argument("--output", help="Write the timings and plans as JSON to this file")
+
+    args = parser.parse_args()
+    if args.database_url == os.environ.get('DATABASE_URL'):
+        print("Refusing to seed DATABASE_URL; pass a scratch database with --database-url")
+        sys.exit(1)
+
+    # The app reads its database from the environment when it is created
+    os.environ['DATABASE_URL'] = args.database_url
+    run_benchmark(args)
@@ -0,0 +1,225 @@
+#!/usr/bin/env python
+"""
+Script to measure OCR speed and accuracy with and without image preprocessing.
+
+Samples are scanned resume images with the expected text next to them, with the
+same name plus ".txt" (for example "scan1.jpg" and "scan1.jpg.txt"). Without a
+samples directory, synthetic scans are generated instead: resume text from
+static/uploads is rendered at high resolution, then rotated, tinted, unevenly lit,
+noised and saved as JPEG. Their skew is known, so deskew accuracy is reported too.
+
+Each preprocessing setting given (every combination of --dpi, --window and
+--offset) is compared with OCR of the untouched image. OCR runs in this process,
+one page at a time, so the timings are per page.
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import difflib
+import argparse
+import itertools
+from io import BytesIO
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+# Import after environment variables are loaded
+import pytesseract
+from PIL import Image, ImageDraw, ImageFont, ImageFilter
+import numpy as np
+from utils.document_text import extract_document_text
+from utils.ocr_preprocessing import (
+    preprocess_for_ocr, normalize_resolution, estimate_skew,
+    OCR_TARGET_DPI, OCR_BINARIZE_WINDOW, OCR_BINARIZE_OFFSET
+)
+
+SYNTHETIC_DPI = 400
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.tif', '.tiff')
+
+def load_samples(samples_dir):
+    """Load (name, image bytes, expected text, applied skew) for every labelled image"""
+    samples = []
+    for filename in sorted(os.listdir(samples_dir)):
+        path = os.path.join(samples_dir, filename)
+        if not filename.lower().endswith(IMAGE_EXTENSIONS) or not os.path.exists(path + '.txt'):
+            continue
+        with open(path, 'rb') as f:
+            content = f.read()
+        with open(path + '.txt', encoding='utf-8') as f:
+            expected = f.read()
+        samples.append((filename, content, expected, None))
+    return samples
+
+def _resume_lines(source_dir, limit=40):
+    """Readable lines from each resume in the source directory"""
+    for filename in sorted(os.listdir(source_dir)):
+        path = os.path.join(source_dir, filename)
+        if not os.path.isfile(path):
+            continue
+        with open(path, 'rb') as f:
+            try:
+                text, _ = extract_document_text(f.read())
+            except Exception:
+                continue
+        lines = [' '.join(line.split())[:70] for line in text.splitlines() if len(line.strip()) > 3]
+        if len(lines) >= 10:
+            yield filename, lines[:limit]
+
+def render_scan(lines, skew, rng):
+    """Render lines of text as a degraded scan and return the JPEG bytes"""
+    width, height = int(8.5 * SYNTHETIC_DPI), int(11 * SYNTHETIC_DPI)
+    font = ImageFont.load_default(size=int(11 / 72 * SYNTHETIC_DPI))
+    page = Image.new('L', (width, height), 255)
+    draw = ImageDraw.Draw(page)
+    margin = SYNTHETIC_DPI
+    line_height = int(font.size * 1.5)
+    for index, line in enumerate(lines):
+        draw.text((margin, margin + index * line_height), line, font=font, fill=20)
+
+    page = page.rotate(skew, resample=Image.BICUBIC, fillcolor=255)
+
+    # Uneven lighting, tinted paper, sensor noise and a soft focus
+    pixels = np.asarray(page, dtype=np.float32)
+    lighting = np.linspace(1.0, rng.uniform(0.6, 0.85), width, dtype=np.float32)
+    pixels = pixels * lighting[np.newaxis, :]
+    pixels += np.random.default_rng(rng.randint(0, 2 ** 31)).normal(0, 12, pixels.shape)
+    gray = Image.fromarray(np.clip(pixels, 0, 255).astype(np.uint8), 'L').filter(ImageFilter.GaussianBlur(1))
+    tint = tuple(rng.randint(215, 250) for _ in range(3))
+    scan = Image.merge('RGB', [gray.point(lambda value, t=t: value * t // 255) for t in tint])
+
+    buffer = BytesIO()
+    scan.save(buffer, format='JPEG', quality=70)
+    return buffer.getvalue()
+
+def synthetic_samples(source_dir, count, seed):
+    """Generate (name, image bytes, expected text, applied skew) from resume text"""
+    rng = random.Random(seed)
+    samples = []
+    for filename, lines in itertools.islice(_resume_lines(source_dir), count):
+        skew = round(rng.uniform(-3, 3), 2)
+        samples.append((f"{filename} (skew {skew})", render_scan(lines, skew, rng), '\n'.join(lines), skew))
+    return samples
+
+def char_accuracy(expected, found):
+    """Share of characters in common, ignoring whitespace differences"""
+    expected = ' '.join(expected.split())
+    found = ' '.join(found.split())
+    if not expected:
+        return 1.0 if not found else 0.0
+    return difflib.SequenceMatcher(None, expected, found, autojunk=False).ratio()
+
+def run_setting(samples, setting, ocr_available):
+    """Preprocess (unless setting is None) and OCR every sample"""
+    rows = []
+    for name, content, expected, skew in samples:
+        img = Image.open(BytesIO(content))
+        img.load()
+
+        started = time.perf_counter()
+        if setting is not None:
+            img = preprocess_for_ocr(img, **setting)
+        preprocess_ms = (time.perf_counter() - started) * 1000
+
+        row = {'name': name, 'preprocess_ms': preprocess_ms, 'ocr_ms': None, 'accuracy': None}
+        if ocr_available:
+            started = time.perf_counter()
+            text = pytesseract.image_to_string(img)
+            row['ocr_ms'] = (time.perf_counter() - started) * 1000
+            row['accuracy'] = char_accuracy(expected, text)
+        rows.append(row)
+    return rows
+
+def _average(rows, key):
+    values = [row[key] for row in rows if row[key] is not None]
+    return round(sum(values) / len(values), 3) if values else None
+
+def run_benchmark(args):
+    """OCR every sample with and without each preprocessing setting and print the comparison"""
+    if args.samples:
+        samples = load_samples(args.samples)
+    else:
+        print(f"Generating {args.synthetic} synthetic scans from {args.source}")
+        samples = synthetic_samples(args.source, args.synthetic, args.seed)
+    if not samples:
+        print("No samples to benchmark")
+        return None
+
+    try:
+        pytesseract.get_tesseract_version()
+        ocr_available = True
+    except Exception:
+        ocr_available = False
+        print("Tesseract is not installed; only preprocessing time and skew estimates are reported")
+
+    skewed = [sample for sample in samples if sample[3] is not None]
+    if skewed:
+        errors = []
+        for _, content, _, skew in skewed:
+            gray = normalize_resolution(Image.open(BytesIO(content)).convert('L'))
+            errors.append(abs(estimate_skew(gray) + skew))
+        print(f"Deskew: mean error {sum(errors) / len(errors):.2f} degrees, max {max(errors):.2f} "
+              f"over {len(errors)} synthetic scans")
+
+    settings = [None] + [
+        {'target_dpi': dpi, 'window': window, 'offset': offset}
+        for dpi, window, offset in itertools.product(args.dpi, args.window, args.offset)
+    ]
+
+    report = []
+    for setting in settings:
+        rows = run_setting(samples, setting, ocr_available)
+        label = 'none' if setting is None else f"dpi {setting['target_dpi']} window {setting['window']} offset {setting['offset']}"
+        summary = {
+            'setting': label,
+            'samples': len(rows),
+            'preprocess_ms': _average(rows, 'preprocess_ms'),
+            'ocr_ms': _average(rows, 'ocr_ms'),
+            'accuracy': _average(rows, 'accuracy'),
+        }
+        report.append(summary)
+        if args.verbose:
+            for row in rows:
+                print(f"  {label:<32}{row['name'][:40]:<42}{row['preprocess_ms']:>9.1f} ms"
+                      f"{row['ocr_ms'] or 0:>9.1f} ms  accuracy {row['accuracy'] or 0:.3f}")
+
+    print(f"\n{'setting':<34}{'n':>4}{'prep ms':>10}{'ocr ms':>10}{'total ms':>10}{'accuracy':>10}")
+    for summary in report:
+        total = summary['preprocess_ms'] + (summary['ocr_ms'] or 0)
+        accuracy = f"{summary['accuracy']:.3f}" if summary['accuracy'] is not None else '-'
+        ocr_ms = f"{summary['ocr_ms']:.1f}" if summary['ocr_ms'] is not None else '-'
+        print(f"{summary['setting']:<34}{summary['samples']:>4}{summary['preprocess_ms']:>10.1f}"
+              f"{ocr_ms:>10}{total:>10.1f}{accuracy:>10}")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"\nReport written to {args.output}")
+
+    return report
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark OCR preprocessing on scanned resume images")
+    parser.add_argument("samples", nargs="?", help="Directory of images with .txt files holding the expected text")
+    parser.add_argument("--synthetic", type=int, default=10,
+                        help="Number of synthetic scans when no samples directory is given (default: 10)")
+    parser.add_argument("--source", default=os.path.join('static', 'uploads'),
+                        help="Resumes whose text is rendered into synthetic scans (default: static/uploads)")
+    parser.add_argument("--seed", type=int, default=1, help="Random seed for synthetic scans")
+    parser.add_argument("--dpi", type=int, nargs="+", default=[OCR_TARGET_DPI], help="Target DPI values to try")
+    parser.add_argument("--window", type=int, nargs="+", default=[OCR_BINARIZE_WINDOW],
+                        help="Binarization window sizes to try")
+    parser.add_argument("--offset", type=int, nargs="+", default=[OCR_BINARIZE_OFFSET],
+                        help="Binarization offsets to try")
+    parser.add_argument("--output", help="Write the report as JSON to this file")
+    parser.add_argument("--verbose", action="store_true", help="Print the figures for every image")
+
+    args = parser.parse_args()
+    if args.samples and not os.path.isdir(args.samples):
+        print(f"Samples directory not found: {args.samples}")
+        sys.exit(1)
+
+    run_benchmark(args)
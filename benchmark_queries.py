@@ -0,0 +1,231 @@
+#!/usr/bin/env python
+"""
+Script to measure the database work behind the recruiter pages.
+
+A scratch database (SQLite by default, never DATABASE_URL) is seeded with jobs,
+candidates, matches and ratings whose JSON columns are as large as real ones
+(1536-dimension embeddings, parsed resumes, personas). Each endpoint is then
+requested as an admin recruiter while every SELECT it runs is recorded; the
+statements are replayed afterwards to count the rows and bytes they returned.
+Run it before and after a change to see what an endpoint costs the database.
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import argparse
+from datetime import datetime, timedelta
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+EMBEDDING_DIMENSIONS = 1536
+SKILLS = ['Python', 'SQL', 'Java', 'Go', 'Kubernetes', 'React', 'AWS', 'Spark', 'Terraform', 'Django']
+BENCHMARK_EMAIL = 'query-benchmark@example.com'
+
+def value_size(value):
+    """Approximate bytes a database driver returns for one value"""
+    if value is None:
+        return 0
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return len(value)
+    if isinstance(value, str):
+        return len(value.encode())
+    if isinstance(value, (dict, list)):
+        return len(json.dumps(value).encode())
+    if isinstance(value, (int, float, bool, datetime)):
+        return 8
+    return len(str(value).encode())
+
+def seed(db, candidates, jobs, matches_per_job, rng):
+    """Fill the scratch database, unless it was seeded by an earlier run"""
+    from sqlalchemy import insert
+    from models import Recruiter, Job, Candidate, JobCandidateMatch, CandidateRating, RecruiterSharing
+    from utils.match_stats import rebuild_job_match_stats
+
+    recruiter = Recruiter.query.filter_by(email=BENCHMARK_EMAIL).first()
+    if recruiter:
+        return recruiter
+
+    recruiter = Recruiter(name='Query Benchmark', email=BENCHMARK_EMAIL, role='admin', role_id='admin')
+    recruiter.set_password(os.urandom(16).hex())
+    colleague = Recruiter(name='Benchmark Colleague', email='query-benchmark-colleague@example.com')
+    colleague.set_password(os.urandom(16).hex())
+    db.session.add_all([recruiter, colleague])
+    db.session.flush()
+    db.session.add(RecruiterSharing(owner_id=colleague.id, shared_with_id=recruiter.id,
+                                    share_jobs=True, share_candidates=True))
+
+    def embedding():
+        return [round(rng.uniform(-0.05, 0.05), 6) for _ in range(EMBEDDING_DIMENSIONS)]
+
+    started = datetime.utcnow() - timedelta(days=90)
+    owners = [recruiter.id, colleague.id]
+    db.session.execute(insert(Job), [{
+        'title': f"Engineer {i}",
+        'description': ' '.join(rng.choice(SKILLS) + ' experience required.' for _ in range(120)),
+        'location': 'Remote',
+        'company': 'Benchmark Inc',
+        'required_skills': rng.sample(SKILLS, 4),
+        'preferred_skills': rng.sample(SKILLS, 2),
+        'embedding': embedding(),
+        'recruiter_id': owners[i % 2],
+        'status': 'active',
+        'created_at': started + timedelta(minutes=i),
+        'expires_at': datetime.utcnow() + timedelta(days=60)
+    } for i in range(jobs)])
+
+    for start in range(0, candidates, 500):
+        db.session.execute(insert(Candidate), [{
+            'name': f"Candidate {i}",
+            'email': f"candidate{i}@example.com",
+            'phone': f"+1 555 {i:07d}",
+            'parsed_data': {
+                'skills': rng.sample(SKILLS, 5),
+                'summary': 'Experienced engineer. ' * 20,
+                'experience': [{'title': 'Engineer', 'company': f"Company {n}", 'description': 'Built systems. ' * 15}
+                               for n in range(4)],
+                'education': [{'degree': 'B.Sc', 'institution': 'University'}]
+            },
+            'embedding': embedding(),
+            'persona': {'ideal_roles': ['Engineer'], 'key_strengths': ['Delivery'] * 5, 'team_fit': 'Collaborative. ' * 30},
+            'uploaded_by': owners[i % 2],
+            'created_at': started + timedelta(seconds=i)
+        } for i in range(start, min(start + 500, candidates))])
+    db.session.flush()
+
+    job_ids = [job_id for (job_id,) in db.session.query(Job.id)]
+    candidate_ids = [candidate_id for (candidate_id,) in db.session.query(Candidate.id)]
+    db.session.execute(insert(JobCandidateMatch), [
+        {'job_id': job_id, 'candidate_id': candidate_id, 'score': round(rng.uniform(0.3, 0.95), 3)}
+        for job_id in job_ids
+        for candidate_id in rng.sample(candidate_ids, min(matches_per_job, len(candidate_ids)))
+    ])
+    # The most matched candidate is the one the detail endpoints are measured on
+    db.session.execute(insert(JobCandidateMatch), [
+        {'job_id': job_id, 'candidate_id': candidate_ids[0], 'score': 0.9} for job_id in job_ids
+    ])
+    rebuild_job_match_stats()
+    db.session.execute(insert(CandidateRating), [
+        {'candidate_id': candidate_ids[0], 'recruiter_id': recruiter_id, 'score': 4, 'notes': 'Strong'}
+        for recruiter_id in owners
+    ])
+    db.session.commit()
+    return recruiter
+
+def login(app, db, recruiter):
+    """Open a session for the recruiter and return a test client carrying its cookie"""
+    import jwt
+    from models import Session
+
+    session_id = os.urandom(16).hex()
+    expires_at = datetime.utcnow() + timedelta(hours=1)
+    db.session.add(Session(id=session_id, recruiter_id=recruiter.id, expires_at=expires_at))
+    db.session.commit()
+    client = app.test_client()
+    client.set_cookie('access_token', jwt.encode({'session_id': session_id, 'exp': expires_at},
+                                                 app.secret_key, algorithm='HS256'))
+    return client
+
+def measure(engine, client, path, repeat):
+    """
+    Request a path, recording the SELECTs of the first (cold) request, then
+    replay them to size their results; the time reported is the median request
+    """
+    from sqlalchemy import event
+
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith('SELECT'):
+            statements.append((statement, parameters))
+
+    timings = []
+    for attempt in range(repeat):
+        if attempt == 0:
+            event.listen(engine, 'before_cursor_execute', record)
+        try:
+            started = time.perf_counter()
+            response = client.get(path)
+            timings.append((time.perf_counter() - started) * 1000)
+        finally:
+            if attempt == 0:
+                event.remove(engine, 'before_cursor_execute', record)
+                status = response.status_code
+
+    rows = size = 0
+    with engine.connect() as conn:
+        for statement, parameters in statements:
+            for row in conn.exec_driver_sql(statement, parameters):
+                rows += 1
+                size += sum(value_size(value) for value in row)
+
+    return {
+        'status': status,
+        'queries': len(statements),
+        'rows': rows,
+        'bytes': size,
+        'ms': round(sorted(timings)[len(timings) // 2], 1)
+    }
+
+def run_benchmark(args):
+    """Seed the scratch database and measure every endpoint"""
+    from app import create_app
+    from models import db, Candidate, Job
+
+    app = create_app(start_workers=False)
+    with app.app_context():
+        db.create_all()
+        recruiter = seed(db, args.candidates, args.jobs, args.matches_per_job, random.Random(args.seed))
+        candidate_id = db.session.query(Candidate.id).order_by(Candidate.id).limit(1).scalar()
+        print(f"Database: {db.session.query(Candidate.id).count()} candidates, {db.session.query(Job.id).count()} jobs")
+        client = login(app, db, recruiter)
+        engine = db.engine
+        db.session.remove()
+
+    # Requests run outside this app context, each with a fresh session
+    endpoints = {
+        'dashboard': '/dashboard',
+        'my_jobs': '/my-jobs',
+        'my_candidates': '/my-candidates',
+        'candidate_detail': f"/candidates/{candidate_id}",
+        'candidate_api': f"/api/candidates/{candidate_id}",
+        'candidate_persona': f"/api/candidates/{candidate_id}/persona"
+    }
+
+    results = {}
+    print(f"\n{'Endpoint':<20} {'Status':>6} {'Queries':>8} {'Rows':>8} {'KB':>10} {'ms':>8}")
+    for name, path in endpoints.items():
+        results[name] = dict(measure(engine, client, path, args.repeat), path=path)
+        stats = results[name]
+        print(f"{name:<20} {stats['status']:>6} {stats['queries']:>8} {stats['rows']:>8} "
+              f"{stats['bytes'] / 1024:>10.1f} {stats['ms']:>8}")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"\nResults written to {args.output}")
+    return results
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure queries, rows and bytes read per recruiter endpoint")
+    parser.add_argument("--database-url", default=f"sqlite:///{os.path.abspath('benchmark_queries.db')}",
+                        help="Scratch database to seed and query (default: ./benchmark_queries.db)")
+    parser.add_argument("--candidates", type=int, default=2000, help="Candidates to seed (default: 2000)")
+    parser.add_argument("--jobs", type=int, default=50, help="Jobs to seed (default: 50)")
+    parser.add_argument("--matches-per-job", type=int, default=40, help="Matches seeded per job (default: 40)")
+    parser.add_argument("--repeat", type=int, default=3, help="Requests per endpoint; the median time is reported")
+    parser.add_argument("--seed", type=int, default=1, help="Random seed for the generated data")
+    parser.add_argument("--output", help="Write the results as JSON to this file")
+
+    args = parser.parse_args()
+    if args.database_url == os.environ.get('DATABASE_URL'):
+        print("Refusing to seed DATABASE_URL; pass a scratch database with --database-url")
+        sys.exit(1)
+
+    # The app reads its database from the environment when it is created
+    os.environ['DATABASE_URL'] = args.database_url
+    run_benchmark(args)
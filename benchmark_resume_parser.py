@@ -0,0 +1,217 @@
+#!/usr/bin/env python
+"""
+Script to measure the local heuristic resume parser against a labelled sample set.
+
+Each resume in the samples directory needs a label file next to it with the same
+name plus ".json", for example "jane_doe.txt" and "jane_doe.txt.json":
+
+    {
+        "source": "text",
+        "email": "jane@example.com",
+        "phone": "+1 555 123 4567",
+        "skills": ["Python", "SQL"],
+        "titles": ["Senior Data Engineer"],
+        "degrees": ["B.Sc"]
+    }
+
+Every field is optional. "source" defaults to the file type (text, pdf, docx or ocr)
+and is used to group the report. With --llm the same resumes are also parsed by
+OpenAI and by the escalating parser used at ingest, so their accuracy and latency
+can be compared.
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import argparse
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+# Import after environment variables are loaded
+from utils.resume_parser import extract_text_from_file, request_resume_analysis
+from utils.heuristic_parser import parse_resume_locally, HEURISTIC_PARSE_THRESHOLD
+
+SOURCE_BY_EXTENSION = {'pdf': 'pdf', 'docx': 'docx', 'png': 'ocr', 'jpg': 'ocr', 'jpeg': 'ocr'}
+
+def load_samples(samples_dir):
+    """Load (name, text, source, labels) for every labelled resume in the directory"""
+    samples = []
+    for filename in sorted(os.listdir(samples_dir)):
+        path = os.path.join(samples_dir, filename)
+        label_path = path + '.json'
+        if filename.endswith('.json') or not os.path.exists(label_path):
+            continue
+
+        with open(label_path) as f:
+            labels = json.load(f)
+        with open(path, 'rb') as f:
+            content = f.read()
+
+        file_type = os.path.splitext(filename)[1].lstrip('.').lower()
+        text = extract_text_from_file(content, file_type)
+        source = labels.get('source') or SOURCE_BY_EXTENSION.get(file_type, 'text')
+        samples.append((filename, text, source, labels))
+
+    return samples
+
+def _norm(value):
+    return re.sub(r'[^a-z0-9+#]+', ' ', str(value or '').lower()).strip()
+
+def _recall(expected, found):
+    """Share of expected values that appear in (or contain) one of the found values"""
+    if not expected:
+        return None
+    found = [_norm(value) for value in found if value]
+    hits = sum(1 for value in expected if any(_norm(value) in item or item in _norm(value) for item in found if item))
+    return hits / len(expected)
+
+def _f1(expected, found):
+    if expected is None:
+        return None
+    expected = {_norm(value) for value in expected}
+    found = {_norm(value) for value in found}
+    if not expected and not found:
+        return 1.0
+    true_positives = len(expected & found)
+    if not true_positives:
+        return 0.0
+    precision = true_positives / len(found)
+    recall = true_positives / len(expected)
+    return 2 * precision * recall / (precision + recall)
+
+def score(labels, resume_data, contact=None):
+    """
+    Score one parse against its labels
+
+    Returns:
+        dict: Field name to a score between 0 and 1 (fields without labels are skipped)
+    """
+    experience = resume_data.get('experience') or []
+    education = resume_data.get('education') or []
+    if isinstance(experience, str):
+        experience = [{'title': experience}]
+    if isinstance(education, str):
+        education = [{'degree': education}]
+
+    scores = {
+        'skills': _f1(labels.get('skills'), resume_data.get('skills') or []),
+        'titles': _recall(labels.get('titles'), [entry.get('title') for entry in experience if isinstance(entry, dict)]),
+        'degrees': _recall(labels.get('degrees'), [entry.get('degree') for entry in education if isinstance(entry, dict)]),
+    }
+    if contact is not None:
+        if 'email' in labels:
+            scores['email'] = 1.0 if _norm(contact.get('email')) == _norm(labels['email']) else 0.0
+        if 'phone' in labels:
+            expected_digits = re.sub(r'\D', '', labels['phone'] or '')[-10:]
+            found_digits = re.sub(r'\D', '', contact.get('phone') or '')[-10:]
+            scores['phone'] = 1.0 if expected_digits and expected_digits == found_digits else 0.0
+
+    return {field: value for field, value in scores.items() if value is not None}
+
+def run_parser(parser, text):
+    """Run one parser and return (resume_data, contact, confident, elapsed_ms)"""
+    started = time.perf_counter()
+    if parser == 'heuristic':
+        result = parse_resume_locally(text)
+        resume_data, contact = result['resume_data'], result['contact']
+        confident = result['confidence'] >= HEURISTIC_PARSE_THRESHOLD
+    elif parser == 'llm':
+        resume_data, contact, confident = request_resume_analysis(text), None, None
+    else:
+        # The escalating parser used at ingest
+        result = parse_resume_locally(text)
+        confident = result['confidence'] >= HEURISTIC_PARSE_THRESHOLD
+        resume_data = result['resume_data'] if confident else request_resume_analysis(text)
+        contact = result['contact']
+    return resume_data, contact, confident, (time.perf_counter() - started) * 1000
+
+def summarize(rows):
+    """Aggregate per-resume rows into accuracy and latency figures"""
+    latencies = sorted(row['ms'] for row in rows)
+    fields = {}
+    for row in rows:
+        for field, value in row['scores'].items():
+            fields.setdefault(field, []).append(value)
+
+    accuracies = [sum(row['scores'].values()) / len(row['scores']) for row in rows if row['scores']]
+    confident = [row for row in rows if row['confident']]
+    confident_accuracies = [sum(row['scores'].values()) / len(row['scores']) for row in confident if row['scores']]
+
+    return {
+        'resumes': len(rows),
+        'accuracy': round(sum(accuracies) / len(accuracies), 3) if accuracies else None,
+        'fields': {field: round(sum(values) / len(values), 3) for field, values in sorted(fields.items())},
+        'avg_ms': round(sum(latencies) / len(latencies), 2) if latencies else None,
+        'p95_ms': round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))], 2) if latencies else None,
+        'local_share': round(len(confident) / len(rows), 3) if rows and rows[0]['confident'] is not None else None,
+        'local_accuracy': round(sum(confident_accuracies) / len(confident_accuracies), 3) if confident_accuracies else None,
+    }
+
+def run_benchmark(args):
+    """Parse every labelled sample with each parser and print accuracy and latency per source"""
+    samples = load_samples(args.samples)
+    if not samples:
+        print(f"No labelled resumes found in {args.samples}")
+        return None
+
+    parsers = ['heuristic', 'llm', 'escalating'] if args.llm else ['heuristic']
+    print(f"Benchmarking {len(samples)} resumes with: {', '.join(parsers)} "
+          f"(confidence threshold {HEURISTIC_PARSE_THRESHOLD})")
+
+    rows = {parser: [] for parser in parsers}
+    for name, text, source, labels in samples:
+        for parser in parsers:
+            try:
+                resume_data, contact, confident, elapsed_ms = run_parser(parser, text)
+            except Exception as e:
+                print(f"  {parser} failed on {name}: {str(e)}")
+                continue
+            rows[parser].append({
+                'name': name,
+                'source': source,
+                'scores': score(labels, resume_data, contact),
+                'confident': confident,
+                'ms': elapsed_ms
+            })
+            if args.verbose:
+                print(f"  {parser:<10} {name:<40} {rows[parser][-1]['scores']}")
+
+    report = {}
+    for parser, parser_rows in rows.items():
+        sources = sorted({row['source'] for row in parser_rows})
+        report[parser] = {source: summarize([row for row in parser_rows if row['source'] == source]) for source in sources}
+        report[parser]['all'] = summarize(parser_rows)
+
+    print(f"\n{'parser':<11}{'source':<8}{'n':>4}{'accuracy':>10}{'local %':>9}{'local acc':>11}{'avg ms':>9}{'p95 ms':>9}  fields")
+    for parser, by_source in report.items():
+        for source, stats in by_source.items():
+            local_share = f"{stats['local_share'] * 100:.0f}" if stats['local_share'] is not None else '-'
+            fields = ', '.join(f"{field} {value:.2f}" for field, value in stats['fields'].items())
+            print(f"{parser:<11}{source:<8}{stats['resumes']:>4}{stats['accuracy'] or 0:>10.3f}{local_share:>9}"
+                  f"{stats['local_accuracy'] or 0:>11.3f}{stats['avg_ms'] or 0:>9.2f}{stats['p95_ms'] or 0:>9.2f}  {fields}")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"\nReport written to {args.output}")
+
+    return report
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the local resume parser against labelled samples")
+    parser.add_argument("samples", help="Directory of resumes with .json label files next to them")
+    parser.add_argument("--llm", action="store_true",
+                        help="Also parse with OpenAI and with the escalating parser for comparison")
+    parser.add_argument("--output", help="Write the report as JSON to this file")
+    parser.add_argument("--verbose", action="store_true", help="Print the scores for every resume")
+
+    args = parser.parse_args()
+    if not os.path.isdir(args.samples):
+        print(f"Samples directory not found: {args.samples}")
+        sys.exit(1)
+
+    run_benchmark(args)
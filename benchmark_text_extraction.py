@@ -0,0 +1,147 @@
+#!/usr/bin/env python
+"""
+Script to compare resume text extraction against the old decode-the-bytes path.
+
+For every file in the directory (static/uploads by default) it reports, per file
+type, how long extraction takes, how many tokens the text costs before and after
+compaction, how confident the local parser is in the result, and how many tokens
+would go to OpenAI for resumes the local parser is unsure of. The "legacy"
+numbers are what ingestion used to do with PDFs and DOCX files: decode the raw
+bytes as UTF-8, which sends binary noise to OpenAI.
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+# Import after environment variables are loaded
+from utils.document_text import extract_document_text, detect_file_type
+from utils.text_compaction import estimate_tokens, compact_text, RESUME_TOKEN_BUDGET
+from utils.heuristic_parser import parse_resume_locally, HEURISTIC_PARSE_THRESHOLD
+
+def legacy_extract(content):
+    """The old ingest path for anything that is not an image"""
+    return content.decode('utf-8', errors='ignore')
+
+def measure(extract, content, repeat):
+    """Run an extractor and return its text and best-of-N time in milliseconds"""
+    timings = []
+    text = ''
+    for _ in range(repeat):
+        started = time.perf_counter()
+        text = extract(content)
+        timings.append((time.perf_counter() - started) * 1000)
+    return text, min(timings)
+
+def describe(text, elapsed_ms):
+    """Size, token and parse-confidence figures for one extracted text"""
+    compacted_tokens = estimate_tokens(compact_text(text, RESUME_TOKEN_BUDGET))
+    confidence = parse_resume_locally(text)['confidence']
+    escalated = confidence < HEURISTIC_PARSE_THRESHOLD
+    return {
+        'ms': round(elapsed_ms, 2),
+        'chars': len(text),
+        'tokens': estimate_tokens(text),
+        'compacted_tokens': compacted_tokens,
+        'confidence': confidence,
+        'escalated': escalated,
+        # Only resumes the local parser is unsure of are sent to OpenAI
+        'llm_tokens': compacted_tokens if escalated else 0
+    }
+
+def summarize(rows, key):
+    """Totals and averages for one extractor over a group of files"""
+    values = [row[key] for row in rows]
+    latencies = sorted(value['ms'] for value in values)
+    return {
+        'files': len(values),
+        'avg_ms': round(sum(latencies) / len(latencies), 2),
+        'p95_ms': round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))], 2),
+        'tokens': sum(value['tokens'] for value in values),
+        'compacted_tokens': sum(value['compacted_tokens'] for value in values),
+        'escalated': sum(1 for value in values if value['escalated']),
+        'llm_tokens': sum(value['llm_tokens'] for value in values),
+        'avg_confidence': round(sum(value['confidence'] for value in values) / len(values), 3)
+    }
+
+def run_benchmark(args):
+    """Extract every file both ways and print speed and token figures per file type"""
+    files = sorted(name for name in os.listdir(args.directory)
+                   if os.path.isfile(os.path.join(args.directory, name)))
+    if not files:
+        print(f"No files found in {args.directory}")
+        return None
+
+    print(f"Extracting {len(files)} files from {args.directory} (best of {args.repeat} runs)")
+    rows = []
+    for name in files:
+        with open(os.path.join(args.directory, name), 'rb') as f:
+            content = f.read()
+
+        file_type = detect_file_type(content)
+        try:
+            (text, method), elapsed_ms = measure(extract_document_text, content, args.repeat)
+        except Exception as e:
+            print(f"  extraction failed on {name}: {str(e)}")
+            continue
+        legacy_text, legacy_ms = measure(legacy_extract, content, args.repeat)
+
+        rows.append({
+            'name': name,
+            'type': file_type,
+            'method': method,
+            'new': describe(text, elapsed_ms),
+            'legacy': describe(legacy_text, legacy_ms)
+        })
+        if args.verbose:
+            new, legacy = rows[-1]['new'], rows[-1]['legacy']
+            print(f"  {name[:40]:<42}{method:<10}{new['ms']:>8.1f} ms  {new['tokens']:>6} tokens "
+                  f"(legacy {legacy['tokens']})  confidence {new['confidence']:.2f} (legacy {legacy['confidence']:.2f})")
+
+    report = {}
+    for file_type in sorted({row['type'] for row in rows}) + ['all']:
+        group = [row for row in rows if file_type == 'all' or row['type'] == file_type]
+        report[file_type] = {
+            'new': summarize(group, 'new'),
+            'legacy': summarize(group, 'legacy'),
+            'methods': {method: sum(1 for row in group if row['method'] == method)
+                        for method in sorted({row['method'] for row in group})}
+        }
+
+    print(f"\n{'type':<7}{'n':>4}{'avg ms':>9}{'p95 ms':>9}{'tokens':>9}{'legacy':>9}{'to LLM':>8}{'legacy':>8}"
+          f"{'saved':>7}{'confidence':>12}{'legacy':>8}  methods")
+    for file_type, stats in report.items():
+        new, legacy = stats['new'], stats['legacy']
+        saved = 1 - new['llm_tokens'] / legacy['llm_tokens'] if legacy['llm_tokens'] else 0
+        methods = ', '.join(f"{method} {count}" for method, count in stats['methods'].items())
+        print(f"{file_type:<7}{new['files']:>4}{new['avg_ms']:>9.1f}{new['p95_ms']:>9.1f}{new['tokens']:>9}"
+              f"{legacy['tokens']:>9}{new['llm_tokens']:>8}{legacy['llm_tokens']:>8}{saved * 100:>6.0f}%"
+              f"{new['avg_confidence']:>12.3f}{legacy['avg_confidence']:>8.3f}  {methods}")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'summary': report, 'files': rows}, f, indent=2)
+        print(f"\nReport written to {args.output}")
+
+    return report
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark resume text extraction on a directory of uploads")
+    parser.add_argument("directory", nargs="?", default=os.path.join('static', 'uploads'),
+                        help="Directory of resumes (default: static/uploads)")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per file; the fastest is reported (default: 3)")
+    parser.add_argument("--output", help="Write the report as JSON to this file")
+    parser.add_argument("--verbose", action="store_true", help="Print the figures for every file")
+
+    args = parser.parse_args()
+    if not os.path.isdir(args.directory):
+        print(f"Directory not found: {args.directory}")
+        sys.exit(1)
+
+    run_benchmark(args)
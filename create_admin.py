@@ -29,7 +29,7 @@ def create_admin_user(email, password, name=None):
     Returns:
         Recruiter: The created admin user
     """
-    app = create_app()
+    app = create_app(start_workers=False)
     
     with app.app_context():
         # Check if the user already exists
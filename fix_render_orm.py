@@ -15,7 +15,7 @@ def fix_orm_issues():
         from app import create_app
         from models import db
         
-        app = create_app()
+        app = create_app(start_workers=False)
         print("Application created successfully.")
     except Exception as e:
         print(f"Error creating application: {str(e)}")
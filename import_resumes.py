@@ -0,0 +1,133 @@
+#!/usr/bin/env python
+"""
+Script to import a directory of existing resumes (for example static/uploads).
+
+Every file goes through the same ingestion pipeline as an upload (extraction,
+parsing, embedding and matching) on a pool of queue workers. Progress is kept in
+imports/<run_id>/manifest.json; run the script again with the same --run-id to
+resume an interrupted import. Throughput and per-stage latency histograms are
+printed at the end.
+"""
+
+import os
+import sys
+import json
+import signal
+import argparse
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+# Import after environment variables are loaded
+from app import create_app
+from models import db
+from utils.job_queue import start_ingest_workers, stop_ingest_workers
+from utils.ocr_service import shutdown_ocr_pool
+from utils.resume_import import ResumeImport, DEFAULT_WORKDIR
+
+def print_report(report):
+    """Print counts, throughput and a latency histogram per pipeline stage"""
+    print("\n== Resume import report ==")
+    print(f"Run: {report['run_id']} (upload batch {report['batch_id']})")
+    print("Files: " + ", ".join(f"{count} {status}" for status, count in sorted(report['counts'].items())))
+    rate = f" ({report['files_per_minute']} files per minute)" if report['files_per_minute'] else ''
+    print(f"This session: {report['session_files']} files in {report['session_seconds']}s{rate}")
+    if report['extraction']:
+        print("Extraction: " + ", ".join(f"{method} {count}" for method, count in report['extraction'].items()))
+        print("Parsing: " + ", ".join(f"{source} {count}" for source, count in report['parse_source'].items()))
+
+    for stage, stats in report['stages'].items():
+        print(f"\n{stage}: avg {stats['avg_ms']} ms, p50 {stats['p50_ms']} ms, "
+              f"p95 {stats['p95_ms']} ms, max {stats['max_ms']} ms ({stats['files']} files)")
+        histogram = stats['histogram']
+        # Buckets slower than the slowest file are left out
+        while histogram and not histogram[-1][1]:
+            histogram = histogram[:-1]
+        largest = max(count for _, count in histogram)
+        for label, count in histogram:
+            print(f"  {label:>9} {'#' * round(count / largest * 40):<40} {count}")
+
+def run_import(args):
+    """Queue the directory's resumes, process them and print the report"""
+    app = create_app(start_workers=False)
+
+    with app.app_context():
+        try:
+            resume_import = ResumeImport(
+                args.directory,
+                args.recruiter,
+                run_id=args.run_id,
+                workdir=args.workdir,
+                limit=args.limit,
+                retry_failed=args.retry_failed
+            )
+        except ValueError as e:
+            print(str(e))
+            sys.exit(1)
+        print(f"Import run: {resume_import.run_id} ({resume_import.manifest_path})")
+
+        pending = resume_import.scan()
+        print(f"{pending} files to import from {resume_import.directory}")
+
+        if args.workers:
+            start_ingest_workers(app, args.workers, kinds=['resume'])
+            print(f"Started {args.workers} workers")
+        else:
+            print("No workers started; waiting for worker.py processes to run the jobs")
+
+        def handle_sigterm(signum, frame):
+            raise KeyboardInterrupt
+
+        signal.signal(signal.SIGTERM, handle_sigterm)
+
+        def show_progress(counts):
+            print("  " + ", ".join(f"{count} {status}" for status, count in sorted(counts.items())), flush=True)
+
+        try:
+            queued = resume_import.enqueue()
+            print(f"Queued {queued} files")
+            resume_import.wait(args.poll_interval, progress=show_progress)
+        except KeyboardInterrupt:
+            # The manifest on disk only names committed jobs, and those stay in the
+            # queue; the next run with this --run-id follows them
+            db.session.rollback()
+            print(f"\nInterrupted; resume with --run-id {resume_import.run_id}")
+        finally:
+            if args.workers:
+                stop_ingest_workers(timeout=args.shutdown_timeout)
+            shutdown_ocr_pool()
+
+        report = resume_import.report()
+        print_report(report)
+        if args.output:
+            with open(args.output, 'w') as f:
+                json.dump(report, f, indent=2)
+            print(f"\nReport written to {args.output}")
+        return report
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Import a directory of resumes through the ingestion pipeline")
+    parser.add_argument("directory", nargs="?", default=os.path.join('static', 'uploads'),
+                        help="Directory of resumes, searched recursively (default: static/uploads)")
+    parser.add_argument("--recruiter", required=True, help="Email of the recruiter the candidates are added for")
+    parser.add_argument("--run-id", help="Resume an existing import instead of starting a new one")
+    parser.add_argument("--workdir", default=os.environ.get('IMPORT_WORKDIR', DEFAULT_WORKDIR),
+                        help="Directory for import manifests (default: imports)")
+    parser.add_argument("--workers", type=int, default=int(os.environ.get('INGEST_WORKERS', 4)),
+                        help="Worker threads started by this script; 0 leaves the jobs to worker.py "
+                             "(default: INGEST_WORKERS or 4)")
+    parser.add_argument("--limit", type=int, help="Only queue this many files in this run")
+    parser.add_argument("--retry-failed", action="store_true", help="Queue files that failed in an earlier run again")
+    parser.add_argument("--poll-interval", type=float, default=2.0,
+                        help="Seconds between progress checks (default: 2)")
+    parser.add_argument("--shutdown-timeout", type=int, default=60,
+                        help="Seconds to wait for running jobs when stopping (default: 60)")
+    parser.add_argument("--output", help="Write the report as JSON to this file")
+
+    args = parser.parse_args()
+    if not os.path.isdir(args.directory):
+        print(f"Directory not found: {args.directory}")
+        sys.exit(1)
+
+    run_import(args)
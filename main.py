@@ -20,25 +20,28 @@ if 'DEMO_PASSWORD' not in os.environ and os.path.exists('.env'):
 from app import create_app, db
 from models import Recruiter
 
-# Create the Flask application instance
-app = create_app()
+# multiprocessing re-imports this script as __mp_main__ in the OCR pool's fork
+# server; only PIL and Tesseract run there, so the app is not built
+if __name__ != '__mp_main__':
+    # Create the Flask application instance
+    app = create_app()
 
-# Ensure ONLY the demo admin account has the correct password from environment variable
-# Regular user accounts will continue to use standard password management
-with app.app_context():
-    try:
-        demo_password = os.environ.get('DEMO_PASSWORD')
-        if demo_password:
-            # Only sync the demo@example.com admin account with the environment variable
-            demo_admin = Recruiter.query.filter_by(email='demo@example.com').first()
-            if demo_admin:
-                # Check if we need to reset the password (first run after env var change)
-                if not demo_admin.check_password(demo_password):
-                    print(f"Updating demo admin password to match DEMO_PASSWORD environment variable")
-                    demo_admin.set_password(demo_password)
-                    db.session.commit()
-    except Exception as e:
-        print(f"Error checking demo admin password: {e}", file=sys.stderr)
+    # Ensure ONLY the demo admin account has the correct password from environment variable
+    # Regular user accounts will continue to use standard password management
+    with app.app_context():
+        try:
+            demo_password = os.environ.get('DEMO_PASSWORD')
+            if demo_password:
+                # Only sync the demo@example.com admin account with the environment variable
+                demo_admin = Recruiter.query.filter_by(email='demo@example.com').first()
+                if demo_admin:
+                    # Check if we need to reset the password (first run after env var change)
+                    if not demo_admin.check_password(demo_password):
+                        print(f"Updating demo admin password to match DEMO_PASSWORD environment variable")
+                        demo_admin.set_password(demo_password)
+                        db.session.commit()
+        except Exception as e:
+            print(f"Error checking demo admin password: {e}", file=sys.stderr)
 
 # This file is used as the entry point for the application
 if __name__ == '__main__':
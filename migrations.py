@@ -16,7 +16,7 @@ def run_migrations():
         from app import create_app
         from models import db
         
-        app = create_app()
+        app = create_app(start_workers=False)
         print("Application created successfully.")
     except Exception as e:
         print(f"Error creating application: {str(e)}")
@@ -44,11 +44,58 @@ def run_migrations():
             except Exception as e:
                 print(f"✗ Error: {description} - {str(e)}")
                 return False
+
+        # Helper function to build an index without blocking writes where the database allows it
+        def create_index(index_name, table, columns):
+            if is_postgres:
+                # A failed concurrent build leaves an invalid index that IF NOT EXISTS would keep
+                invalid = conn.execute(db.text("""
+                    SELECT 1 FROM pg_class c JOIN pg_index i ON i.indexrelid = c.oid
+                    WHERE c.relname = :name AND NOT i.indisvalid
+                """), {'name': index_name}).first()
+                if invalid:
+                    execute_sql(f"DROP INDEX CONCURRENTLY IF EXISTS {index_name};",
+                                f"Drop invalid index {index_name}")
+            concurrently = 'CONCURRENTLY ' if is_postgres else ''
+            return execute_sql(f"CREATE INDEX {concurrently}IF NOT EXISTS {index_name} ON {table} ({columns});",
+                               f"Create index {index_name} if not exists")
+
+        # Helper function to fill candidates.phone_normalized for rows written before it existed,
+        # or (with a condition) to redo it for rows normalized by older rules
+        def backfill_phone_normalized(batch_size=1000, where="phone_normalized IS NULL",
+                                      description="Backfill candidates.phone_normalized"):
+            from utils.phone import normalize_phone
+
+            last_id = 0
+            filled = 0
+            try:
+                while True:
+                    rows = conn.execute(db.text(f"""
+                        SELECT id, phone, phone_normalized FROM candidates
+                        WHERE id > :last_id AND {where} AND phone IS NOT NULL AND phone <> ''
+                        ORDER BY id LIMIT :batch_size
+                    """), {'last_id': last_id, 'batch_size': batch_size}).all()
+                    if not rows:
+                        break
+                    updates = [{'id': row_id, 'phone_normalized': normalize_phone(phone)}
+                               for row_id, phone, current in rows if normalize_phone(phone) != current]
+                    if updates:
+                        conn.execute(db.text(
+                            "UPDATE candidates SET phone_normalized = :phone_normalized WHERE id = :id"
+                        ), updates)
+                    filled += len(updates)
+                    last_id = rows[-1][0]
+                print(f"✓ Success: {description} ({filled} rows)")
+                return True
+            except Exception as e:
+                print(f"✗ Error: {description} - {str(e)}")
+                return False
             
         # Run all migrations within a single connection
         with conn:
-            # Enable autocommit mode
-            conn.connection.autocommit = True
+            # Enable autocommit mode (through SQLAlchemy, which also supports SQLite)
+            conn.execution_options(isolation_level='AUTOCOMMIT')
+            is_postgres = conn.dialect.name == 'postgresql'
             
             # 1. Create roles table if not exists
             execute_sql("""
@@ -195,6 +242,194 @@ def run_migrations():
                 # This might fail if the column is already nullable
                 print("Note: Email column might already be nullable")
             
+            # 17. Create ingestion_jobs table for the durable ingestion queue
+            execute_sql("""
+                CREATE TABLE IF NOT EXISTS ingestion_jobs (
+                    id SERIAL PRIMARY KEY,
+                    kind VARCHAR(50) NOT NULL,
+                    status VARCHAR(20) NOT NULL DEFAULT 'queued',
+                    payload JSON NOT NULL DEFAULT '{}',
+                    result JSON,
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    max_attempts INTEGER NOT NULL DEFAULT 5,
+                    run_after TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+                    locked_by VARCHAR(100),
+                    locked_until TIMESTAMP,
+                    last_error TEXT,
+                    recruiter_id INTEGER REFERENCES recruiters(id),
+                    candidate_id INTEGER REFERENCES candidates(id),
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    started_at TIMESTAMP,
+                    finished_at TIMESTAMP
+                );
+            """, "Create ingestion_jobs table if not exists")
+            
+            execute_sql("""
+                CREATE INDEX IF NOT EXISTS ix_ingestion_jobs_status_run_after ON ingestion_jobs (status, run_after);
+            """, "Create ingestion_jobs status index if not exists")
+            
+            execute_sql("""
+                CREATE INDEX IF NOT EXISTS ix_ingestion_jobs_candidate_id ON ingestion_jobs (candidate_id);
+            """, "Create ingestion_jobs candidate index if not exists")
+
+            # 18. Track bulk upload batches and per-file pipeline stages
+            execute_sql("""
+                CREATE TABLE IF NOT EXISTS upload_batches (
+                    id SERIAL PRIMARY KEY,
+                    recruiter_id INTEGER REFERENCES recruiters(id) NOT NULL,
+                    total_files INTEGER NOT NULL DEFAULT 0,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                );
+            """, "Create upload_batches table if not exists")
+
+            execute_sql("""
+                ALTER TABLE ingestion_jobs
+                ADD COLUMN IF NOT EXISTS batch_id INTEGER REFERENCES upload_batches(id);
+            """, "Add batch_id column to ingestion_jobs if not exists")
+
+            execute_sql("""
+                ALTER TABLE ingestion_jobs
+                ADD COLUMN IF NOT EXISTS stage VARCHAR(20) DEFAULT 'queued';
+            """, "Add stage column to ingestion_jobs if not exists")
+
+            execute_sql("""
+                ALTER TABLE ingestion_jobs
+                ADD COLUMN IF NOT EXISTS stage_started_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP;
+            """, "Add stage_started_at column to ingestion_jobs if not exists")
+
+            execute_sql("""
+                ALTER TABLE ingestion_jobs
+                ADD COLUMN IF NOT EXISTS timings JSON;
+            """, "Add timings column to ingestion_jobs if not exists")
+
+            execute_sql("""
+                CREATE INDEX IF NOT EXISTS ix_ingestion_jobs_batch_id ON ingestion_jobs (batch_id);
+            """, "Create ingestion_jobs batch index if not exists")
+
+            # 19. Index processed resume files by content hash for duplicate detection
+            execute_sql("""
+                CREATE TABLE IF NOT EXISTS resume_files (
+                    id SERIAL PRIMARY KEY,
+                    sha256 VARCHAR(64) UNIQUE NOT NULL,
+                    size INTEGER,
+                    file_type VARCHAR(20),
+                    filename VARCHAR(255),
+                    candidate_id INTEGER REFERENCES candidates(id) ON DELETE SET NULL,
+                    extracted_text TEXT,
+                    extraction_method VARCHAR(20),
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                );
+            """, "Create resume_files table if not exists")
+
+            execute_sql("""
+                CREATE INDEX IF NOT EXISTS ix_resume_files_candidate_id ON resume_files (candidate_id);
+            """, "Create resume_files candidate index if not exists")
+
+            # 20. Store responses of requests sent with an Idempotency-Key
+            execute_sql("""
+                CREATE TABLE IF NOT EXISTS idempotency_records (
+                    id SERIAL PRIMARY KEY,
+                    scope VARCHAR(150) NOT NULL,
+                    key VARCHAR(255) NOT NULL,
+                    fingerprint VARCHAR(64) NOT NULL,
+                    status VARCHAR(20) NOT NULL DEFAULT 'in_progress',
+                    response_status INTEGER,
+                    response_body TEXT,
+                    response_mimetype VARCHAR(100),
+                    locked_until TIMESTAMP,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    expires_at TIMESTAMP NOT NULL,
+                    CONSTRAINT uq_idempotency_scope_key UNIQUE (scope, key)
+                );
+            """, "Create idempotency_records table if not exists")
+
+            execute_sql("""
+                CREATE INDEX IF NOT EXISTS ix_idempotency_records_expires_at ON idempotency_records (expires_at);
+            """, "Create idempotency_records expiry index if not exists")
+
+            # 21. Index candidates for the paginated candidate listing
+            execute_sql("""
+                CREATE INDEX IF NOT EXISTS ix_candidates_created_at_id ON candidates (created_at, id);
+            """, "Create candidates listing index if not exists")
+
+            execute_sql("""
+                CREATE INDEX IF NOT EXISTS ix_candidates_uploaded_by_created_at_id ON candidates (uploaded_by, created_at, id);
+            """, "Create candidates uploader listing index if not exists")
+
+            execute_sql("""
+                CREATE INDEX IF NOT EXISTS ix_job_candidate_matches_candidate_id ON job_candidate_matches (candidate_id);
+            """, "Create job_candidate_matches candidate index if not exists")
+
+            # 22. Index the hot query paths. On Postgres the indexes are built CONCURRENTLY,
+            # so the tables stay writable while they build; SQLite has no such option.
+            # candidates.uploaded_by and job_candidate_matches.candidate_id are covered by 21.
+            hot_path_indexes = [
+                ('ix_candidates_email', 'candidates', 'email'),
+                ('ix_job_candidate_matches_job_id_score', 'job_candidate_matches', 'job_id, score'),
+                ('ix_jobs_recruiter_id_created_at_id', 'jobs', 'recruiter_id, created_at, id'),
+                ('ix_jobs_created_at_id', 'jobs', 'created_at, id'),
+                ('ix_jobs_status_expires_at', 'jobs', 'status, expires_at'),
+                ('ix_sessions_recruiter_id', 'sessions', 'recruiter_id'),
+                ('ix_candidate_ratings_candidate_id_recruiter_id', 'candidate_ratings', 'candidate_id, recruiter_id'),
+                ('ix_recruiter_sharing_shared_with_id', 'recruiter_sharing', 'shared_with_id'),
+            ]
+            for index_name, table, columns in hot_path_indexes:
+                create_index(index_name, table, columns)
+
+            # 23. Store normalized phone numbers, so duplicate detection by phone is one
+            # indexed lookup. Existing rows are backfilled in batches before the index is built.
+            candidate_columns = [column['name'] for column in db.inspect(conn).get_columns('candidates')]
+            if 'phone_normalized' not in candidate_columns:
+                execute_sql("""
+                    ALTER TABLE candidates ADD COLUMN phone_normalized VARCHAR(20);
+                """, "Add phone_normalized column to candidates table")
+
+            backfill_phone_normalized()
+            create_index('ix_candidates_phone_normalized', 'candidates', 'phone_normalized')
+            # Extensions ("x 89", "ext. 89", "#89") were once counted as part of the number
+            backfill_phone_normalized(where="(LOWER(phone) LIKE '%x%' OR phone LIKE '%#%')",
+                                      description="Renormalize candidates.phone_normalized for phones with extensions")
+
+            # 24. Per-job match aggregates, read by the dashboard and job lists instead of
+            # aggregating job_candidate_matches. Filled from the matches when first created.
+            execute_sql("""
+                CREATE TABLE IF NOT EXISTS job_match_stats (
+                    job_id INTEGER PRIMARY KEY REFERENCES jobs(id),
+                    match_count INTEGER NOT NULL DEFAULT 0,
+                    score_sum DOUBLE PRECISION NOT NULL DEFAULT 0,
+                    max_score DOUBLE PRECISION,
+                    top_matches JSON NOT NULL DEFAULT '[]',
+                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                );
+            """, "Create job_match_stats table if not exists")
+
+            try:
+                from utils.match_stats import rebuild_job_match_stats
+                if not conn.execute(db.text("SELECT 1 FROM job_match_stats LIMIT 1")).first():
+                    rebuilt = rebuild_job_match_stats()
+                    db.session.commit()
+                    print(f"✓ Success: Fill job_match_stats ({rebuilt} jobs)")
+            except Exception as e:
+                db.session.rollback()
+                print(f"✗ Error: Fill job_match_stats - {str(e)}")
+
+            # 25. Shared generation counters, bumped when cached data changes so every
+            # process drops its cached copies (dashboard statistics)
+            execute_sql("""
+                CREATE TABLE IF NOT EXISTS cache_generations (
+                    name VARCHAR(50) PRIMARY KEY,
+                    generation INTEGER NOT NULL DEFAULT 0,
+                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                );
+            """, "Create cache_generations table if not exists")
+            execute_sql("""
+                INSERT INTO cache_generations (name, generation) VALUES ('dashboard_stats', 0)
+                ON CONFLICT (name) DO NOTHING;
+            """, "Add dashboard_stats cache generation if missing")
+
+            # Let the planner see the new indexes' statistics
+            execute_sql("ANALYZE;", "Update planner statistics")
+
             print("\n== Database migration for Render completed successfully ==")
             print(f"Completed at: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
 
@@ -2,8 +2,11 @@
 from datetime import datetime, timedelta
 from flask_sqlalchemy import SQLAlchemy
 from werkzeug.security import generate_password_hash, check_password_hash
+from utils.phone import normalize_phone
+from utils.db_routing import RoutingSession
 
-db = SQLAlchemy()
+# Reads of replica_reads requests go to the replica bind when one is configured
+db = SQLAlchemy(session_options={'class_': RoutingSession})
 
 class Role(db.Model):
     """
@@ -103,22 +106,10 @@ class Recruiter(db.Model):
         Returns:
             bool: True if the recruiter can access the job, False otherwise
         """
-        # Admin can access all jobs
-        if self.has_permission('jobs:view_all'):
-            return True
-            
-        # Owner can access their own jobs
-        if job.recruiter_id == self.id:
-            return True
-            
-        # Check if the job's owner has shared jobs with this recruiter
-        sharing = RecruiterSharing.query.filter_by(
-            owner_id=job.recruiter_id,
-            shared_with_id=self.id,
-            share_jobs=True
-        ).first()
-        
-        return sharing is not None
+        # Admins, owners and recruiters the owner shares jobs with; sharing is
+        # loaded once per request however many jobs are checked
+        from utils.access import get_visibility
+        return get_visibility(self).can_view_job(job)
         
     def can_access_candidate(self, candidate):
         """
@@ -130,26 +121,9 @@ class Recruiter(db.Model):
         Returns:
             bool: True if the recruiter can access the candidate, False otherwise
         """
-        # Admin can access all candidates
-        if self.has_permission('candidates:view_all'):
-            return True
-            
-        # Owner can access their own uploaded candidates
-        if candidate.uploaded_by == self.id:
-            return True
-            
-        # Check if the candidate's uploader has shared candidates with this recruiter
-        if candidate.uploaded_by:
-            sharing = RecruiterSharing.query.filter_by(
-                owner_id=candidate.uploaded_by,
-                shared_with_id=self.id,
-                share_candidates=True
-            ).first()
-            
-            if sharing is not None:
-                return True
-                
-        return False
+        # Admins, uploaders and recruiters the uploader shares candidates with
+        from utils.access import get_visibility
+        return get_visibility(self).can_view_candidate(candidate)
 
 class JobToken(db.Model):
     """
@@ -171,7 +145,9 @@ class Job(db.Model):
     
     id = db.Column(db.Integer, primary_key=True)
     title = db.Column(db.String(100), nullable=False)
-    description = db.Column(db.Text, nullable=False)
+    # Descriptions and embeddings are large and only a few paths read them, so they
+    # are deferred; see the loader options at the end of this module
+    description = db.deferred(db.Column(db.Text, nullable=False))
     location = db.Column(db.String(100))
     experience = db.Column(db.String(50))
     education = db.Column(db.String(100))
@@ -180,7 +156,7 @@ class Job(db.Model):
     company = db.Column(db.String(100))
     required_skills = db.Column(db.JSON)
     preferred_skills = db.Column(db.JSON)
-    embedding = db.Column(db.JSON)
+    embedding = db.deferred(db.Column(db.JSON))
     recruiter_id = db.Column(db.Integer, db.ForeignKey('recruiters.id'), nullable=False)
     token_id = db.Column(db.Integer, db.ForeignKey('job_tokens.id'))
     status = db.Column(db.String(20), default='active')  # 'active', 'expired', 'archived'
@@ -190,6 +166,14 @@ class Job(db.Model):
     last_renewed_at = db.Column(db.DateTime, nullable=True)
     matches = db.relationship('JobCandidateMatch', backref='job', lazy=True)
     
+    __table_args__ = (
+        # A recruiter's jobs, newest first (dashboard, job listing), and everyone's for admins
+        db.Index('ix_jobs_recruiter_id_created_at_id', 'recruiter_id', 'created_at', 'id'),
+        db.Index('ix_jobs_created_at_id', 'created_at', 'id'),
+        # Active jobs by expiry date (job expiration service)
+        db.Index('ix_jobs_status_expires_at', 'status', 'expires_at'),
+    )
+    
     def is_expiring_soon(self, threshold_days=7):
         """
         Check if the job is expiring soon, within threshold_days
@@ -228,16 +212,34 @@ class Candidate(db.Model):
     name = db.Column(db.String(100), nullable=False)
     email = db.Column(db.String(120), nullable=True)  # Allow null/empty emails
     phone = db.Column(db.String(20))
+    # normalize_phone(phone), kept in step by set_phone_normalized, for indexed duplicate lookups
+    phone_normalized = db.Column(db.String(20))
     resume_file = db.Column(db.String(255))
     gcs_url = db.Column(db.String(255))
-    parsed_data = db.Column(db.JSON)
-    embedding = db.Column(db.JSON)
-    persona = db.Column(db.JSON)  # Stores candidate persona data
+    # Deferred like Job's heavy columns
+    parsed_data = db.deferred(db.Column(db.JSON))
+    embedding = db.deferred(db.Column(db.JSON))
+    persona = db.deferred(db.Column(db.JSON))  # Stores candidate persona data
     uploaded_by = db.Column(db.Integer, db.ForeignKey('recruiters.id'))
     job_id = db.Column(db.Integer, db.ForeignKey('jobs.id'))
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     matches = db.relationship('JobCandidateMatch', backref='candidate', lazy=True)
     ratings = db.relationship('CandidateRating', backref='candidate', lazy=True)
+    
+    # Keyset pagination of the candidate listing, for everyone and by uploader (which
+    # also serves every uploaded_by filter), and duplicate detection by email and phone
+    __table_args__ = (
+        db.Index('ix_candidates_created_at_id', 'created_at', 'id'),
+        db.Index('ix_candidates_uploaded_by_created_at_id', 'uploaded_by', 'created_at', 'id'),
+        db.Index('ix_candidates_email', 'email'),
+        db.Index('ix_candidates_phone_normalized', 'phone_normalized'),
+    )
+
+    @db.validates('phone')
+    def set_phone_normalized(self, key, phone):
+        """Store the normalized phone number whenever the phone number is set"""
+        self.phone_normalized = normalize_phone(phone)
+        return phone
 
 class JobCandidateMatch(db.Model):
     __tablename__ = 'job_candidate_matches'
@@ -248,11 +250,52 @@ class JobCandidateMatch(db.Model):
     score = db.Column(db.Float, nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
+    # A job's matches best first, and a candidate's matches
+    __table_args__ = (
+        db.Index('ix_job_candidate_matches_job_id_score', 'job_id', 'score'),
+        db.Index('ix_job_candidate_matches_candidate_id', 'candidate_id'),
+    )
+
+class JobMatchStats(db.Model):
+    """
+    A job's match aggregates, kept in step with job_candidate_matches by
+    utils/match_stats.py in the same transaction as the matches they describe
+    """
+    __tablename__ = 'job_match_stats'
+    
+    job_id = db.Column(db.Integer, db.ForeignKey('jobs.id'), primary_key=True)
+    match_count = db.Column(db.Integer, nullable=False, default=0)
+    score_sum = db.Column(db.Float, nullable=False, default=0.0)
+    max_score = db.Column(db.Float)
+    top_matches = db.Column(db.JSON, nullable=False, default=list)  # [[candidate_id, score], ...], best first
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    @property
+    def average_score(self):
+        """Mean match score, or None without matches"""
+        return self.score_sum / self.match_count if self.match_count else None
+    
+    @property
+    def top_candidate_ids(self):
+        """Ids of the best matched candidates, best first"""
+        return [candidate_id for candidate_id, _ in self.top_matches or []]
+    
+class CacheGeneration(db.Model):
+    """
+    A counter bumped whenever the data behind a per-process cache changes, so
+    every process (web servers, worker.py) can tell its cached copies are out of date
+    """
+    __tablename__ = 'cache_generations'
+    
+    name = db.Column(db.String(50), primary_key=True)
+    generation = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
 class Session(db.Model):
     __tablename__ = 'sessions'
     
     id = db.Column(db.String(32), primary_key=True)
-    recruiter_id = db.Column(db.Integer, db.ForeignKey('recruiters.id'), nullable=False)
+    recruiter_id = db.Column(db.Integer, db.ForeignKey('recruiters.id'), nullable=False, index=True)
     expires_at = db.Column(db.DateTime, nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
@@ -292,6 +335,8 @@ class RecruiterSharing(db.Model):
     # Define relationship constraints
     __table_args__ = (
         db.UniqueConstraint('owner_id', 'shared_with_id', name='uq_recruiter_sharing'),
+        # Who shares with a recruiter (visibility checks)
+        db.Index('ix_recruiter_sharing_shared_with_id', 'shared_with_id'),
     )
     
     # Relationships
@@ -308,4 +353,147 @@ class CandidateRating(db.Model):
     score = db.Column(db.Float, nullable=False)  # 0-1 rating scale (aligned with OpenAI scores)
     notes = db.Column(db.Text)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
-    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
\ No newline at end of file
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    __table_args__ = (
+        db.Index('ix_candidate_ratings_candidate_id_recruiter_id', 'candidate_id', 'recruiter_id'),
+    )
+
+class ResumeFile(db.Model):
+    """
+    A processed resume, keyed by the sha256 of its bytes, so an identical
+    upload can be answered with the existing candidate instead of reprocessed
+    """
+    __tablename__ = 'resume_files'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    sha256 = db.Column(db.String(64), unique=True, nullable=False)
+    size = db.Column(db.Integer)
+    file_type = db.Column(db.String(20))  # 'pdf', 'docx', 'image', 'text'
+    filename = db.Column(db.String(255))
+    candidate_id = db.Column(db.Integer, db.ForeignKey('candidates.id'), index=True)
+    extracted_text = db.Column(db.Text)
+    extraction_method = db.Column(db.String(20))  # See extract_document_text
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    candidate = db.relationship('Candidate', backref=db.backref('resume_files', lazy=True))
+
+class IdempotencyRecord(db.Model):
+    """
+    Stored outcome of a request sent with an Idempotency-Key header, replayed
+    when the client retries the same request
+    """
+    __tablename__ = 'idempotency_records'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    scope = db.Column(db.String(150), nullable=False)  # '<endpoint>:<recruiter id or client address>'
+    key = db.Column(db.String(255), nullable=False)
+    fingerprint = db.Column(db.String(64), nullable=False)  # sha256 of the request
+    status = db.Column(db.String(20), nullable=False, default='in_progress')  # 'in_progress', 'completed'
+    response_status = db.Column(db.Integer)
+    response_body = db.Column(db.Text)
+    response_mimetype = db.Column(db.String(100))
+    locked_until = db.Column(db.DateTime)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    expires_at = db.Column(db.DateTime, nullable=False, index=True)
+    
+    __table_args__ = (
+        db.UniqueConstraint('scope', 'key', name='uq_idempotency_scope_key'),
+    )
+
+class UploadBatch(db.Model):
+    """
+    A bulk upload; each file in it is an IngestionJob with the batch's id
+    """
+    __tablename__ = 'upload_batches'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    recruiter_id = db.Column(db.Integer, db.ForeignKey('recruiters.id'), nullable=False)
+    total_files = db.Column(db.Integer, nullable=False, default=0)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    jobs = db.relationship('IngestionJob', backref='batch', lazy='dynamic')
+
+class IngestionJob(db.Model):
+    """
+    Durable background job (resume processing, persona generation) claimed by
+    queue workers under a lease and retried with backoff on failure
+    """
+    __tablename__ = 'ingestion_jobs'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    kind = db.Column(db.String(50), nullable=False)  # 'resume', 'persona'
+    status = db.Column(db.String(20), nullable=False, default='queued')  # 'queued', 'running', 'succeeded', 'failed'
+    payload = db.Column(db.JSON, nullable=False, default=dict)
+    result = db.Column(db.JSON)
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    max_attempts = db.Column(db.Integer, nullable=False, default=5)
+    run_after = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    locked_by = db.Column(db.String(100))
+    locked_until = db.Column(db.DateTime)
+    last_error = db.Column(db.Text)
+    recruiter_id = db.Column(db.Integer, db.ForeignKey('recruiters.id'))
+    candidate_id = db.Column(db.Integer, db.ForeignKey('candidates.id'), index=True)
+    batch_id = db.Column(db.Integer, db.ForeignKey('upload_batches.id'), index=True)
+    # Pipeline progress: 'queued', 'extracting', 'parsing', 'embedding', 'matching', 'done', 'failed'
+    stage = db.Column(db.String(20), default='queued')
+    stage_started_at = db.Column(db.DateTime, default=datetime.utcnow)
+    timings = db.Column(db.JSON)  # Milliseconds spent in each stage
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    started_at = db.Column(db.DateTime)
+    finished_at = db.Column(db.DateTime)
+    
+    __table_args__ = (
+        db.Index('ix_ingestion_jobs_status_run_after', 'status', 'run_after'),
+    )
+    
+    def to_dict(self):
+        """
+        Serialize the job for status endpoints
+        
+        Returns:
+            dict: Job state without the payload
+        """
+        return {
+            'id': self.id,
+            'kind': self.kind,
+            'status': self.status,
+            'attempts': self.attempts,
+            'max_attempts': self.max_attempts,
+            'candidate_id': self.candidate_id,
+            'batch_id': self.batch_id,
+            'filename': (self.payload or {}).get('filename'),
+            'stage': self.stage,
+            'timings': self.timings or {},
+            'result': self.result,
+            'last_error': self.last_error,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None
+        }
+
+# Loader options for the deferred columns. Paths that read them for many rows ask
+# for them up front, e.g. Candidate.query.options(*candidate_matching_options());
+# otherwise every row loads each deferred column with a query of its own.
+
+def candidate_profile_options():
+    """Parsed resume and persona, for candidate pages and APIs"""
+    return (db.undefer(Candidate.parsed_data), db.undefer(Candidate.persona))
+
+def candidate_summary_options():
+    """Parsed resume only, for candidate lists that show skills and experience"""
+    return (db.undefer(Candidate.parsed_data),)
+
+def candidate_matching_options():
+    """Parsed resume and embedding, for scoring candidates against jobs"""
+    return (db.undefer(Candidate.parsed_data), db.undefer(Candidate.embedding))
+
+def candidate_contact_options():
+    """Only the columns duplicate detection compares"""
+    return (db.load_only(Candidate.id, Candidate.name, Candidate.email, Candidate.phone),)
+
+def job_matching_options():
+    """Embedding, for scoring jobs against candidates"""
+    return (db.undefer(Job.embedding),)
+
+def job_preview_options():
+    """Description, for job cards that show its beginning"""
+    return (db.undefer(Job.description),)
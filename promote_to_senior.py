@@ -25,7 +25,7 @@ def promote_to_senior_role(email):
         bool: True if promotion was successful, False otherwise
     """
     try:
-        app = create_app()
+        app = create_app(start_workers=False)
         with app.app_context():
             # Find recruiter by email
             recruiter = Recruiter.query.filter_by(email=email).first()
@@ -27,7 +27,7 @@ def reset_recruiter_password(email, new_password):
         bool: True if password was reset, False otherwise
     """
     try:
-        app = create_app()
+        app = create_app(start_workers=False)
         with app.app_context():
             # Find recruiter by email
             recruiter = Recruiter.query.filter_by(email=email).first()
@@ -87,6 +87,22 @@ else
 fi
 TOTAL=$((TOTAL+1))
 
+echo -e "${BOLD}Test 5: Duplicate Upload Test${NC}"
+if run_test "Duplicate Upload Test" "test_duplicate_uploads.py" "$VERBOSE"; then
+  PASSED=$((PASSED+1))
+else
+  FAILED=$((FAILED+1))
+fi
+TOTAL=$((TOTAL+1))
+
+echo -e "${BOLD}Test 6: Batch Backfill Test${NC}"
+if run_test "Batch Backfill Test" "test_batch_backfill.py" "$VERBOSE"; then
+  PASSED=$((PASSED+1))
+else
+  FAILED=$((FAILED+1))
+fi
+TOTAL=$((TOTAL+1))
+
 # Print summary
 echo -e "\n${BOLD}===========================================${NC}"
 echo -e "${BOLD}            TEST SUMMARY                 ${NC}"
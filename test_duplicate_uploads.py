@@ -0,0 +1,228 @@
+#!/usr/bin/env python3
+"""
+Test script for duplicate resume uploads in the AI Recruiter Pro system.
+This script uploads the same resume again (same name, other names, in bulk and as text)
+and checks that the original candidate keeps its resume file, and that a different
+file with the same name does not overwrite it.
+"""
+
+import os
+import sys
+import time
+import requests
+from io import BytesIO
+from datetime import datetime
+
+# Base URL for the application
+BASE_URL = "http://localhost:5000"
+
+# Test credentials for the demo admin account
+TEST_RECRUITER = {
+    "email": "demo@example.com",
+    "password": os.getenv("DEMO_PASSWORD")
+}
+
+# Longest wait for a queued resume to be processed, in seconds
+PROCESSING_TIMEOUT = 120
+
+RESUME_TEMPLATE = """
+Duplicate Test User {run_id}
+Software Engineer
+dup-{run_id}@example.com
+
+Experience:
+{experience}
+
+Education:
+Bachelor's in Computer Science, Test University, 2019
+"""
+
+
+class DuplicateUploadTester:
+    """Test duplicate resume upload handling in the AI Recruiter Pro system."""
+
+    def __init__(self, verbose=False):
+        self.verbose = verbose
+        self.session = requests.Session()
+        # Every run uploads new bytes, so earlier runs' files are not duplicates
+        self.run_id = datetime.now().strftime('%Y%m%d%H%M%S%f')
+        self.results = []
+
+    def log(self, message):
+        """Log a message if verbose mode is enabled."""
+        if self.verbose:
+            print(f"[{datetime.now().strftime('%H:%M:%S')}] {message}")
+
+    def check(self, name, passed, details=""):
+        """Record and print the result of one check."""
+        self.results.append((name, passed))
+        print(f"{'✅' if passed else '❌'} {name}{f' - {details}' if details and not passed else ''}")
+        return passed
+
+    def resume_bytes(self, experience):
+        """A resume unique to this run."""
+        return RESUME_TEMPLATE.format(run_id=self.run_id, experience=experience).encode()
+
+    def login(self):
+        """Log in as a recruiter."""
+        self.log(f"Logging in as {TEST_RECRUITER['email']}...")
+        response = self.session.post(f"{BASE_URL}/api/auth/login", json=TEST_RECRUITER)
+        if response.status_code == 200:
+            self.log("Login successful!")
+            return True
+        self.log(f"Login failed with status code: {response.status_code}")
+        self.log(f"Response: {response.text}")
+        return False
+
+    def post(self, path, **kwargs):
+        """POST an upload, waiting out the per-minute upload rate limit once."""
+        response = self.session.post(f"{BASE_URL}{path}", **kwargs)
+        if response.status_code == 429:
+            self.log("Upload rate limit reached, waiting a minute...")
+            time.sleep(61)
+            files = kwargs.get("files") or {}
+            for _, stream, _ in (files.values() if isinstance(files, dict) else [value for _, value in files]):
+                stream.seek(0)
+            response = self.session.post(f"{BASE_URL}{path}", **kwargs)
+        self.log(f"POST {path}: {response.status_code} {response.text[:200]}")
+        return response
+
+    def upload_file(self, filename, content):
+        """Upload one resume file through the candidate upload endpoint."""
+        return self.post(
+            "/api/candidates",
+            files={"file": (filename, BytesIO(content), "text/plain")},
+            # A new email each time, so no upload is matched to an earlier candidate by email
+            data={"name": f"Duplicate Test User {self.run_id}", "email": f"dup-{time.time_ns()}@example.com"}
+        )
+
+    def wait_for_job(self, job_id):
+        """Wait until a queued resume job has finished; returns its final status."""
+        deadline = time.time() + PROCESSING_TIMEOUT
+        while time.time() < deadline:
+            response = self.session.get(f"{BASE_URL}/api/ingest/jobs/{job_id}")
+            if response.status_code == 200 and response.json().get("status") in ("succeeded", "failed"):
+                self.log(f"Job {job_id} finished: {response.json().get('status')}")
+                return response.json().get("status")
+            time.sleep(1)
+        return None
+
+    def resume_content(self, candidate_id):
+        """Download a candidate's resume file; returns (status code, bytes)."""
+        response = self.session.get(
+            f"{BASE_URL}/api/candidates/{candidate_id}",
+            headers={"X-Requested-With": "XMLHttpRequest", "Accept": "application/json"}
+        )
+        if response.status_code != 200:
+            return response.status_code, None
+        data = response.json()
+        resume_url = (data.get("candidate") or data).get("resume_url")
+        if not resume_url:
+            return 404, None
+        download = self.session.get(f"{BASE_URL}{resume_url}")
+        return download.status_code, download.content
+
+    def run_tests(self):
+        """Run the duplicate upload tests."""
+        print("\n===== DUPLICATE UPLOAD TEST =====\n")
+
+        # Step 1: Login
+        if not self.login():
+            print("❌ Login failed. Aborting tests.")
+            return False
+        print("✅ Login successful")
+
+        # Step 2: Upload a resume and let it be processed
+        filename = f"duplicate-test-{self.run_id}.txt"
+        original = self.resume_bytes("Software Engineer, Test Company, 2019-2023")
+        response = self.upload_file(filename, original)
+        if not self.check("Original resume queued", response.status_code == 202, response.text[:200]):
+            return False
+        candidate_id = response.json()["candidate_id"]
+        status = self.wait_for_job(response.json()["job_id"])
+        self.check("Original resume processed", status == "succeeded", f"job status {status}")
+
+        # Step 3: The same file under the same name is a duplicate, and must not remove the file
+        print("\n----- Same Name, Same Bytes -----")
+        response = self.upload_file(filename, original)
+        self.check("Re-upload answered as a duplicate of the original",
+                   response.status_code == 200 and response.json().get("status") == "duplicate"
+                   and response.json().get("candidate_id") == candidate_id, response.text[:200])
+        code, content = self.resume_content(candidate_id)
+        self.check("Original resume file still served", code == 200 and content == original, f"status {code}")
+
+        # Step 4: The same bytes under another name
+        print("\n----- Other Name, Same Bytes -----")
+        response = self.upload_file(f"copy-of-{filename}", original)
+        self.check("Renamed copy answered as a duplicate",
+                   response.status_code == 200 and response.json().get("status") == "duplicate", response.text[:200])
+        code, content = self.resume_content(candidate_id)
+        self.check("Original resume file still served", code == 200 and content == original, f"status {code}")
+
+        # Step 5: Other bytes under the same name get their own file
+        print("\n----- Same Name, Other Bytes -----")
+        other = self.resume_bytes("Senior Software Engineer, Other Company, 2021-2024")
+        response = self.upload_file(filename, other)
+        if self.check("Different resume with the same name queued", response.status_code == 202, response.text[:200]):
+            other_id = response.json()["candidate_id"]
+            self.wait_for_job(response.json()["job_id"])
+            code, content = self.resume_content(other_id)
+            self.check("Different resume served with its own contents", code == 200 and content == other, f"status {code}")
+            code, content = self.resume_content(candidate_id)
+            self.check("Original resume file not overwritten", code == 200 and content == original, f"status {code}")
+
+        # Step 6: The same file twice in one bulk upload
+        print("\n----- Bulk Upload With Repeats -----")
+        bulk = self.resume_bytes("Staff Software Engineer, Bulk Company, 2022-2024")
+        bulk_name = f"bulk-{filename}"
+        response = self.post("/api/candidates/bulk", files=[
+            ("files", (bulk_name, BytesIO(bulk), "text/plain")),
+            ("files", (bulk_name, BytesIO(bulk), "text/plain"))
+        ])
+        if self.check("Bulk upload accepted", response.status_code in (200, 202), response.text[:200]):
+            statuses = [result.get("status") for result in response.json().get("results", [])]
+            self.check("Repeated file in the batch answered as a duplicate",
+                       sorted(statuses) == ["duplicate", "queued"], f"statuses {statuses}")
+            queued = [result for result in response.json().get("results", []) if result.get("status") == "queued"]
+            if queued:
+                self.wait_for_job(queued[0]["job_id"])
+                job = self.session.get(f"{BASE_URL}/api/ingest/jobs/{queued[0]['job_id']}").json()
+                code, content = self.resume_content(job.get("candidate_id"))
+                self.check("Bulk resume file still served", code == 200 and content == bulk, f"status {code}")
+
+        # Step 7: The same resume text twice
+        print("\n----- Resume Text Sent Twice -----")
+        text = self.resume_bytes("Software Engineer, Text Company, 2020-2024").decode()
+        payload = {"name": f"Duplicate Text User {self.run_id}", "resume_text": text}
+        response = self.post("/api/resume/text", json=payload)
+        if self.check("Resume text queued", response.status_code == 202, response.text[:200]):
+            text_id = response.json()["candidate_id"]
+            self.wait_for_job(response.json()["job_id"])
+            response = self.post("/api/resume/text", json=payload)
+            self.check("Repeated resume text answered as a duplicate",
+                       response.status_code == 200 and response.json().get("candidate_id") == text_id, response.text[:200])
+            code, _ = self.resume_content(text_id)
+            self.check("Resume text file still served", code == 200, f"status {code}")
+
+        # Analysis of results
+        print("\n----- Test Results Analysis -----")
+        passed = sum(1 for _, ok in self.results if ok)
+        print(f"Checks passed: {passed} out of {len(self.results)}")
+        if passed == len(self.results):
+            print("\n✅ Duplicate uploads were handled correctly!")
+        else:
+            print("\n❌ Some duplicate upload checks failed.")
+
+        print("\n===== TEST COMPLETE =====")
+        return passed == len(self.results)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Test duplicate resume uploads in the AI Recruiter Pro system")
+    parser.add_argument("-v", "--verbose", action="store_true", help="Enable verbose logging")
+    args = parser.parse_args()
+
+    tester = DuplicateUploadTester(verbose=args.verbose)
+    sys.exit(0 if tester.run_tests() else 1)
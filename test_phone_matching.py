@@ -10,6 +10,7 @@ import time
 import json
 import requests
 import random
+import subprocess
 from datetime import datetime
 
 # Base URL for the application
@@ -18,7 +19,7 @@ BASE_URL = "http://localhost:5000"
 # Test credentials for the demo admin account
 TEST_RECRUITER = {
     "email": "demo@example.com",
-    os.getenv("ADMIN_PASSWORD"): "os.getenv("TEST_PASSWORD")"
+    "password": os.getenv("DEMO_PASSWORD")
 }
 
 # Test phone number variations
@@ -113,6 +114,7 @@ PHONE_TEST_CASES = [
         "name": "Different Phone User",
         "email": "",
         "phone": "999-888-7777",
+        "expect_match": False,
         "resume_text": """
         Different Phone User
         Software Engineer
@@ -124,6 +126,110 @@ PHONE_TEST_CASES = [
         Education:
         Bachelor's in Computer Science, Test University, 2021
         """
+    },
+    {
+        "case": "Country Code Without Plus",
+        "name": "Trunk Code User",
+        "email": "",
+        "phone": "1-555-123-4567",
+        "resume_text": """
+        Trunk Code User
+        Software Engineer
+        1-555-123-4567
+        
+        Experience:
+        Software Engineer, Test Company, 2019-2023
+        
+        Education:
+        Bachelor's in Computer Science, Test University, 2019
+        """
+    },
+    {
+        "case": "International Prefix",
+        "name": "International Prefix User",
+        "email": "",
+        "phone": "001 555 123 4567",
+        "resume_text": """
+        International Prefix User
+        Software Engineer
+        001 555 123 4567
+        
+        Experience:
+        Software Engineer, Test Company, 2018-2023
+        
+        Education:
+        Bachelor's in Computer Science, Test University, 2018
+        """
+    },
+    {
+        "case": "With Extension",
+        "name": "Extension User",
+        "email": "",
+        "phone": "555-123-4567 ext. 89",
+        "resume_text": """
+        Extension User
+        Software Engineer
+        555-123-4567 ext. 89
+        
+        Experience:
+        Software Engineer, Test Company, 2017-2023
+        
+        Education:
+        Bachelor's in Computer Science, Test University, 2017
+        """
+    },
+    {
+        "case": "With Short Extension",
+        "name": "Short Extension User",
+        "email": "",
+        "phone": "(555) 123-4567 x12",
+        "resume_text": """
+        Short Extension User
+        Software Engineer
+        (555) 123-4567 x12
+        
+        Experience:
+        Software Engineer, Test Company, 2016-2023
+        
+        Education:
+        Bachelor's in Computer Science, Test University, 2016
+        """
+    },
+    {
+        "case": "Other Country Code",
+        "name": "Other Country User",
+        "email": "",
+        "phone": "+44 555 123 4567",
+        "expect_match": False,
+        "resume_text": """
+        Other Country User
+        Software Engineer
+        +44 555 123 4567
+        
+        Experience:
+        Software Engineer, Test Company, 2015-2023
+        
+        Education:
+        Bachelor's in Computer Science, Test University, 2015
+        """
+    },
+    {
+        "case": "Too Short To Match",
+        "name": "Short Number User",
+        "email": "",
+        "phone": "555-12",
+        "expect_match": False,
+        "resume_text": """
+        Short Number User
+        Software Engineer
+        555-12
+        
+        Experience:
+        Software Engineer, Test Company, 2014-2023
+        
+        Education:
+        Bachelor's in Computer Science, Test University, 2014
+        """
     }
 ]
 
@@ -131,8 +237,11 @@ PHONE_TEST_CASES = [
 class PhoneMatchingTester:
     """Test phone number matching in the AI Recruiter Pro system."""
 
-    def __init__(self, verbose=False):
+    def __init__(self, verbose=False, check_backfill=True):
         self.verbose = verbose
+        self.check_backfill = check_backfill
+        # Resumes identical to an earlier run's are answered as duplicates, so each run's differ
+        self.run_id = datetime.now().strftime('%Y%m%d%H%M%S%f')
         self.session = requests.Session()
         self.access_token = None
         self.upload_results = []
@@ -170,7 +279,7 @@ class PhoneMatchingTester:
             "name": resume_data["name"],
             "email": resume_data.get("email", ""),
             "phone": resume_data.get("phone", ""),
-            "resume_text": resume_data["resume_text"],
+            "resume_text": f"{resume_data['resume_text']}\nTest run {self.run_id}",
             "is_direct_upload": "true"
         }
         
@@ -178,6 +287,14 @@ class PhoneMatchingTester:
             f"{BASE_URL}/api/resume/text",
             json=payload
         )
+        if response.status_code == 429:
+            # Uploads are rate limited per minute; wait for the window to pass and retry once
+            self.log("Upload rate limit reached, waiting a minute...")
+            time.sleep(61)
+            response = self.session.post(
+                f"{BASE_URL}/api/resume/text",
+                json=payload
+            )
         
         result = {
             "case": resume_data["case"],
@@ -208,6 +325,57 @@ class PhoneMatchingTester:
             self.log(f"Resume upload failed with status code: {response.status_code}")
             return False
 
+    def test_backfill(self):
+        """
+        Check that migrations.py fills phone_normalized for candidates stored
+        without it, and that an upload in another format then matches them.
+        Needs the server's database (DATABASE_URL from the environment or .env).
+        """
+        from dotenv import load_dotenv
+        load_dotenv()
+        from app import create_app
+        from models import db, Candidate
+        
+        # A number no other run has used, stored the way rows were before the column existed
+        local_number = f"{random.randint(200, 999)}-{random.randint(1000, 9999)}"
+        app = create_app(start_workers=False)
+        with app.app_context():
+            candidate = Candidate(name="Backfill User", email="", phone=f"(777) {local_number}")
+            db.session.add(candidate)
+            db.session.commit()
+            candidate_id = candidate.id
+            db.session.execute(db.text("UPDATE candidates SET phone_normalized = NULL WHERE id = :id"),
+                               {"id": candidate_id})
+            db.session.commit()
+        self.log(f"Stored candidate {candidate_id} without a normalized phone")
+        
+        script = os.path.join(os.path.dirname(os.path.abspath(__file__)), "migrations.py")
+        migration = subprocess.run([sys.executable, script], capture_output=True, text=True)
+        self.log(migration.stdout)
+        with app.app_context():
+            normalized = db.session.get(Candidate, candidate_id).phone_normalized
+        expected = "+1777" + local_number.replace("-", "")
+        if normalized != expected:
+            print(f"❌ Backfill stored {normalized!r}, expected {expected!r}")
+            return False
+        print(f"✅ Backfill normalized (777) {local_number} to {normalized}")
+        
+        backfill_case = {
+            "case": "Backfilled Row",
+            "name": "Backfill User",
+            "phone": f"+1 777.{local_number.replace('-', '.')}",
+            "resume_text": f"Backfill User\nSoftware Engineer\n+1 777 {local_number}"
+        }
+        if not self.upload_resume(backfill_case):
+            print(f"❌ Upload failed for {backfill_case['case']}")
+            return False
+        response = self.upload_results[-1]["response"]
+        if response.get("is_update") and response.get("candidate_id") == candidate_id:
+            print(f"✅ Upload matched the backfilled candidate")
+            return True
+        print(f"❌ Upload did not match the backfilled candidate {candidate_id}: {response}")
+        return False
+
     def run_tests(self):
         """Run the phone number matching tests."""
         print("\n===== PHONE NUMBER MATCHING TEST =====\n")
@@ -232,22 +400,27 @@ class PhoneMatchingTester:
         # Step 3: Upload the variations to test matching
         print("\n----- Testing Phone Number Variations -----")
         
+        original_id = self.upload_results[0]["response"].get("candidate_id")
         matched_count = 0
+        new_count = 0
         for idx, test_case in enumerate(PHONE_TEST_CASES[1:], 2):
             print(f"\nTesting Case #{idx}: {test_case['case']}")
             if self.upload_resume(test_case):
                 result = self.upload_results[-1]
+                # Earlier runs' candidates share these numbers, so compare with this run's original
                 is_update = result["response"].get("is_update", False)
+                matched_original = is_update and result["response"].get("candidate_id") == original_id
                 
-                # For the different phone number, it should be a new record
-                if test_case["case"] == "Different Phone Number":
-                    if not is_update:
-                        print(f"✅ Different phone number correctly created as a new record")
+                # Other numbers (and ones too short to be a number) should not match the original
+                if not test_case.get("expect_match", True):
+                    if not matched_original:
+                        new_count += 1
+                        print(f"✅ {test_case['case']} correctly kept apart from the original")
                     else:
-                        print(f"❌ Different phone number incorrectly matched as an update")
+                        print(f"❌ {test_case['case']} incorrectly matched as an update")
                 else:
                     # For variations of the same phone number, it should match
-                    if is_update:
+                    if matched_original:
                         matched_count += 1
                         print(f"✅ {test_case['case']} correctly matched with original")
                     else:
@@ -258,18 +431,27 @@ class PhoneMatchingTester:
             # Wait a bit between uploads
             time.sleep(1)
         
+        # Step 4: Rows written before phone_normalized existed are found once backfilled
+        backfill_ok = True
+        if self.check_backfill:
+            print("\n----- Testing Migration Backfill -----")
+            backfill_ok = self.test_backfill()
+        
         # Analysis of results
         print("\n----- Test Results Analysis -----")
-        expected_matches = len(PHONE_TEST_CASES) - 2  # All except first and different phone
+        expected_matches = sum(1 for case in PHONE_TEST_CASES[1:] if case.get("expect_match", True))
+        expected_new = len(PHONE_TEST_CASES) - 1 - expected_matches
         print(f"Successfully matched: {matched_count} out of {expected_matches} expected matches")
+        print(f"Correctly kept apart: {new_count} out of {expected_new} different numbers")
         
-        if matched_count == expected_matches:
+        passed = matched_count == expected_matches and new_count == expected_new and backfill_ok
+        if passed:
             print("\n✅ All phone number variations were correctly matched!")
         else:
             print(f"\n❌ Some phone number variations were not matched correctly.")
         
         print("\n===== TEST COMPLETE =====")
-        return True
+        return passed
 
 
 if __name__ == "__main__":
@@ -277,7 +459,9 @@ if __name__ == "__main__":
     
     parser = argparse.ArgumentParser(description="Test phone number matching in the AI Recruiter Pro system")
     parser.add_argument("-v", "--verbose", action="store_true", help="Enable verbose logging")
+    parser.add_argument("--skip-backfill", action="store_true",
+                        help="Skip the migration backfill check, which needs the server's database")
     args = parser.parse_args()
     
-    tester = PhoneMatchingTester(verbose=args.verbose)
-    tester.run_tests()
\ No newline at end of file
+    tester = PhoneMatchingTester(verbose=args.verbose, check_backfill=not args.skip_backfill)
+    sys.exit(0 if tester.run_tests() else 1)
\ No newline at end of file
@@ -0,0 +1,91 @@
+"""
+Access - Per-request job and candidate visibility for a recruiter.
+
+This module provides functions to:
+1. Load once per request whose jobs and candidates a recruiter can see through sharing
+2. Check access to any number of jobs and candidates against that set without further queries
+3. Load rows for a list of ids with batched IN queries instead of one get per id
+"""
+
+import logging
+from flask import g, has_request_context
+from models import db, RecruiterSharing
+
+logger = logging.getLogger(__name__)
+
+# Ids per IN query
+IN_CHUNK = 500
+
+class Visibility:
+    """
+    What one recruiter can see: the view-all permissions, and the owners who share
+    their jobs or candidates with them. Built with one sharing query.
+    """
+
+    def __init__(self, recruiter):
+        self.recruiter_id = recruiter.id
+        self.view_all_jobs = recruiter.has_permission('jobs:view_all')
+        self.view_all_candidates = recruiter.has_permission('candidates:view_all')
+
+        self.job_owners = set()
+        self.candidate_owners = set()
+        if not (self.view_all_jobs and self.view_all_candidates):
+            rows = db.session.query(
+                RecruiterSharing.owner_id, RecruiterSharing.share_jobs, RecruiterSharing.share_candidates
+            ).filter(RecruiterSharing.shared_with_id == recruiter.id).all()
+            for owner_id, share_jobs, share_candidates in rows:
+                if share_jobs:
+                    self.job_owners.add(owner_id)
+                if share_candidates:
+                    self.candidate_owners.add(owner_id)
+
+    def can_view_job(self, job):
+        """True if the recruiter may see the job"""
+        return self.view_all_jobs or job.recruiter_id == self.recruiter_id or job.recruiter_id in self.job_owners
+
+    def can_view_candidate(self, candidate):
+        """True if the recruiter may see the candidate"""
+        if self.view_all_candidates or candidate.uploaded_by == self.recruiter_id:
+            return True
+        return candidate.uploaded_by is not None and candidate.uploaded_by in self.candidate_owners
+
+def get_visibility(recruiter):
+    """
+    Get a recruiter's visibility, built once per request
+
+    Outside a request (workers, scripts) it is built on every call, so sharing
+    changes are never missed by long-running processes.
+
+    Args:
+        recruiter: The Recruiter
+
+    Returns:
+        Visibility: The recruiter's visibility
+    """
+    if not has_request_context():
+        return Visibility(recruiter)
+
+    cache = g.setdefault('visibility', {})
+    if recruiter.id not in cache:
+        cache[recruiter.id] = Visibility(recruiter)
+    return cache[recruiter.id]
+
+def load_by_ids(model, ids, options=()):
+    """
+    Load rows by primary key with IN queries of up to IN_CHUNK ids
+
+    Args:
+        model: The model class
+        ids: Ids to load (duplicates and None are ignored)
+        options: Loader options, e.g. from the helpers in models.py
+
+    Returns:
+        dict: id -> row, for the ids that exist
+    """
+    unique_ids = sorted({row_id for row_id in ids if row_id is not None})
+    rows = {}
+    for start in range(0, len(unique_ids), IN_CHUNK):
+        chunk = unique_ids[start:start + IN_CHUNK]
+        for row in model.query.options(*options).filter(model.id.in_(chunk)).all():
+            rows[row.id] = row
+    return rows
@@ -0,0 +1,176 @@
+"""
+Admission - Backpressure for the resume upload endpoints.
+
+This module provides functions to:
+1. Measure pipeline load: resume jobs in flight, how long the oldest has waited and recent throughput
+2. Admit or refuse new uploads against that load, keeping part of the capacity for single uploads
+3. Compute a Retry-After for refused uploads from how fast the queue is draining
+"""
+
+import os
+import time
+import math
+import logging
+import threading
+from datetime import datetime, timedelta
+from sqlalchemy import func
+from models import db, IngestionJob
+
+logger = logging.getLogger(__name__)
+
+# Resume jobs (queued or running) the pipeline accepts before refusing uploads
+ADMISSION_MAX_INFLIGHT = int(os.environ.get('ADMISSION_MAX_INFLIGHT', 500))
+# Share of that capacity only single (interactive) uploads may use
+ADMISSION_INTERACTIVE_RESERVE = float(os.environ.get('ADMISSION_INTERACTIVE_RESERVE', 0.2))
+# Bulk uploads are refused once the oldest runnable job has waited this long;
+# single uploads at twice this
+ADMISSION_MAX_QUEUE_AGE_SECONDS = float(os.environ.get('ADMISSION_MAX_QUEUE_AGE_SECONDS', 300))
+
+# How long a load measurement is reused, and the window throughput is measured over
+LOAD_CACHE_SECONDS = 1.0
+THROUGHPUT_WINDOW_SECONDS = 300
+# Retry-After bounds, and the value used when nothing has finished recently
+MIN_RETRY_AFTER = 1
+MAX_RETRY_AFTER = 300
+DEFAULT_RETRY_AFTER = 30
+
+PRIORITIES = ('interactive', 'bulk')
+
+_lock = threading.Lock()
+_load = {'measured_at': 0.0}
+_metrics = {priority: {'admitted': 0, 'rejected': 0} for priority in PRIORITIES}
+
+class AdmissionDecision:
+    """Outcome of an admission check"""
+
+    def __init__(self, admitted, retry_after=None, reason=None):
+        self.admitted = admitted
+        self.retry_after = retry_after
+        self.reason = reason
+
+def _measure_load():
+    """Query the queue for in-flight resume jobs, the oldest wait and recent throughput"""
+    now = datetime.utcnow()
+    inflight = db.session.query(func.count(IngestionJob.id)).filter(
+        IngestionJob.kind == 'resume',
+        IngestionJob.status.in_(['queued', 'running'])
+    ).scalar() or 0
+    oldest = db.session.query(func.min(IngestionJob.run_after)).filter(
+        IngestionJob.kind == 'resume',
+        IngestionJob.status == 'queued',
+        IngestionJob.run_after <= now
+    ).scalar()
+    finished = db.session.query(func.count(IngestionJob.id)).filter(
+        IngestionJob.kind == 'resume',
+        IngestionJob.status.in_(['succeeded', 'failed']),
+        IngestionJob.finished_at >= now - timedelta(seconds=THROUGHPUT_WINDOW_SECONDS)
+    ).scalar() or 0
+
+    return {
+        'inflight': inflight,
+        'oldest_age_seconds': (now - oldest).total_seconds() if oldest else 0.0,
+        'jobs_per_second': finished / THROUGHPUT_WINDOW_SECONDS
+    }
+
+def get_pipeline_load():
+    """
+    Get the current resume pipeline load, measured at most once per LOAD_CACHE_SECONDS
+
+    Returns:
+        dict: inflight, oldest_age_seconds and jobs_per_second
+    """
+    with _lock:
+        if time.time() - _load['measured_at'] < LOAD_CACHE_SECONDS:
+            return dict(_load)
+
+    load = _measure_load()
+    with _lock:
+        _load.update(load, measured_at=time.time())
+        return dict(_load)
+
+def _retry_after(excess, jobs_per_second):
+    """Seconds until the queue should have drained by excess jobs"""
+    if jobs_per_second <= 0:
+        return DEFAULT_RETRY_AFTER
+    return max(MIN_RETRY_AFTER, min(MAX_RETRY_AFTER, math.ceil(excess / jobs_per_second)))
+
+def check_admission(priority, cost=1, provisional=False):
+    """
+    Decide whether an upload may add work to the resume pipeline
+
+    Bulk uploads may fill the pipeline up to the share not reserved for single
+    uploads; single uploads may use all of it. A refused upload is told how long
+    to wait for the excess to drain at the recent throughput.
+
+    Args:
+        priority: 'interactive' (single uploads) or 'bulk'
+        cost: Number of resume jobs the upload would add
+        provisional: Check an estimated cost before the upload is read, without
+            reserving capacity or counting an admission; the upload is checked
+            again once its real cost is known
+
+    Returns:
+        AdmissionDecision: Whether it is admitted, and if not, retry_after and reason
+    """
+    if priority not in PRIORITIES:
+        raise ValueError(f"Unknown admission priority: {priority}")
+
+    try:
+        load = get_pipeline_load()
+    except Exception as e:
+        # Never block uploads because load could not be measured
+        logger.error(f"Error measuring pipeline load: {str(e)}")
+        return AdmissionDecision(True)
+
+    if priority == 'bulk':
+        capacity = ADMISSION_MAX_INFLIGHT * (1 - ADMISSION_INTERACTIVE_RESERVE)
+        max_age = ADMISSION_MAX_QUEUE_AGE_SECONDS
+    else:
+        capacity = ADMISSION_MAX_INFLIGHT
+        max_age = ADMISSION_MAX_QUEUE_AGE_SECONDS * 2
+
+    decision = AdmissionDecision(True)
+    inflight = load['inflight']
+    # A batch larger than the whole capacity is still let into an empty pipeline
+    if inflight and inflight + cost > capacity:
+        decision = AdmissionDecision(
+            False,
+            _retry_after(inflight + cost - capacity, load['jobs_per_second']),
+            f"{inflight} resumes are already being processed"
+        )
+    elif load['oldest_age_seconds'] > max_age:
+        # Wait for the backlog to shrink enough that the oldest job's wait is acceptable again
+        excess = inflight * (1 - max_age / load['oldest_age_seconds'])
+        decision = AdmissionDecision(
+            False,
+            _retry_after(max(excess, 1), load['jobs_per_second']),
+            f"Resumes are waiting {int(load['oldest_age_seconds'])}s to be processed"
+        )
+
+    with _lock:
+        if not decision.admitted:
+            _metrics[priority]['rejected'] += 1
+        elif not provisional:
+            _metrics[priority]['admitted'] += 1
+            # Count the new jobs until the next measurement sees them
+            _load['inflight'] = _load.get('inflight', 0) + cost
+    if not decision.admitted:
+        logger.warning(f"Refused {priority} upload of {cost} resumes: {decision.reason} "
+                       f"(retry after {decision.retry_after}s)")
+    return decision
+
+def get_admission_metrics():
+    """
+    Get admission counters and the last load measurement
+
+    Returns:
+        dict: Settings, admitted/rejected counts by priority and the current load
+    """
+    with _lock:
+        return {
+            'max_inflight': ADMISSION_MAX_INFLIGHT,
+            'interactive_reserve': ADMISSION_INTERACTIVE_RESERVE,
+            'max_queue_age_seconds': ADMISSION_MAX_QUEUE_AGE_SECONDS,
+            'decisions': {priority: dict(counts) for priority, counts in _metrics.items()},
+            'load': {key: value for key, value in _load.items() if key != 'measured_at'}
+        }
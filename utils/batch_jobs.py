@@ -0,0 +1,545 @@
+"""
+Batch Jobs - Runs mass OpenAI operations through the Batch API.
+
+This module provides functions to:
+1. Write request JSONL files for resume re-parsing, persona generation and re-embedding
+2. Submit them to the OpenAI Batch API (or a local stub that calls the regular endpoints)
+3. Poll for completion and ingest the results idempotently into the database
+4. Keep a checkpoint per run so an interrupted backfill resumes where it stopped
+"""
+
+import os
+import json
+import time
+import logging
+from datetime import datetime
+from models import db, Candidate, Job, candidate_summary_options, job_preview_options
+from utils.resume_parser import (
+    extract_text_from_file, normalize_resume_data, RESUME_PARSER_MODEL, RESUME_PARSER_PROMPT,
+    RESUME_PARSER_MAX_TOKENS, EMBEDDING_MODEL
+)
+from utils.persona_generator import PERSONA_MODEL, build_persona_prompt, parse_persona_response
+from utils.http_clients import get_openai_client
+from utils.text_compaction import compact_text, compact_for_embedding
+
+logger = logging.getLogger(__name__)
+
+# The Batch API accepts at most 50,000 requests per input file
+MAX_REQUESTS_PER_BATCH = 50000
+DEFAULT_CHUNK_SIZE = 5000
+DEFAULT_POLL_INTERVAL = 30
+COMMIT_EVERY = 100
+TERMINAL_BATCH_STATES = {'completed', 'failed', 'expired', 'cancelled'}
+
+BATCH_KINDS = {
+    'resume_parse': {'endpoint': '/v1/chat/completions', 'model': 'candidate'},
+    'persona': {'endpoint': '/v1/chat/completions', 'model': 'candidate'},
+    'candidate_embedding': {'endpoint': '/v1/embeddings', 'model': 'candidate'},
+    'job_embedding': {'endpoint': '/v1/embeddings', 'model': 'job'},
+}
+
+def get_workdir():
+    """Directory where batch runs keep their request files and checkpoints"""
+    return os.environ.get('BATCH_WORKDIR', 'batch_jobs')
+
+def read_resume_text(candidate):
+    """
+    Read a candidate's stored resume file back into text
+
+    Args:
+        candidate: The Candidate object
+
+    Returns:
+        str: The extracted text, or an empty string if the file is not available locally
+    """
+    if not candidate.resume_file:
+        return ""
+
+    local_path = os.path.join('static', 'uploads', candidate.resume_file)
+    if not os.path.exists(local_path):
+        return ""
+
+    with open(local_path, 'rb') as f:
+        content = f.read()
+
+    file_type = os.path.splitext(candidate.resume_file)[1].lstrip('.').lower()
+    return extract_text_from_file(content, file_type)
+
+def _candidate_embedding_text(candidate):
+    """Text used to embed a candidate - the resume if we have it, else the parsed data"""
+    text = read_resume_text(candidate)
+    if text.strip():
+        return compact_for_embedding(text)
+
+    parsed_data = candidate.parsed_data or {}
+    skills = parsed_data.get('skills', [])
+    parts = [parsed_data.get('summary', '') or '']
+    if isinstance(skills, list):
+        parts.append(', '.join(str(s) for s in skills))
+    return compact_for_embedding('\n'.join(p for p in parts if p))
+
+def build_request(kind, target):
+    """
+    Build one Batch API request line for a target row
+
+    Args:
+        kind: One of BATCH_KINDS
+        target: The Candidate or Job the request is for
+
+    Returns:
+        dict: The request line, or None if the target has nothing to send
+    """
+    config = BATCH_KINDS[kind]
+    custom_id = f"{kind}:{config['model']}:{target.id}"
+
+    if kind == 'resume_parse':
+        text = read_resume_text(target)
+        if len(text.strip()) < 50:
+            return None
+        body = {
+            'model': RESUME_PARSER_MODEL,
+            'messages': [
+                {'role': 'system', 'content': RESUME_PARSER_PROMPT},
+                {'role': 'user', 'content': compact_text(text)}
+            ],
+            'response_format': {'type': 'json_object'},
+            'max_tokens': RESUME_PARSER_MAX_TOKENS
+        }
+    elif kind == 'persona':
+        if not target.parsed_data:
+            return None
+        body = {
+            'model': PERSONA_MODEL,
+            'messages': [{'role': 'user', 'content': build_persona_prompt(target.parsed_data)}],
+            'response_format': {'type': 'json_object'}
+        }
+    elif kind == 'candidate_embedding':
+        text = _candidate_embedding_text(target)
+        if not text:
+            return None
+        body = {'model': EMBEDDING_MODEL, 'input': text}
+    else:
+        if not target.description:
+            return None
+        body = {'model': EMBEDDING_MODEL, 'input': compact_for_embedding(target.description)}
+
+    return {
+        'custom_id': custom_id,
+        'method': 'POST',
+        'url': config['endpoint'],
+        'body': body
+    }
+
+def select_targets(kind, only_missing=True, limit=None):
+    """
+    Query the rows a backfill should cover
+
+    Args:
+        kind: One of BATCH_KINDS
+        only_missing: Only include rows whose target column is still empty
+        limit: Optional cap on the number of rows
+
+    Returns:
+        list: Candidate or Job objects ordered by id
+    """
+    if kind == 'job_embedding':
+        # Jobs without an embedding (every job unless only_missing is off); requests are
+        # built from the description
+        query = Job.query.options(*job_preview_options())
+        if only_missing:
+            query = query.filter(Job.embedding.is_(None))
+        query = query.order_by(Job.id)
+    else:
+        query = Candidate.query
+        if kind != 'resume_parse':
+            query = query.options(*candidate_summary_options())
+        if only_missing:
+            column = {
+                'resume_parse': Candidate.parsed_data,
+                'persona': Candidate.persona,
+                'candidate_embedding': Candidate.embedding,
+            }[kind]
+            query = query.filter(column.is_(None))
+        query = query.order_by(Candidate.id)
+
+    if limit:
+        query = query.limit(limit)
+    return query.all()
+
+def apply_result(kind, target_id, body, overwrite=True):
+    """
+    Write one successful response into the database
+
+    Applying the same response twice leaves the row unchanged, so a resumed
+    run can safely re-read part of an output file.
+
+    Args:
+        kind: One of BATCH_KINDS
+        target_id: The Candidate or Job id from the custom_id
+        body: The response body returned for the request
+        overwrite: Replace values that were filled in since the run started
+
+    Returns:
+        bool: True if the row was updated
+    """
+    if kind == 'job_embedding':
+        target = Job.query.get(target_id)
+    else:
+        target = Candidate.query.get(target_id)
+
+    if not target:
+        logger.warning(f"Batch result for missing {kind} target {target_id}")
+        return False
+
+    if kind == 'resume_parse':
+        if target.parsed_data and not overwrite:
+            return False
+        # Same key spellings as a synchronous parse (parse_resume_text)
+        target.parsed_data = normalize_resume_data(json.loads(body['choices'][0]['message']['content']))
+    elif kind == 'persona':
+        if target.persona and not overwrite:
+            return False
+        target.persona = parse_persona_response(body['choices'][0]['message']['content'])
+    else:
+        if target.embedding and not overwrite:
+            return False
+        target.embedding = body['data'][0]['embedding']
+
+    return True
+
+class LocalBatchStub:
+    """
+    Stand-in for the Batch API that runs each request through the regular
+    synchronous endpoints and writes the output file in the Batch API format.
+    Used for development and when a backfill is too small to wait 24h for.
+    """
+
+    def __init__(self, run_dir):
+        self.run_dir = run_dir
+
+    def submit(self, input_path, endpoint):
+        output_path = input_path.replace('requests-', 'output-')
+        error_path = input_path.replace('requests-', 'errors-')
+        counts = {'total': 0, 'completed': 0, 'failed': 0}
+
+        with open(input_path) as src, open(output_path, 'w') as out, open(error_path, 'w') as err:
+            for line in src:
+                request = json.loads(line)
+                counts['total'] += 1
+                try:
+                    if endpoint == '/v1/embeddings':
+                        response = get_openai_client().embeddings.create(**request['body'])
+                    else:
+                        response = get_openai_client().chat.completions.create(**request['body'])
+                    result = {
+                        'id': f"stub-{request['custom_id']}",
+                        'custom_id': request['custom_id'],
+                        'response': {'status_code': 200, 'body': response.model_dump()},
+                        'error': None
+                    }
+                    out.write(json.dumps(result) + '\n')
+                    counts['completed'] += 1
+                except Exception as e:
+                    result = {
+                        'id': f"stub-{request['custom_id']}",
+                        'custom_id': request['custom_id'],
+                        'response': None,
+                        'error': {'message': str(e)}
+                    }
+                    err.write(json.dumps(result) + '\n')
+                    counts['failed'] += 1
+
+        return {
+            'id': f"stub-{os.path.basename(input_path)}",
+            'input_file_id': None,
+            'status': 'completed',
+            'output_file': output_path,
+            'error_file': error_path,
+            'request_counts': counts
+        }
+
+class BatchRun:
+    """
+    One backfill run: its request files, submitted batches and ingestion progress.
+
+    State lives in <workdir>/<run_id>/checkpoint.json and is rewritten after
+    every step, so calling run() again with the same run_id picks up from the
+    last completed step.
+    """
+
+    def __init__(self, kind, run_id=None, workdir=None, use_stub=False,
+                 chunk_size=DEFAULT_CHUNK_SIZE, poll_interval=DEFAULT_POLL_INTERVAL,
+                 only_missing=True, overwrite=None, limit=None):
+        if kind not in BATCH_KINDS:
+            raise ValueError(f"Unknown batch kind: {kind}")
+
+        self.kind = kind
+        self.run_id = run_id or f"{kind}-{datetime.utcnow().strftime('%Y%m%d%H%M%S')}"
+        self.run_dir = os.path.join(workdir or get_workdir(), self.run_id)
+        self.checkpoint_path = os.path.join(self.run_dir, 'checkpoint.json')
+        self.poll_interval = poll_interval
+        self.stub = LocalBatchStub(self.run_dir) if use_stub else None
+        os.makedirs(self.run_dir, exist_ok=True)
+
+        self.state = self._load_checkpoint() or {
+            'run_id': self.run_id,
+            'kind': kind,
+            'use_stub': use_stub,
+            'chunk_size': min(chunk_size, MAX_REQUESTS_PER_BATCH),
+            'only_missing': only_missing,
+            # Persona backfills fill gaps; re-parse and re-embed runs replace values
+            'overwrite': (kind != 'persona') if overwrite is None else overwrite,
+            'limit': limit,
+            'created_at': datetime.utcnow().isoformat(),
+            'chunks': [],
+            'prepared': False,
+            'timings': {},
+            'usage_tokens': 0
+        }
+
+        # A resumed run keeps the mode it was started with
+        if self.state.get('use_stub') and not self.stub:
+            self.stub = LocalBatchStub(self.run_dir)
+
+    def _load_checkpoint(self):
+        if not os.path.exists(self.checkpoint_path):
+            return None
+        with open(self.checkpoint_path) as f:
+            return json.load(f)
+
+    def save_checkpoint(self):
+        tmp_path = self.checkpoint_path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(self.state, f, indent=2)
+        os.replace(tmp_path, self.checkpoint_path)
+
+    def _time_phase(self, phase, started):
+        self.state['timings'][phase] = self.state['timings'].get(phase, 0) + (time.time() - started)
+
+    def prepare(self):
+        """Write the request JSONL files"""
+        if self.state['prepared']:
+            return
+
+        started = time.time()
+        targets = select_targets(self.kind, self.state['only_missing'], self.state['limit'])
+        chunk_size = self.state['chunk_size']
+
+        lines = []
+        for target in targets:
+            request = build_request(self.kind, target)
+            if request:
+                lines.append(json.dumps(request))
+
+        for index in range(0, len(lines), chunk_size):
+            chunk_lines = lines[index:index + chunk_size]
+            path = os.path.join(self.run_dir, f"requests-{len(self.state['chunks']) + 1:04d}.jsonl")
+            with open(path, 'w') as f:
+                f.write('\n'.join(chunk_lines) + '\n')
+            self.state['chunks'].append({
+                'input_path': path,
+                'request_count': len(chunk_lines),
+                'status': 'written',
+                'batch_id': None,
+                'ingested_lines': 0,
+                'ingested': 0,
+                'failed': 0
+            })
+
+        self.state['prepared'] = True
+        self._time_phase('prepare', started)
+        self.save_checkpoint()
+        logger.info(f"Batch run {self.run_id}: wrote {len(lines)} requests in {len(self.state['chunks'])} files")
+
+    def submit(self):
+        """Submit every written chunk that has no batch yet"""
+        started = time.time()
+        endpoint = BATCH_KINDS[self.kind]['endpoint']
+
+        for chunk in self.state['chunks']:
+            if chunk['batch_id']:
+                continue
+
+            if self.stub:
+                batch = self.stub.submit(chunk['input_path'], endpoint)
+                chunk.update({
+                    'batch_id': batch['id'],
+                    'status': batch['status'],
+                    'output_path': batch['output_file'],
+                    'error_path': batch['error_file'],
+                    'request_counts': batch['request_counts']
+                })
+            else:
+                with open(chunk['input_path'], 'rb') as f:
+                    input_file = get_openai_client().files.create(file=f, purpose='batch')
+                batch = get_openai_client().batches.create(
+                    input_file_id=input_file.id,
+                    endpoint=endpoint,
+                    completion_window='24h',
+                    metadata={'run_id': self.run_id, 'kind': self.kind}
+                )
+                chunk.update({'batch_id': batch.id, 'status': batch.status})
+
+            logger.info(f"Batch run {self.run_id}: submitted {chunk['input_path']} as {chunk['batch_id']}")
+            self.save_checkpoint()
+
+        self._time_phase('submit', started)
+        self.save_checkpoint()
+
+    def poll(self):
+        """Wait until every submitted batch reaches a terminal state"""
+        started = time.time()
+
+        while True:
+            pending = [c for c in self.state['chunks'] if c['status'] not in TERMINAL_BATCH_STATES]
+            if not pending:
+                break
+
+            for chunk in pending:
+                batch = get_openai_client().batches.retrieve(chunk['batch_id'])
+                chunk['status'] = batch.status
+                if batch.request_counts:
+                    chunk['request_counts'] = batch.request_counts.model_dump()
+                if batch.status in TERMINAL_BATCH_STATES:
+                    chunk['output_file_id'] = batch.output_file_id
+                    chunk['error_file_id'] = batch.error_file_id
+                    logger.info(f"Batch {chunk['batch_id']} finished with status {batch.status}")
+
+            self.save_checkpoint()
+
+            if any(c['status'] not in TERMINAL_BATCH_STATES for c in self.state['chunks']):
+                time.sleep(self.poll_interval)
+
+        self._time_phase('poll', started)
+        self.save_checkpoint()
+
+    def _download_file(self, chunk, file_id_key, path_key, prefix):
+        """Fetch one of a finished batch's files into the run directory, once"""
+        if chunk.get(path_key) and os.path.exists(chunk[path_key]):
+            return chunk[path_key]
+
+        if not chunk.get(file_id_key):
+            return None
+
+        path = chunk['input_path'].replace('requests-', prefix)
+        content = get_openai_client().files.content(chunk[file_id_key])
+        with open(path, 'wb') as f:
+            f.write(content.content)
+
+        chunk[path_key] = path
+        self.save_checkpoint()
+        return path
+
+    def _download(self, chunk):
+        """
+        Fetch a finished batch's output and error files
+
+        Returns:
+            tuple: (output path, error path), either None if the batch has no such file
+        """
+        return (self._download_file(chunk, 'output_file_id', 'output_path', 'output-'),
+                self._download_file(chunk, 'error_file_id', 'error_path', 'errors-'))
+
+    def _count_errors(self, chunk, error_path):
+        """Count the requests in a batch's error file as failed; they get no output line"""
+        with open(error_path) as f:
+            for line_number, line in enumerate(f):
+                if line_number < chunk.get('error_lines', 0) or not line.strip():
+                    continue
+
+                result = json.loads(line)
+                response = result.get('response') or {}
+                error = result.get('error') or (response.get('body') or {}).get('error') or f"status {response.get('status_code')}"
+                logger.error(f"Batch request {result.get('custom_id')} failed: {error}")
+                chunk['failed'] += 1
+                chunk['error_lines'] = line_number + 1
+
+    def ingest(self):
+        """Apply every result line that has not been ingested yet"""
+        started = time.time()
+
+        for chunk in self.state['chunks']:
+            if chunk['status'] == 'ingested':
+                continue
+
+            output_path, error_path = self._download(chunk)
+            if not output_path and not error_path:
+                logger.warning(f"Batch {chunk['batch_id']} has no output or error file (status {chunk['status']})")
+                continue
+
+            if error_path:
+                self._count_errors(chunk, error_path)
+                self.save_checkpoint()
+            if not output_path:
+                chunk['status'] = 'ingested'
+                self.save_checkpoint()
+                continue
+
+            with open(output_path) as f:
+                for line_number, line in enumerate(f):
+                    if line_number < chunk['ingested_lines'] or not line.strip():
+                        continue
+
+                    result = json.loads(line)
+                    response = result.get('response') or {}
+                    try:
+                        if result.get('error') or response.get('status_code') != 200:
+                            raise ValueError(result.get('error') or f"status {response.get('status_code')}")
+
+                        kind, _, target_id = result['custom_id'].split(':')
+                        body = response['body']
+                        self.state['usage_tokens'] += (body.get('usage') or {}).get('total_tokens', 0)
+                        if apply_result(kind, int(target_id), body, self.state['overwrite']):
+                            chunk['ingested'] += 1
+                    except Exception as e:
+                        logger.error(f"Failed to ingest {result.get('custom_id')}: {str(e)}")
+                        chunk['failed'] += 1
+
+                    chunk['ingested_lines'] = line_number + 1
+                    if chunk['ingested_lines'] % COMMIT_EVERY == 0:
+                        db.session.commit()
+                        self.save_checkpoint()
+
+            db.session.commit()
+            chunk['status'] = 'ingested'
+            self.save_checkpoint()
+
+        self._time_phase('ingest', started)
+        self.save_checkpoint()
+
+    def run(self):
+        """Run (or resume) every phase and return the throughput report"""
+        self.prepare()
+        self.submit()
+        if not self.stub:
+            self.poll()
+        self.ingest()
+        return self.report()
+
+    def report(self):
+        """
+        Summarize the run
+
+        Returns:
+            dict: Request counts, ingest results, phase timings and throughput
+        """
+        chunks = self.state['chunks']
+        requests_total = sum(c['request_count'] for c in chunks)
+        ingested = sum(c['ingested'] for c in chunks)
+        failed = sum(c['failed'] for c in chunks)
+        timings = self.state['timings']
+        elapsed = sum(timings.values())
+
+        return {
+            'run_id': self.run_id,
+            'kind': self.kind,
+            'batches': len(chunks),
+            'requests': requests_total,
+            'ingested': ingested,
+            'failed': failed,
+            'usage_tokens': self.state['usage_tokens'],
+            'timings': {phase: round(seconds, 2) for phase, seconds in timings.items()},
+            'elapsed_seconds': round(elapsed, 2),
+            'requests_per_second': round(requests_total / elapsed, 2) if elapsed else 0.0,
+            'ingested_per_second': round(ingested / timings['ingest'], 2) if timings.get('ingest') else 0.0
+        }
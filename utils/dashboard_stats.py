@@ -0,0 +1,206 @@
+"""
+Dashboard Stats - Per-recruiter dashboard statistics from a single query, cached.
+
+This module provides functions to:
+1. Read match counts and average match scores for every job a recruiter owns from job_match_stats in one query
+2. Cache the result per recruiter, serving a stale copy while it is refreshed in the background
+3. Invalidate cached statistics when matches change, in every process through shared
+   generation counters in cache_generations (one for everyone, one per recruiter)
+"""
+
+import os
+import time
+import logging
+import threading
+from sqlalchemy import func, select, update, insert
+from sqlalchemy.exc import IntegrityError
+from models import db, Job, Candidate, JobMatchStats, CacheGeneration
+
+logger = logging.getLogger(__name__)
+
+# Statistics younger than this are served as they are
+DASHBOARD_STATS_TTL = float(os.environ.get('DASHBOARD_STATS_TTL', 30))
+# Older statistics, up to this age, are served while a fresh copy is computed in the
+# background. Match changes in any process (web or worker.py) bump a shared generation,
+# which every process compares before serving a cached copy, so they show up at once.
+DASHBOARD_STATS_MAX_STALE = float(os.environ.get('DASHBOARD_STATS_MAX_STALE', 300))
+# Name of the dashboard statistics' row in cache_generations, bumped when every recruiter's
+# statistics change; each recruiter's own row is named '<GENERATION_NAME>:<recruiter_id>'
+GENERATION_NAME = 'dashboard_stats'
+
+_lock = threading.Lock()
+# recruiter_id -> {'stats': ..., 'computed_at': ..., 'generation': ..., 'shared_generation': ...}
+_cache = {}
+_refreshing = set()
+# Bumped on invalidation, so a computation that started before it is not cached
+_generation = {'value': 0}
+_metrics = {'hits': 0, 'stale_hits': 0, 'misses': 0}
+
+def compute_dashboard_stats(recruiter_id):
+    """
+    Compute a recruiter's dashboard statistics with one query over the
+    per-job aggregates in job_match_stats
+
+    Args:
+        recruiter_id: The recruiter
+
+    Returns:
+        dict: total_candidates, and per job id its applications (match count)
+              and match_score (average score as a whole percentage)
+    """
+    total_candidates = select(func.count(Candidate.id)).scalar_subquery()
+    rows = db.session.execute(
+        select(Job.id, func.coalesce(JobMatchStats.match_count, 0), JobMatchStats.score_sum, total_candidates)
+        .select_from(Job)
+        .outerjoin(JobMatchStats, JobMatchStats.job_id == Job.id)
+        .where(Job.recruiter_id == recruiter_id)
+    ).all()
+
+    if rows:
+        candidate_count = rows[0][3]
+    else:
+        # No jobs, so no row to carry the candidate count
+        candidate_count = db.session.execute(select(func.count(Candidate.id))).scalar()
+
+    return {
+        'total_candidates': candidate_count or 0,
+        'jobs': {
+            job_id: {
+                'applications': applications,
+                'match_score': round(score_sum / applications * 100) if applications else 0
+            }
+            for job_id, applications, score_sum, _ in rows
+        }
+    }
+
+def _generation_name(recruiter_id):
+    return f"{GENERATION_NAME}:{recruiter_id}"
+
+def _shared_generation(recruiter_id):
+    """
+    The shared generations of a recruiter's dashboard statistics (one query by primary key)
+
+    Returns:
+        tuple: The generation for everyone and the recruiter's own, each 0 before its
+               first invalidation, or None if they could not be read
+    """
+    names = (GENERATION_NAME, _generation_name(recruiter_id))
+    try:
+        generations = dict(db.session.execute(
+            select(CacheGeneration.name, CacheGeneration.generation).where(CacheGeneration.name.in_(names))
+        ).all())
+        return tuple(generations.get(name) or 0 for name in names)
+    except Exception as e:
+        logger.error(f"Error reading dashboard stats generation: {str(e)}")
+        db.session.rollback()
+        return None
+
+def _store(recruiter_id, stats, generation, shared_generation):
+    with _lock:
+        if generation == _generation['value']:
+            _cache[recruiter_id] = {'stats': stats, 'computed_at': time.time(), 'generation': generation,
+                                    'shared_generation': shared_generation}
+
+def _refresh_in_background(app, recruiter_id):
+    """Recompute one recruiter's statistics, at most one refresh per recruiter at a time"""
+    with _lock:
+        if recruiter_id in _refreshing:
+            return
+        _refreshing.add(recruiter_id)
+        generation = _generation['value']
+
+    def refresh():
+        try:
+            with app.app_context():
+                try:
+                    shared_generation = _shared_generation(recruiter_id)
+                    _store(recruiter_id, compute_dashboard_stats(recruiter_id), generation, shared_generation)
+                finally:
+                    db.session.remove()
+        except Exception as e:
+            logger.error(f"Error refreshing dashboard stats for recruiter {recruiter_id}: {str(e)}")
+        finally:
+            with _lock:
+                _refreshing.discard(recruiter_id)
+
+    threading.Thread(target=refresh, name=f"dashboard-stats-{recruiter_id}", daemon=True).start()
+
+def get_dashboard_stats(app, recruiter_id):
+    """
+    Get a recruiter's dashboard statistics, from the cache when possible
+
+    Args:
+        app: The Flask application (background refreshes need its app context)
+        recruiter_id: The recruiter
+
+    Returns:
+        dict: See compute_dashboard_stats
+    """
+    # Read before computing, so an invalidation during the computation is noticed next time
+    shared_generation = _shared_generation(recruiter_id)
+    with _lock:
+        entry = _cache.get(recruiter_id)
+        if entry and (shared_generation is None or entry['shared_generation'] != shared_generation):
+            # Another process changed matches since this copy was computed
+            entry = None
+        age = time.time() - entry['computed_at'] if entry else None
+        generation = _generation['value']
+
+    if entry and age < DASHBOARD_STATS_TTL:
+        _metrics['hits'] += 1
+        return entry['stats']
+    if entry and age < DASHBOARD_STATS_MAX_STALE:
+        _metrics['stale_hits'] += 1
+        _refresh_in_background(app, recruiter_id)
+        return entry['stats']
+
+    _metrics['misses'] += 1
+    stats = compute_dashboard_stats(recruiter_id)
+    if shared_generation is not None:
+        _store(recruiter_id, stats, generation, shared_generation)
+    return stats
+
+def _bump_shared_generation(name):
+    """Bump a shared generation in its own transaction, so other processes drop their copies"""
+    try:
+        with db.engine.begin() as conn:
+            bumped = conn.execute(
+                update(CacheGeneration).where(CacheGeneration.name == name)
+                .values(generation=CacheGeneration.generation + 1)
+            ).rowcount
+            if not bumped:
+                conn.execute(insert(CacheGeneration).values(name=name, generation=1))
+    except IntegrityError:
+        # Another process created the row first; its bump is just as good
+        pass
+    except Exception as e:
+        logger.error(f"Error bumping dashboard stats generation {name}: {str(e)}")
+
+def invalidate_dashboard_stats(recruiter_ids=None):
+    """
+    Drop cached statistics after matches change, here and in other processes
+
+    Call it after the changed matches are committed. This process drops the
+    given recruiters' copies; other processes see the recruiters' bumped shared
+    generations and drop theirs too. Without recruiter_ids, every copy is dropped.
+
+    Args:
+        recruiter_ids: Recruiters whose jobs' matches changed (default: everyone)
+    """
+    with _lock:
+        _generation['value'] += 1
+        if recruiter_ids is None:
+            _cache.clear()
+        else:
+            for recruiter_id in recruiter_ids:
+                _cache.pop(recruiter_id, None)
+    if recruiter_ids is None:
+        _bump_shared_generation(GENERATION_NAME)
+    else:
+        for recruiter_id in set(recruiter_ids):
+            _bump_shared_generation(_generation_name(recruiter_id))
+
+def get_dashboard_stats_metrics():
+    """Cache hit, stale-hit and miss counts for this process"""
+    with _lock:
+        return dict(_metrics, cached_recruiters=len(_cache))
@@ -0,0 +1,124 @@
+"""
+DB Routing - Send the reads of read-only pages to a database replica.
+
+This module provides functions to:
+1. Route plain SELECTs of requests marked with replica_reads to the 'replica' bind, and everything else to the primary
+2. Switch a request back to the primary once it writes, so it reads its own writes
+3. Keep a browser on the primary for REPLICA_STICKY_SECONDS after its writes, while the replica catches up
+4. Send a request's reads to the primary from the point where they decide whether to write
+5. Count the reads each database served
+"""
+
+import os
+import time
+import logging
+import threading
+from functools import wraps
+from flask import g, request, current_app, has_request_context
+from flask_sqlalchemy.session import Session
+from sqlalchemy.sql import Select
+
+logger = logging.getLogger(__name__)
+
+# Bind key of the replica in SQLALCHEMY_BINDS
+REPLICA_BIND = 'replica'
+# How long a browser reads from the primary after its own writes; set above the replica's lag
+REPLICA_STICKY_SECONDS = float(os.environ.get('REPLICA_STICKY_SECONDS', 10))
+STICKY_COOKIE = 'db_primary_until'
+
+_lock = threading.Lock()
+_metrics = {'replica_reads': 0, 'primary_reads': 0, 'sticky_requests': 0, 'writing_requests': 0}
+
+def _count(name):
+    with _lock:
+        _metrics[name] += 1
+
+def _is_read(clause):
+    """True for SELECTs that may run on a replica (not SELECT ... FOR UPDATE)"""
+    return isinstance(clause, Select) and clause._for_update_arg is None
+
+class RoutingSession(Session):
+    """
+    Session that reads from the replica during replica_reads requests
+
+    Flushes, INSERT/UPDATE/DELETE statements, locking SELECTs and text SQL go to
+    the primary and mark the request as having written; later reads in that
+    request then go to the primary too.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and has_request_context():
+            if self._flushing or not _is_read(clause):
+                if not g.get('db_wrote'):
+                    g.db_wrote = True
+                    _count('writing_requests')
+            elif g.get('db_replica') and not g.get('db_wrote') and not g.get('db_primary'):
+                engine = self._db.engines.get(REPLICA_BIND)
+                if engine is not None:
+                    _count('replica_reads')
+                    return engine
+            elif g.get('db_replica'):
+                _count('primary_reads')
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+def replica_configured(app=None):
+    """True if SQLALCHEMY_BINDS has a replica"""
+    app = app or current_app
+    return REPLICA_BIND in app.config.get('SQLALCHEMY_BINDS', {})
+
+def replica_reads(f):
+    """
+    Let a GET endpoint read from the replica, unless this browser wrote recently
+
+    Apply it below recruiter_required, so sessions and recruiters are always
+    looked up on the primary.
+    """
+    @wraps(f)
+    def wrapper(*args, **kwargs):
+        if request.method in ('GET', 'HEAD') and replica_configured():
+            if request.cookies.get(STICKY_COOKIE, type=float, default=0) > time.time():
+                _count('sticky_requests')
+            else:
+                g.db_replica = True
+        return f(*args, **kwargs)
+    return wrapper
+
+def read_from_primary():
+    """
+    Send the rest of this request's reads to the primary
+
+    For reads that decide whether to write, such as whether a job is already
+    queued, which a lagging replica would answer from before the latest commits.
+    Unlike a write, this does not keep the browser on the primary afterwards.
+
+    Returns:
+        bool: True if the request was reading from the replica until now
+    """
+    if not has_request_context() or not g.get('db_replica') or g.get('db_wrote') or g.get('db_primary'):
+        return False
+    g.db_primary = True
+    return True
+
+def init_db_routing(app):
+    """
+    Set the sticky cookie on responses to requests that wrote
+
+    Args:
+        app: The Flask application
+    """
+    if not replica_configured(app):
+        return
+
+    @app.after_request
+    def stick_to_primary(response):
+        if g.get('db_wrote'):
+            response.set_cookie(STICKY_COOKIE, f"{time.time() + REPLICA_STICKY_SECONDS:.3f}",
+                                max_age=int(REPLICA_STICKY_SECONDS) + 1, httponly=True, samesite='Lax')
+        return response
+
+    logger.info(f"Read-only pages read from the replica; writers stay on the primary for {REPLICA_STICKY_SECONDS}s")
+
+def get_routing_metrics():
+    """Reads each database served in replica_reads requests, sticky requests and requests that wrote"""
+    with _lock:
+        return dict(_metrics)
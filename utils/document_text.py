@@ -0,0 +1,213 @@
+"""
+Document Text - Extracts plain text from uploaded resumes.
+
+This module provides functions to:
+1. Detect the real type of an upload (PDF, DOCX, image or text) from its bytes
+2. Read the embedded text layer of PDFs page by page, rendering and OCRing only pages without one
+3. Read DOCX paragraphs (headers included) straight from the document XML
+4. OCR images through the OCR process pool
+"""
+
+import os
+import logging
+import zipfile
+import threading
+from io import BytesIO
+import xml.etree.ElementTree as ET
+from PIL import Image
+from utils.ocr_service import ocr_image, ocr_page_texts, OCR_MAX_PAGES
+
+try:
+    import pypdfium2 as pdfium
+except ImportError:
+    pdfium = None
+
+logger = logging.getLogger(__name__)
+
+# A PDF page with fewer characters than this in its text layer is treated as a scan
+PDF_MIN_TEXT_CHARS = int(os.environ.get('PDF_MIN_TEXT_CHARS', 20))
+# Resolution scanned PDF pages are rendered at before OCR
+PDF_OCR_DPI = int(os.environ.get('PDF_OCR_DPI', 300))
+
+WORD_NS = '{http://schemas.openxmlformats.org/wordprocessingml/2006/main}'
+# Word stores text boxes twice (modern and legacy markup); only the modern copy is read
+MC_FALLBACK = '{http://schemas.openxmlformats.org/markup-compatibility/2006}Fallback'
+
+# PDFium is not thread-safe and the queue runs several workers per process
+_pdfium_lock = threading.Lock()
+
+class UnreadableDocumentError(Exception):
+    """Raised when an upload is corrupt, encrypted or of a type that cannot be read"""
+
+def detect_file_type(content):
+    """
+    Detect a file's type from its contents rather than its name
+
+    Args:
+        content: Raw file bytes
+
+    Returns:
+        str: 'pdf', 'docx', 'image' or 'text'
+    """
+    if b'%PDF-' in content[:1024]:
+        return 'pdf'
+
+    if content[:4] == b'PK\x03\x04':
+        try:
+            with zipfile.ZipFile(BytesIO(content)) as archive:
+                if 'word/document.xml' in archive.namelist():
+                    return 'docx'
+        except zipfile.BadZipFile:
+            pass
+
+    try:
+        Image.open(BytesIO(content))
+        return 'image'
+    except Exception:
+        return 'text'
+
+def _render_page(page):
+    """Render a PDF page to PNG bytes for OCR"""
+    image = page.render(scale=PDF_OCR_DPI / 72).to_pil()
+    buffer = BytesIO()
+    image.save(buffer, format='PNG')
+    return buffer.getvalue()
+
+def extract_pdf_text(content):
+    """
+    Extract text from a PDF, one page at a time
+
+    Pages with a text layer are read directly. Pages without one (scans) are
+    rendered and OCRed in parallel once all pages have been read.
+
+    Args:
+        content: Raw PDF bytes
+
+    Returns:
+        tuple: (text, page_count, ocr_page_count)
+    """
+    if pdfium is None:
+        raise UnreadableDocumentError("PDF support requires the pypdfium2 package")
+
+    texts = []
+    scans = {}
+    with _pdfium_lock:
+        try:
+            pdf = pdfium.PdfDocument(content)
+        except pdfium.PdfiumError as e:
+            raise UnreadableDocumentError(f"Could not open PDF: {str(e)}")
+
+        try:
+            page_count = len(pdf)
+            for index in range(page_count):
+                page = pdf[index]
+                try:
+                    textpage = page.get_textpage()
+                    text = textpage.get_text_range().replace('\r\n', '\n')
+                    textpage.close()
+
+                    if len(text.strip()) >= PDF_MIN_TEXT_CHARS:
+                        texts.append(text.strip())
+                    elif len(scans) < OCR_MAX_PAGES:
+                        texts.append(None)
+                        scans[index] = _render_page(page)
+                    else:
+                        logger.warning(f"Skipping OCR of page {index + 1}; OCR_MAX_PAGES reached")
+                finally:
+                    page.close()
+        finally:
+            pdf.close()
+
+    if scans:
+        # OCR outside the lock so other workers can keep reading PDFs
+        ocr_texts = iter(ocr_page_texts(list(scans.values())))
+        texts = [text if text is not None else next(ocr_texts) for text in texts]
+
+    return '\n\n'.join(text for text in texts if text), page_count, len(scans)
+
+def _docx_part_lines(stream):
+    """Yield the paragraphs of one DOCX XML part, streaming through the XML"""
+    parts = []
+    fallback_depth = 0
+    for event, element in ET.iterparse(stream, events=('start', 'end')):
+        if element.tag == MC_FALLBACK:
+            fallback_depth += 1 if event == 'start' else -1
+            continue
+        if event == 'start' or fallback_depth:
+            continue
+
+        if element.tag == WORD_NS + 't':
+            parts.append(element.text or '')
+        elif element.tag == WORD_NS + 'tab':
+            parts.append('\t')
+        elif element.tag in (WORD_NS + 'br', WORD_NS + 'cr'):
+            parts.append('\n')
+        elif element.tag == WORD_NS + 'p':
+            line = ''.join(parts).strip()
+            parts = []
+            if line:
+                yield line
+            element.clear()
+
+def extract_docx_text(content):
+    """
+    Extract text from a DOCX file: page headers first, then the body
+
+    Args:
+        content: Raw DOCX bytes
+
+    Returns:
+        str: One line per paragraph
+    """
+    try:
+        with zipfile.ZipFile(BytesIO(content)) as archive:
+            names = archive.namelist()
+            # Names and contact details are often in the page header
+            xml_parts = sorted(name for name in names if name.startswith('word/header') and name.endswith('.xml'))
+            xml_parts.append('word/document.xml')
+
+            lines = []
+            for name in xml_parts:
+                is_header = name != 'word/document.xml'
+                with archive.open(name) as stream:
+                    for line in _docx_part_lines(stream):
+                        # Headers repeat per section
+                        if is_header and line in lines:
+                            continue
+                        lines.append(line)
+    except (zipfile.BadZipFile, KeyError, ET.ParseError) as e:
+        raise UnreadableDocumentError(f"Could not read DOCX: {str(e)}")
+
+    return '\n'.join(lines)
+
+def extract_document_text(content):
+    """
+    Extract text from an uploaded resume of any supported type
+
+    Args:
+        content: Raw file bytes
+
+    Returns:
+        tuple: (text, method) where method is 'pdf_text', 'pdf_ocr', 'pdf_mixed',
+               'docx', 'ocr' or 'text'
+    """
+    file_type = detect_file_type(content)
+
+    if file_type == 'pdf':
+        text, page_count, ocr_pages = extract_pdf_text(content)
+        if not ocr_pages:
+            method = 'pdf_text'
+        elif ocr_pages == page_count:
+            method = 'pdf_ocr'
+        else:
+            method = 'pdf_mixed'
+        logger.debug(f"Extracted PDF text from {page_count} pages ({ocr_pages} OCRed)")
+        return text, method
+
+    if file_type == 'docx':
+        return extract_docx_text(content), 'docx'
+
+    if file_type == 'image':
+        return ocr_image(content) or '', 'ocr'
+
+    return content.decode('utf-8', errors='ignore'), 'text'
@@ -1,6 +1,6 @@
 import os
 import logging
-import requests
+from utils.http_clients import get_http_session
 
 logger = logging.getLogger(__name__)
 
@@ -38,8 +38,8 @@ def send_email(to_email, subject, html_content, from_email="AI Recruiter <no-rep
             "html": html_content
         }
         
-        # Make the API request
-        response = requests.post(
+        # Make the API request over the pooled Mailgun session
+        response = get_http_session('mailgun').post(
             url,
             auth=("api", api_key),
             data=data
@@ -0,0 +1,359 @@
+"""
+Heuristic Parser - Parses resumes locally without calling OpenAI.
+
+This module provides functions to:
+1. Extract contact details, section headers, job titles, dates, education and skills
+2. Produce resume data in the same shape as the OpenAI resume parser
+3. Score how confident the local parse is, so only unclear resumes are sent to the LLM
+"""
+
+import os
+import re
+import logging
+from utils.text_compaction import normalize_text, SECTION_HEADERS
+
+logger = logging.getLogger(__name__)
+
+# Resumes scoring below this are escalated to OpenAI
+HEURISTIC_PARSE_THRESHOLD = float(os.environ.get('HEURISTIC_PARSE_THRESHOLD', 0.75))
+
+# Common programming languages and technologies
+TECH_SKILLS = [
+    "Python", "Java", "JavaScript", "HTML", "CSS", "SQL", "C++", "C#", "Ruby",
+    "PHP", "Swift", "Go", "Rust", "TypeScript", "React", "Angular", "Vue",
+    "Node.js", "Django", "Flask", "Rails", "Spring", "ASP.NET", "Laravel",
+    "AWS", "Azure", "GCP", "Docker", "Kubernetes", "Git", "GitHub", "CI/CD",
+    "TensorFlow", "PyTorch", "Machine Learning", "AI", "Data Science",
+    "Agile", "Scrum", "DevOps", "Microservices", "RESTful API", "GraphQL"
+]
+
+# Soft skills
+SOFT_SKILLS = [
+    "Communication", "Teamwork", "Leadership", "Problem Solving",
+    "Critical Thinking", "Time Management", "Adaptability", "Creativity",
+    "Project Management", "Customer Service", "Presentation", "Negotiation"
+]
+
+EMAIL_PATTERN = re.compile(r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b')
+PHONE_PATTERN = re.compile(r'(?<![\w+])\+?\(?\d[\d\s().-]{8,18}\d(?!\w)')
+
+MONTH = r'(?:jan|feb|mar|apr|may|jun|jul|aug|sep|sept|oct|nov|dec)[a-z]*\.?'
+DATE = rf"(?:{MONTH}\s*[’']?\s*\d{{2,4}}|\d{{1,2}}\s*/\s*\d{{2,4}}|(?:19|20)\d{{2}})"
+DATE_RANGE = re.compile(
+    rf"({DATE})\s*(?:-|–|—|to|till|until)\s*({DATE}|present|current|now|till\s+date|date)",
+    re.IGNORECASE
+)
+YEAR = re.compile(r'\b(?:19|20)\d{2}\b')
+
+TITLE_KEYWORDS = re.compile(
+    r'\b(engineer|developer|manager|analyst|consultant|lead|architect|designer|intern|'
+    r'specialist|administrator|scientist|director|officer|associate|tester|executive|'
+    r'coordinator|head|programmer|president|technician|supervisor|accountant|recruiter|'
+    r'trainee|owner|founder)s?\b',
+    re.IGNORECASE
+)
+DEGREE_PATTERN = re.compile(
+    r"\b(ph\.?\s?d|doctorate|m\.?\s?tech|b\.?\s?tech|m\.?\s?sc|b\.?\s?sc|mba|bba|mca|bca|m\.?\s?com|b\.?\s?com|"
+    r"master'?s?|bachelor'?s?|associate\s+degree|diploma|high\s+school|higher\s+secondary|ssc|hsc|12th|10th)",
+    re.IGNORECASE
+)
+# Two-letter degrees are only trusted in capitals, so "be" or "I'm a" do not count
+SHORT_DEGREE_PATTERN = re.compile(r"\b([BM]\.\s?[AES]\.?|[BM][AE]|MS)(?![\w])")
+INSTITUTION_PATTERN = re.compile(
+    r'\b(university|college|institute|school|academy|polytechnic|iit|nit)\b',
+    re.IGNORECASE
+)
+FIELD_PATTERN = re.compile(r'\b(?:in|of)\s+([A-Z][\w&/ ]{2,60}?)(?=\s*(?:[,|(–—-]|\bfrom\b|\bat\b|$))')
+
+# Canonical section names and the words that identify their headers
+SECTION_KEYWORDS = [
+    ('summary', ('summary', 'profile', 'objective', 'about me')),
+    ('experience', ('experience', 'employment', 'work history', 'career history')),
+    ('education', ('education', 'academic', 'qualification')),
+    ('skills', ('skills', 'competencies', 'expertise', 'technologies', 'tools')),
+    ('projects', ('projects',)),
+    ('certifications', ('certification', 'training', 'courses')),
+]
+
+SKILL_SEPARATORS = re.compile(r'[,;|•·▪●]|\s{2,}|\t')
+
+def extract_skills_from_text(text):
+    """
+    Find the known skills mentioned in a piece of text
+
+    Args:
+        text: Resume or job text
+
+    Returns:
+        list: Skills from TECH_SKILLS and SOFT_SKILLS that appear in the text
+    """
+    found_skills = []
+    for skill in TECH_SKILLS + SOFT_SKILLS:
+        # Match whole words so "Go" and "AI" are not found inside other words
+        if re.search(rf'(?<![\w+#.-]){re.escape(skill)}(?![\w+#-])', text or '', re.IGNORECASE):
+            found_skills.append(skill)
+
+    return found_skills
+
+def extract_email(text):
+    """Return the first email address in the text, or None"""
+    match = EMAIL_PATTERN.search(text or '')
+    return match.group(0) if match else None
+
+def extract_phone(text):
+    """Return the first phone-number-like string in the text, or None"""
+    for match in PHONE_PATTERN.finditer(text or ''):
+        candidate = match.group(0).strip()
+        digits = re.sub(r'\D', '', candidate)
+        # Skip date ranges such as "2015 - 2019" and other short digit runs
+        if 10 <= len(digits) <= 15 and not DATE_RANGE.search(candidate):
+            return candidate
+    return None
+
+def extract_name(lines):
+    """Guess the candidate name from the first lines of the contact block"""
+    for line in lines[:5]:
+        words = line.split()
+        if (2 <= len(words) <= 4 and not re.search(r'[\d@|:/]', line)
+                and all(word[0].isupper() for word in words if word[0].isalpha())
+                and not TITLE_KEYWORDS.search(line) and not section_for(line)):
+            return line.title() if line.isupper() else line
+    return None
+
+def section_for(line):
+    """
+    Classify a line as a section header
+
+    Args:
+        line: A cleaned resume line
+
+    Returns:
+        str: The canonical section name, or None if the line is not a header
+    """
+    header = line.split(':', 1)[0].strip()
+    if not header or len(header) > 40 or re.search(r'[\d@]', header):
+        return None
+    if not (SECTION_HEADERS.match(header) or header.isupper() or len(header.split()) <= 3):
+        return None
+
+    lowered = header.lower()
+    for name, keywords in SECTION_KEYWORDS:
+        if any(keyword in lowered for keyword in keywords):
+            return name
+    return None
+
+def split_sections(lines):
+    """
+    Group lines under the canonical section they belong to
+
+    Args:
+        lines: List of cleaned lines
+
+    Returns:
+        dict: Section name to list of lines; 'header' holds the lines before the first section
+    """
+    sections = {'header': []}
+    current = 'header'
+    for line in lines:
+        name = section_for(line)
+        if name:
+            current = name
+            sections.setdefault(current, [])
+            # "Skills: Python, Java" keeps the inline content
+            inline = line.split(':', 1)[1].strip() if ':' in line else ''
+            if inline:
+                sections[current].append(inline)
+        else:
+            sections[current].append(line)
+    return sections
+
+def _split_title_company(text):
+    """Split "Senior Engineer at Acme" or "Acme | Senior Engineer" into (title, company)"""
+    parts = [part.strip(' ,-–—|') for part in re.split(r'\s+at\s+|\s*[|,–—]\s*|\s+-\s+', text) if part.strip(' ,-–—|')]
+    title = next((part for part in parts if TITLE_KEYWORDS.search(part)), None)
+    company = next((part for part in parts if part is not title), None)
+    return title, company
+
+def extract_experience(lines):
+    """
+    Build job entries from lines that carry a date range
+
+    Args:
+        lines: Lines of the experience section
+
+    Returns:
+        list: Dicts with title, company, years and description
+    """
+    date_lines = [index for index, line in enumerate(lines) if DATE_RANGE.search(line)]
+    used = set(date_lines)
+    entries = []
+
+    for index in date_lines:
+        line = lines[index]
+        date_match = DATE_RANGE.search(line)
+        rest = (line[:date_match.start()] + ' ' + line[date_match.end():]).strip(' ,-–—|()')
+        title, company = _split_title_company(rest) if rest else (None, None)
+
+        # Titles and company names are often on the lines above or below the dates
+        for neighbour_index in (index - 1, index - 2, index + 1):
+            if neighbour_index in used or not 0 <= neighbour_index < len(lines):
+                continue
+            if neighbour_index == index - 2 and index - 1 not in used:
+                continue
+            neighbour = lines[neighbour_index]
+            if not title and TITLE_KEYWORDS.search(neighbour) and len(neighbour) <= 80:
+                title, neighbour_company = _split_title_company(neighbour)
+                company = company or neighbour_company
+                used.add(neighbour_index)
+            elif not company and len(neighbour) <= 60 and not TITLE_KEYWORDS.search(neighbour):
+                company = neighbour
+                used.add(neighbour_index)
+
+        entries.append({'title': title, 'company': company, 'years': date_match.group(0), 'start': index})
+
+    # Everything between one entry and the next that was not used above is its description
+    for position, entry in enumerate(entries):
+        stop = entries[position + 1]['start'] if position + 1 < len(entries) else len(lines)
+        description = ' '.join(lines[i] for i in range(entry.pop('start') + 1, stop) if i not in used)
+        entry['description'] = description[:300]
+
+    return entries
+
+def extract_education(lines):
+    """
+    Build education entries from lines that mention a degree
+
+    Args:
+        lines: Lines of the education section (or the whole resume)
+
+    Returns:
+        list: Dicts with degree, institution, field and years
+    """
+    entries = []
+    for index, line in enumerate(lines):
+        degree_match = DEGREE_PATTERN.search(line) or SHORT_DEGREE_PATTERN.search(line)
+        if not degree_match:
+            continue
+
+        nearby = [line] + [lines[i] for i in (index + 1, index - 1) if 0 <= i < len(lines)]
+        institution = None
+        for text in nearby:
+            for part in re.split(r'\s*[|,–—]\s*|\s+-\s+', text):
+                if INSTITUTION_PATTERN.search(part) and not (DEGREE_PATTERN.match(part) or SHORT_DEGREE_PATTERN.match(part)):
+                    institution = part.strip()
+                    break
+            if institution:
+                break
+
+        field_match = FIELD_PATTERN.search(line[degree_match.end():])
+        years = YEAR.findall(line) or YEAR.findall(' '.join(nearby[1:2]))
+
+        entries.append({
+            'degree': line[:120] if len(line) <= 120 else degree_match.group(0),
+            'institution': institution,
+            'field': field_match.group(1).strip() if field_match else None,
+            'years': ' - '.join(years[:2]) if years else None
+        })
+
+    return entries
+
+def extract_section_skills(lines):
+    """Split a skills section into individual skill names"""
+    skills = []
+    for line in lines:
+        # Drop "Languages:" style labels in front of the list
+        if ':' in line:
+            line = line.split(':', 1)[1]
+        for item in SKILL_SEPARATORS.split(line):
+            item = item.strip(' -*.')
+            if item and 1 <= len(item.split()) <= 4 and len(item) <= 40 and not YEAR.search(item):
+                skills.append(item)
+    return skills
+
+def _merge_skills(*skill_lists):
+    merged = []
+    seen = set()
+    for skills in skill_lists:
+        for skill in skills:
+            key = skill.lower()
+            if key not in seen:
+                seen.add(key)
+                merged.append(skill)
+    return merged[:50]
+
+def _text_quality(text):
+    """Share of characters that look like real text rather than OCR debris"""
+    if not text:
+        return 0.0
+    clean = sum(1 for ch in text if ch.isalnum() or ch.isspace() or ch in '.,;:()/-+@&%#\'"|')
+    return clean / len(text)
+
+def score_confidence(text, sections, contact, resume_data):
+    """
+    Score how complete and trustworthy a heuristic parse is
+
+    Args:
+        text: The original resume text
+        sections: Output of split_sections
+        contact: Extracted contact details
+        resume_data: The parsed resume data
+
+    Returns:
+        tuple: (confidence between 0 and 1, dict of individual signal scores)
+    """
+    experience = resume_data['experience']
+    titled = [entry for entry in experience if entry['title']]
+    known_sections = [name for name in sections if name != 'header' and sections[name]]
+
+    signals = {
+        'email': 0.1 if contact.get('email') else 0.0,
+        'sections': 0.2 * min(len(known_sections), 3) / 3,
+        'experience': 0.25 * len(titled) / len(experience) if experience else 0.0,
+        'education': 0.15 if resume_data['education'] else 0.0,
+        'skills': 0.15 * min(len(resume_data['skills']), 5) / 5,
+        # Anything below 90% clean characters is probably a bad OCR or binary decode
+        'text_quality': 0.15 * max(0.0, min(1.0, (_text_quality(text) - 0.8) / 0.1)),
+    }
+    return round(sum(signals.values()), 3), {name: round(value, 3) for name, value in signals.items()}
+
+def parse_resume_locally(text):
+    """
+    Parse resume text with local heuristics
+
+    Args:
+        text: The resume text
+
+    Returns:
+        dict: resume_data (skills, experience, education, summary), contact
+              (name, email, phone), confidence and the signals behind it
+    """
+    lines = normalize_text(text)
+    sections = split_sections(lines)
+
+    experience_lines = sections.get('experience') or [line for line in lines if DATE_RANGE.search(line)]
+    education_lines = sections.get('education') or lines
+
+    summary_lines = sections.get('summary') or []
+    summary = ' '.join(summary_lines)[:500] if summary_lines else (text or '')[:500] + "..."
+
+    resume_data = {
+        'skills': _merge_skills(extract_section_skills(sections.get('skills', [])), extract_skills_from_text(text)),
+        'experience': extract_experience(experience_lines),
+        'education': extract_education(education_lines),
+        'summary': summary
+    }
+    contact = {
+        'name': extract_name(sections['header'] or lines),
+        'email': extract_email(text),
+        'phone': extract_phone('\n'.join(sections['header'])) or extract_phone(text)
+    }
+
+    confidence, signals = score_confidence(text, sections, contact, resume_data)
+    logger.debug(f"Heuristic resume parse confidence {confidence}: {signals}")
+
+    return {
+        'resume_data': resume_data,
+        'contact': contact,
+        'confidence': confidence,
+        'signals': signals
+    }
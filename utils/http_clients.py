@@ -0,0 +1,237 @@
+"""
+HTTP Clients - Process-wide pooled clients for outbound integrations.
+
+This module provides functions to:
+1. Share one keep-alive connection pool per integration (OpenAI, Mailgun, GCS)
+2. Apply tuned pool sizes and timeouts from environment variables
+3. Rebuild the clients after a fork so gunicorn workers never share sockets
+4. Count requests and new connections so connection reuse can be monitored
+"""
+
+import os
+import logging
+import threading
+from datetime import datetime
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+from openai import OpenAI
+
+logger = logging.getLogger(__name__)
+
+_lock = threading.RLock()
+_clients = {}
+_counters = {}
+_pid = os.getpid()
+
+def _env_int(name, default):
+    return int(os.environ.get(name, default))
+
+def _env_float(name, default):
+    return float(os.environ.get(name, default))
+
+def _counter(name):
+    if name not in _counters:
+        _counters[name] = {
+            'requests': 0,
+            'new_connections': 0,
+            'errors': 0,
+            'created_at': datetime.utcnow().isoformat()
+        }
+    return _counters[name]
+
+def _count(name, field, amount=1):
+    with _lock:
+        _counter(name)[field] += amount
+
+def reset_clients():
+    """
+    Drop every pooled client so the next call builds fresh ones
+
+    Called automatically in a forked child, where the parent's sockets must not be reused.
+    """
+    global _pid
+    with _lock:
+        _clients.clear()
+        _counters.clear()
+        _pid = os.getpid()
+
+def _check_fork():
+    if os.getpid() != _pid:
+        logger.debug(f"Process {os.getpid()} was forked from {_pid}, rebuilding HTTP clients")
+        reset_clients()
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=reset_clients)
+
+def _get_or_create(name, factory):
+    _check_fork()
+    client = _clients.get(name)
+    if client is not None:
+        return client
+
+    with _lock:
+        client = _clients.get(name)
+        if client is None:
+            client = factory()
+            _clients[name] = client
+            _counter(name)
+            logger.info(f"Created pooled HTTP client: {name}")
+        return client
+
+class CountingHTTPAdapter(HTTPAdapter):
+    """
+    requests adapter with a default timeout that counts requests and the
+    connections its urllib3 pools had to open
+    """
+
+    def __init__(self, name, timeout, **kwargs):
+        self.name = name
+        self.timeout = timeout
+        self.pools = {}
+        super().__init__(**kwargs)
+
+    def send(self, request, timeout=None, **kwargs):
+        _count(self.name, 'requests')
+        try:
+            response = super().send(request, timeout=timeout or self.timeout, **kwargs)
+        except Exception:
+            _count(self.name, 'errors')
+            raise
+
+        pool = getattr(response.raw, '_pool', None)
+        if pool is not None:
+            with _lock:
+                self.pools[id(pool)] = pool
+        return response
+
+    def connections_opened(self):
+        with _lock:
+            return sum(getattr(pool, 'num_connections', 0) for pool in self.pools.values())
+
+def _build_session(name, pool_size, timeout, session=None):
+    session = session or requests.Session()
+    adapter = CountingHTTPAdapter(
+        name,
+        timeout,
+        pool_connections=pool_size,
+        pool_maxsize=pool_size,
+        max_retries=_env_int('HTTP_MAX_RETRIES', 2)
+    )
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    session.counting_adapter = adapter
+    return session
+
+def get_http_session(name='default'):
+    """
+    Get a pooled requests session for a plain HTTP integration such as Mailgun
+
+    Args:
+        name: Integration name; each name gets its own pool and counters
+
+    Returns:
+        requests.Session: Session with keep-alive pools and a default timeout
+    """
+    prefix = name.upper()
+    return _get_or_create(name, lambda: _build_session(
+        name,
+        _env_int(f'{prefix}_POOL_SIZE', _env_int('HTTP_POOL_SIZE', 10)),
+        (_env_float('HTTP_CONNECT_TIMEOUT', 5), _env_float(f'{prefix}_TIMEOUT', _env_float('HTTP_TIMEOUT', 30)))
+    ))
+
+def _build_openai_client():
+    name = 'openai'
+
+    def on_request(request):
+        _count(name, 'requests')
+
+        def trace(event_name, info):
+            if event_name == 'connection.connect_tcp.complete':
+                _count(name, 'new_connections')
+
+        request.extensions['trace'] = trace
+
+    http_client = httpx.Client(
+        limits=httpx.Limits(
+            max_connections=_env_int('OPENAI_POOL_SIZE', 20),
+            max_keepalive_connections=_env_int('OPENAI_POOL_SIZE', 20),
+            keepalive_expiry=_env_float('HTTP_KEEPALIVE_EXPIRY', 60)
+        ),
+        timeout=httpx.Timeout(
+            _env_float('OPENAI_TIMEOUT', 60),
+            connect=_env_float('HTTP_CONNECT_TIMEOUT', 5)
+        ),
+        event_hooks={'request': [on_request]}
+    )
+
+    return OpenAI(
+        api_key=os.environ.get('OPENAI_API_KEY'),
+        max_retries=_env_int('OPENAI_MAX_RETRIES', 2),
+        http_client=http_client
+    )
+
+def get_openai_client():
+    """
+    Get the shared OpenAI client
+
+    Returns:
+        OpenAI: Client backed by a pooled httpx connection pool
+    """
+    return _get_or_create('openai', _build_openai_client)
+
+def _build_gcs_client():
+    import google.auth
+    from google.auth.transport.requests import AuthorizedSession
+    from google.cloud import storage
+
+    credentials, project = google.auth.default(
+        scopes=['https://www.googleapis.com/auth/devstorage.full_control']
+    )
+    session = _build_session(
+        'gcs',
+        _env_int('GCS_POOL_SIZE', 10),
+        (_env_float('HTTP_CONNECT_TIMEOUT', 5), get_gcs_timeout()),
+        session=AuthorizedSession(credentials)
+    )
+    return storage.Client(project=project, credentials=credentials, _http=session)
+
+def get_gcs_client():
+    """
+    Get the shared Google Cloud Storage client
+
+    Returns:
+        storage.Client: The client, or None if GCP credentials are not configured
+    """
+    if not os.environ.get('GOOGLE_APPLICATION_CREDENTIALS'):
+        return None
+    return _get_or_create('gcs', _build_gcs_client)
+
+def get_gcs_timeout():
+    """Timeout in seconds for GCS upload calls"""
+    return _env_float('GCS_TIMEOUT', 60)
+
+def get_client_metrics():
+    """
+    Get request and connection counters for every pooled client in this process
+
+    Returns:
+        dict: Per-client counters, keyed by integration name
+    """
+    _check_fork()
+    metrics = {}
+
+    with _lock:
+        for name, counter in _counters.items():
+            stats = dict(counter)
+            client = _clients.get(name)
+            if isinstance(client, requests.Session):
+                stats['new_connections'] = client.counting_adapter.connections_opened()
+            elif name == 'gcs' and client is not None:
+                stats['new_connections'] = client._http.counting_adapter.connections_opened()
+
+            stats['reused_connections'] = max(0, stats['requests'] - stats['new_connections'])
+            stats['reuse_ratio'] = round(stats['reused_connections'] / stats['requests'], 3) if stats['requests'] else 0.0
+            metrics[name] = stats
+
+    return {'pid': _pid, 'clients': metrics}
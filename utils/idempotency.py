@@ -0,0 +1,187 @@
+"""
+Idempotency - Makes client retries of upload and job-creation requests safe.
+
+This module provides functions to:
+1. Claim an Idempotency-Key for a request, so a duplicate running at the same time waits for the first
+2. Store the first request's response and replay it for retries with the same key
+3. Reject a key reused for a different request, and expire keys after a TTL
+"""
+
+import os
+import time
+import hashlib
+import logging
+from datetime import datetime, timedelta
+from sqlalchemy.exc import IntegrityError
+from models import db, IdempotencyRecord
+
+logger = logging.getLogger(__name__)
+
+IDEMPOTENCY_HEADER = 'Idempotency-Key'
+MAX_KEY_LENGTH = 255
+# How long a completed response is replayed
+IDEMPOTENCY_TTL_HOURS = float(os.environ.get('IDEMPOTENCY_TTL_HOURS', 24))
+# How long a duplicate waits for the first request to finish before getting a 409
+IDEMPOTENCY_WAIT_SECONDS = float(os.environ.get('IDEMPOTENCY_WAIT_SECONDS', 30))
+# A request still in progress after this long is assumed dead and may be taken over
+IDEMPOTENCY_LOCK_SECONDS = 300
+WAIT_POLL_SECONDS = 0.25
+PURGE_INTERVAL_SECONDS = 600
+
+_last_purge = {'at': 0.0}
+
+def request_fingerprint(request):
+    """
+    Hash what identifies a request: method, path and body
+
+    Multipart uploads are identified by method and path only: hashing the body
+    would read the upload into memory, and clients pick a new part boundary
+    (so a different body) on every retry.
+
+    Args:
+        request: The Flask request
+
+    Returns:
+        str: Hex sha256
+    """
+    digest = hashlib.sha256(f"{request.method} {request.path}?{request.query_string.decode()}".encode())
+    if request.mimetype != 'multipart/form-data':
+        digest.update(request.get_data(cache=True))
+    return digest.hexdigest()
+
+def _purge_expired(now):
+    """Delete expired records, at most once per PURGE_INTERVAL_SECONDS in each process"""
+    if time.time() - _last_purge['at'] < PURGE_INTERVAL_SECONDS:
+        return
+    _last_purge['at'] = time.time()
+    deleted = IdempotencyRecord.query.filter(IdempotencyRecord.expires_at < now).delete(synchronize_session=False)
+    db.session.commit()
+    if deleted:
+        logger.debug(f"Purged {deleted} expired idempotency records")
+
+def _take_over(record_id, now):
+    """Claim an expired or abandoned record for a new request; True if this request won"""
+    claimed = IdempotencyRecord.query.filter(
+        IdempotencyRecord.id == record_id,
+        (IdempotencyRecord.expires_at < now) |
+        ((IdempotencyRecord.status == 'in_progress') & (IdempotencyRecord.locked_until < now))
+    ).update({
+        'status': 'in_progress',
+        'response_status': None,
+        'response_body': None,
+        'response_mimetype': None,
+        'locked_until': now + timedelta(seconds=IDEMPOTENCY_LOCK_SECONDS),
+        'created_at': now,
+        'expires_at': now + timedelta(hours=IDEMPOTENCY_TTL_HOURS)
+    }, synchronize_session=False)
+    db.session.commit()
+    return claimed == 1
+
+def begin_request(scope, key, fingerprint):
+    """
+    Claim an idempotency key, or find the outcome of the request that claimed it
+
+    A request with the same key that is still running is waited for (up to
+    IDEMPOTENCY_WAIT_SECONDS), so concurrent duplicates do the work only once.
+
+    Args:
+        scope: Endpoint and caller the key belongs to
+        key: The Idempotency-Key header value
+        fingerprint: request_fingerprint() of this request
+
+    Returns:
+        tuple: (outcome, record) where outcome is 'new' (run the request and call
+               finish_request), 'replay' (record holds the response), 'mismatch'
+               (the key was used for a different request) or 'busy' (the first
+               request is still running)
+    """
+    now = datetime.utcnow()
+    try:
+        _purge_expired(now)
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"Error purging idempotency records: {str(e)}")
+
+    record = IdempotencyRecord(
+        scope=scope,
+        key=key,
+        fingerprint=fingerprint,
+        status='in_progress',
+        locked_until=now + timedelta(seconds=IDEMPOTENCY_LOCK_SECONDS),
+        expires_at=now + timedelta(hours=IDEMPOTENCY_TTL_HOURS)
+    )
+    db.session.add(record)
+    try:
+        db.session.commit()
+        return 'new', record
+    except IntegrityError:
+        db.session.rollback()
+
+    deadline = time.time() + IDEMPOTENCY_WAIT_SECONDS
+    while True:
+        now = datetime.utcnow()
+        existing = IdempotencyRecord.query.filter_by(scope=scope, key=key).populate_existing().first()
+        if existing is None:
+            # The first request failed and released the key; try to claim it again
+            return begin_request(scope, key, fingerprint)
+
+        if existing.expires_at < now or (existing.status == 'in_progress' and existing.locked_until < now):
+            if _take_over(existing.id, now):
+                existing = db.session.get(IdempotencyRecord, existing.id, populate_existing=True)
+                existing.fingerprint = fingerprint
+                db.session.commit()
+                return 'new', existing
+            continue
+        if existing.fingerprint != fingerprint:
+            return 'mismatch', existing
+        if existing.status == 'completed':
+            return 'replay', existing
+        if time.time() >= deadline:
+            return 'busy', existing
+
+        # End the transaction so the next read sees the first request's commit
+        db.session.rollback()
+        time.sleep(WAIT_POLL_SECONDS)
+
+def finish_request(record, response):
+    """
+    Store a response for replay, or release the key if the request should be retried
+
+    Server errors and 429s are not stored, so a retry runs the request again.
+
+    Args:
+        record: The record returned by begin_request
+        response: The Flask response
+    """
+    try:
+        # The handler may have rolled back, so the record is loaded again
+        record = db.session.get(IdempotencyRecord, record.id, populate_existing=True)
+        if record is None:
+            return
+        if response.status_code >= 500 or response.status_code == 429:
+            db.session.delete(record)
+        else:
+            record.status = 'completed'
+            record.response_status = response.status_code
+            record.response_body = response.get_data(as_text=True)
+            record.response_mimetype = response.mimetype
+            record.locked_until = None
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"Error storing idempotent response: {str(e)}")
+
+def release_request(record):
+    """
+    Release a key whose request raised, so a retry runs it again
+
+    Args:
+        record: The record returned by begin_request
+    """
+    try:
+        db.session.rollback()
+        IdempotencyRecord.query.filter_by(id=record.id).delete(synchronize_session=False)
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"Error releasing idempotency key: {str(e)}")
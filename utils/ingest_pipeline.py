@@ -0,0 +1,278 @@
+"""
+Ingest Pipeline - Turns an uploaded resume into a parsed, embedded and matched candidate.
+
+This module provides functions to:
+1. Extract text from an uploaded resume file
+2. Parse and embed it and store the result on the candidate
+3. Score the candidate against every active job
+4. Process 'resume' jobs from the durable ingestion queue, skipping work already
+   done for a file with the same bytes
+"""
+
+import os
+import hashlib
+import logging
+from models import db, Candidate, Job, JobCandidateMatch, job_matching_options
+from utils.match_stats import apply_candidate_match_changes
+from utils.resume_parser import parse_resume_text, EMBEDDING_MODEL
+from utils.heuristic_parser import extract_email
+from utils.text_compaction import compact_for_embedding
+from utils.document_text import extract_document_text, UnreadableDocumentError
+from utils.http_clients import get_openai_client
+from utils.job_queue import register_handler, set_stage, PermanentJobError
+from utils.persona_queue import enqueue_persona
+from utils.resume_files import find_resume_file, record_resume_file, discard_upload
+from utils.dashboard_stats import invalidate_dashboard_stats
+
+logger = logging.getLogger(__name__)
+
+# Minimum score for a job/candidate pair to be stored as a match
+MATCH_THRESHOLD = 0.3
+EMBEDDING_DIMENSIONS = 1536
+
+def extract_resume_text(content):
+    """
+    Extract text from an uploaded resume
+
+    Args:
+        content: Raw file bytes
+
+    Returns:
+        tuple: (text, method) - see extract_document_text
+
+    Raises:
+        PermanentJobError: If the file is corrupt or cannot be read
+    """
+    try:
+        text, method = extract_document_text(content)
+    except UnreadableDocumentError as e:
+        raise PermanentJobError(str(e))
+
+    logger.debug(f"Extracted {len(text)} characters ({method})")
+    return text, method
+
+def embed_resume_text(text):
+    """
+    Generate the embedding used for matching
+
+    Args:
+        text: Resume text
+
+    Returns:
+        list: The embedding, or a zero vector if the API call fails
+    """
+    try:
+        embedding_response = get_openai_client().embeddings.create(
+            input=compact_for_embedding(text),
+            model=EMBEDDING_MODEL
+        )
+        return embedding_response.data[0].embedding
+    except Exception as e:
+        logger.error(f"Embedding generation failed: {str(e)}")
+        return [0.0] * EMBEDDING_DIMENSIONS
+
+def calculate_match_score(candidate, job):
+    """
+    Score how well a candidate fits a job
+
+    Args:
+        candidate: The Candidate object
+        job: The Job object
+
+    Returns:
+        float: Score between 0 and 1 (60% embedding similarity, 40% skills)
+    """
+    try:
+        # Get embeddings similarity using dot product
+        candidate_embedding = candidate.embedding
+        job_embedding = job.embedding
+
+        if not candidate_embedding or not job_embedding:
+            return 0.0
+
+        embedding_similarity = sum(a * b for a, b in zip(candidate_embedding, job_embedding))
+
+        # Get skills match
+        candidate_skills = candidate.parsed_data.get('skills', []) if candidate.parsed_data else []
+        required_skills = job.required_skills or []
+        preferred_skills = job.preferred_skills or []
+
+        # Normalize skills to lowercase for comparison
+        candidate_skills_norm = set(s.lower() for s in candidate_skills)
+        required_skills_norm = set(s.lower() for s in required_skills)
+        preferred_skills_norm = set(s.lower() for s in preferred_skills)
+
+        # Calculate match percentages
+        if required_skills_norm:
+            required_match = len(candidate_skills_norm.intersection(required_skills_norm)) / len(required_skills_norm)
+        else:
+            required_match = 1.0  # Full match if no required skills
+
+        if preferred_skills_norm:
+            preferred_match = len(candidate_skills_norm.intersection(preferred_skills_norm)) / len(preferred_skills_norm)
+        else:
+            preferred_match = 0.5  # Neutral score if no preferred skills
+
+        # Weight required skills higher than preferred
+        skills_match = (required_match * 0.7) + (preferred_match * 0.3)
+
+        # Calculate combined score (60% embedding, 40% skills)
+        combined_score = (embedding_similarity * 0.6) + (skills_match * 0.4)
+
+        # Normalize to 0-1 range
+        normalized_score = max(0.0, min(1.0, combined_score))
+        return normalized_score
+
+    except Exception as e:
+        logger.error(f"Match score calculation failed: {str(e)}")
+        return 0.0
+
+def match_candidate_to_jobs(candidate):
+    """
+    Replace a candidate's matches with fresh scores against every active job
+
+    Args:
+        candidate: The Candidate object
+
+    Returns:
+        int: Number of matches stored
+    """
+    old_scores = dict(db.session.query(JobCandidateMatch.job_id, JobCandidateMatch.score)
+                      .filter_by(candidate_id=candidate.id).all())
+    JobCandidateMatch.query.filter_by(candidate_id=candidate.id).delete()
+
+    new_scores = {}
+    for job in Job.query.options(*job_matching_options()).filter_by(status='active').all():
+        score = calculate_match_score(candidate, job)
+        if score > MATCH_THRESHOLD:
+            db.session.add(JobCandidateMatch(job_id=job.id, candidate_id=candidate.id, score=score))
+            new_scores[job.id] = score
+
+    # The jobs' aggregates commit with the matches
+    apply_candidate_match_changes(candidate.id, old_scores, new_scores)
+    match_count = len(new_scores)
+    db.session.commit()
+    # Any recruiter's job may have gained or lost this candidate
+    invalidate_dashboard_stats()
+    return match_count
+
+def _candidate_from_resume(job, text):
+    """Find or create the candidate for a bulk upload, which has no form fields"""
+    filename = job.payload['filename']
+    extracted_email = extract_email(text)
+    if extracted_email:
+        logger.debug(f"Extracted email: {extracted_email}")
+        candidate = Candidate.query.filter_by(email=extracted_email).first()
+        if candidate:
+            logger.debug(f"Updating existing candidate: {candidate.id}")
+            job.candidate_id = candidate.id
+            return candidate
+
+    logger.debug("Creating new candidate from bulk upload")
+    candidate = Candidate(
+        name=os.path.splitext(filename)[0].replace('_', ' ').title(),
+        email=extracted_email or "",
+        phone="",
+        resume_file=filename,
+        gcs_url='/static/uploads/' + filename,
+        uploaded_by=job.recruiter_id
+    )
+    db.session.add(candidate)
+    db.session.flush()
+
+    # Remember the candidate so a retry updates it instead of creating another
+    job.candidate_id = candidate.id
+    db.session.commit()
+    return candidate
+
+def process_resume_job(job):
+    """
+    Queue handler for 'resume' jobs: parse, embed and match an uploaded resume
+
+    The payload holds local_path and filename. When the job has no candidate_id
+    (bulk uploads), the candidate is found by the email in the resume or created.
+    A file whose bytes were processed before is not processed again: it resolves
+    to the existing candidate, or reuses that candidate's parse and embedding.
+
+    Args:
+        job: The claimed IngestionJob
+
+    Returns:
+        dict: candidate_id, extraction method, parse_source and match count
+    """
+    local_path = job.payload['local_path']
+    if not os.path.exists(local_path):
+        raise PermanentJobError(f"Resume file not found: {local_path}")
+
+    logger.debug(f"Processing resume {job.payload['filename']} (job {job.id})")
+    with open(local_path, 'rb') as f:
+        content = f.read()
+
+    # Jobs queued before uploads were hashed have no sha256 in the payload
+    stored = dict(job.payload)
+    stored.setdefault('sha256', hashlib.sha256(content).hexdigest())
+    stored.setdefault('size', len(content))
+
+    resume_file = find_resume_file(stored['sha256'])
+    source = db.session.get(Candidate, resume_file.candidate_id) if resume_file and resume_file.candidate_id else None
+    if source and job.candidate_id in (None, source.id):
+        # The same bytes already made this candidate; nothing to redo
+        job.candidate_id = source.id
+        db.session.commit()
+        discard_upload(stored)
+        logger.debug(f"Resume {stored['filename']} is a duplicate of candidate {source.id}")
+        return {
+            'candidate_id': source.id,
+            'duplicate': True,
+            'extraction': resume_file.extraction_method,
+            'parse_source': 'duplicate',
+            'matches': JobCandidateMatch.query.filter_by(candidate_id=source.id).count()
+        }
+
+    set_stage(job, 'extracting')
+    if resume_file and resume_file.extracted_text is not None:
+        # Extracted before, so PDF reading and OCR are skipped
+        text, extraction_method = resume_file.extracted_text, resume_file.extraction_method
+    else:
+        text, extraction_method = extract_resume_text(content)
+
+    if source and source.parsed_data and source.embedding:
+        # Another candidate was made from the same bytes; its parse and embedding apply as-is
+        resume_data, parse_source, embedding_vector = source.parsed_data, 'duplicate', source.embedding
+    else:
+        # Parse locally, escalating to OpenAI only when the local parse is unsure
+        set_stage(job, 'parsing')
+        resume_data, parse_source = parse_resume_text(text)
+        logger.debug(f"Resume parsed ({parse_source})")
+        set_stage(job, 'embedding')
+        embedding_vector = embed_resume_text(text)
+
+    candidate = db.session.get(Candidate, job.candidate_id) if job.candidate_id else None
+    if not candidate:
+        candidate = _candidate_from_resume(job, text)
+
+    candidate.resume_file = job.payload['filename']
+    candidate.gcs_url = job.payload.get('gcs_url') or candidate.gcs_url or '/static/uploads/' + job.payload['filename']
+    candidate.parsed_data = resume_data
+    candidate.embedding = embedding_vector
+    db.session.commit()
+
+    set_stage(job, 'matching')
+    match_count = match_candidate_to_jobs(candidate)
+    logger.debug(f"Candidate {candidate.id} matched to {match_count} jobs")
+
+    # Recorded last, so a retry after a failure above still does the full work
+    if not source:
+        record_resume_file(stored, candidate.id, text, extraction_method)
+
+    if not candidate.persona:
+        enqueue_persona(candidate.id)
+
+    return {
+        'candidate_id': candidate.id,
+        'extraction': extraction_method,
+        'parse_source': parse_source,
+        'matches': match_count
+    }
+
+register_handler('resume', process_resume_job)
@@ -1,7 +1,8 @@
 # utils/job_analyzer.py
 import logging
 import json
-import openai
+from utils.http_clients import get_openai_client
+from utils.text_compaction import compact_text, compact_for_embedding, JOB_TOKEN_BUDGET
 
 logger = logging.getLogger(__name__)
 
@@ -10,7 +11,7 @@ def analyze_job_description(description):
     try:
         # The newest OpenAI model is "gpt-4o" which was released May 13, 2024.
         # do not change this unless explicitly requested by the user
-        analysis = openai.chat.completions.create(
+        analysis = get_openai_client().chat.completions.create(
             model="gpt-4o",
             messages=[{
                 "role": "system",
@@ -30,7 +31,7 @@ def analyze_job_description(description):
                 """
             }, {
                 "role": "user",
-                "content": description
+                "content": compact_text(description, JOB_TOKEN_BUDGET)
             }],
             response_format={"type": "json_object"}
         )
@@ -55,8 +56,8 @@ def analyze_job_description(description):
 def generate_embedding(description):
     """Generate embedding vector for the job description using OpenAI"""
     try:
-        embedding_response = openai.embeddings.create(
-            input=description,
+        embedding_response = get_openai_client().embeddings.create(
+            input=compact_for_embedding(description),
             model="text-embedding-3-small"
         )
         
@@ -0,0 +1,413 @@
+"""
+Job Queue - Durable, database-backed queue for ingestion work.
+
+This module provides functions to:
+1. Enqueue jobs into the ingestion_jobs table so they survive restarts
+2. Claim jobs under a lease, so a crashed worker's job is picked up again when the lease expires
+3. Retry failed jobs with exponential backoff up to a maximum number of attempts
+4. Run a pool of worker threads, either inside the web process or in worker.py
+5. Record which pipeline stage each job is in and how long each stage took
+"""
+
+import os
+import socket
+import random
+import logging
+import threading
+from datetime import datetime, timedelta
+from sqlalchemy import and_, or_, func
+from models import db, IngestionJob
+
+logger = logging.getLogger(__name__)
+
+LEASE_SECONDS = int(os.environ.get('INGEST_LEASE_SECONDS', 300))
+MAX_ATTEMPTS = int(os.environ.get('INGEST_MAX_ATTEMPTS', 5))
+RETRY_BASE_SECONDS = float(os.environ.get('INGEST_RETRY_BASE_SECONDS', 10))
+RETRY_MAX_SECONDS = float(os.environ.get('INGEST_RETRY_MAX_SECONDS', 600))
+POLL_INTERVAL = float(os.environ.get('INGEST_POLL_INTERVAL', 1.0))
+
+# Candidate rows looked at per claim attempt
+CLAIM_BATCH = 5
+
+_handlers = {}
+_lock = threading.Lock()
+_wake = threading.Event()
+_stop = threading.Event()
+_workers = []
+_stats = {'succeeded': 0, 'retried': 0, 'failed': 0}
+_last_sweep = [datetime.min]
+
+class PermanentJobError(Exception):
+    """Raised by a handler when retrying the job cannot help (e.g. the file is gone)"""
+
+def register_handler(kind, handler):
+    """
+    Register the function that processes jobs of a kind
+
+    Args:
+        kind: Job kind, e.g. 'resume'
+        handler: Callable taking the IngestionJob and returning a JSON-serializable result
+    """
+    _handlers[kind] = handler
+
+def enqueue_job(kind, payload, recruiter_id=None, candidate_id=None, batch_id=None, max_attempts=None, commit=True):
+    """
+    Add a job to the queue
+
+    Args:
+        kind: Job kind with a registered handler
+        payload: JSON-serializable job arguments
+        recruiter_id: Recruiter who triggered the job, if any
+        candidate_id: Candidate the job is about, if known
+        batch_id: UploadBatch the job belongs to, if any
+        max_attempts: Override for INGEST_MAX_ATTEMPTS
+        commit: Commit the session (pass False to commit with other changes)
+
+    Returns:
+        IngestionJob: The queued job
+    """
+    now = datetime.utcnow()
+    job = IngestionJob(
+        kind=kind,
+        payload=payload,
+        status='queued',
+        recruiter_id=recruiter_id,
+        candidate_id=candidate_id,
+        batch_id=batch_id,
+        stage='queued',
+        stage_started_at=now,
+        timings={},
+        max_attempts=max_attempts or MAX_ATTEMPTS,
+        run_after=now
+    )
+    db.session.add(job)
+    if commit:
+        db.session.commit()
+        _wake.set()
+        logger.debug(f"Queued {kind} job {job.id}")
+    return job
+
+def notify_workers():
+    """Wake local workers after committing jobs enqueued with commit=False"""
+    _wake.set()
+
+def _claimable(now):
+    return and_(
+        IngestionJob.attempts < IngestionJob.max_attempts,
+        or_(
+            and_(IngestionJob.status == 'queued', IngestionJob.run_after <= now),
+            # A running job whose lease expired belongs to a worker that died
+            and_(IngestionJob.status == 'running', IngestionJob.locked_until < now)
+        )
+    )
+
+def _fail_abandoned(now):
+    """Give up on jobs whose worker died on their last attempt"""
+    with _lock:
+        if now - _last_sweep[0] < timedelta(seconds=LEASE_SECONDS / 10):
+            return
+        _last_sweep[0] = now
+
+    abandoned = IngestionJob.query.filter(
+        IngestionJob.status == 'running',
+        IngestionJob.locked_until < now,
+        IngestionJob.attempts >= IngestionJob.max_attempts
+    ).update({
+        'status': 'failed',
+        'stage': 'failed',
+        'finished_at': now,
+        'locked_by': None,
+        'locked_until': None,
+        'last_error': func.coalesce(IngestionJob.last_error, 'Lease expired on the final attempt')
+    }, synchronize_session=False)
+    if abandoned:
+        db.session.commit()
+        logger.warning(f"Marked {abandoned} abandoned ingestion jobs as failed")
+
+def _stage_values(job, stage, now):
+    """Column values that move a job into a stage, adding the time spent in the previous one"""
+    timings = dict(job.timings or {})
+    if job.stage and job.stage_started_at:
+        elapsed_ms = int((now - job.stage_started_at).total_seconds() * 1000)
+        timings[job.stage] = timings.get(job.stage, 0) + max(0, elapsed_ms)
+    return {'stage': stage, 'stage_started_at': now, 'timings': timings}
+
+def set_stage(job, stage):
+    """
+    Record that a running job has moved on to the next pipeline stage
+
+    Handlers call this between steps so upload progress can be followed live.
+
+    Args:
+        job: The claimed IngestionJob
+        stage: Stage name, e.g. 'parsing'
+    """
+    for column, value in _stage_values(job, stage, datetime.utcnow()).items():
+        setattr(job, column, value)
+    db.session.commit()
+
+def claim_job(worker_id, kinds=None):
+    """
+    Claim the next runnable job for a worker
+
+    The claim is a conditional UPDATE, so two workers can never both win the
+    same row; on PostgreSQL the candidate rows are also selected with
+    SKIP LOCKED to keep workers from contending for the same job.
+
+    Args:
+        worker_id: Identifier stored in locked_by
+        kinds: Only claim these job kinds (default: every registered kind)
+
+    Returns:
+        IngestionJob: The claimed job, or None if nothing is runnable
+    """
+    now = datetime.utcnow()
+    _fail_abandoned(now)
+
+    kinds = list(kinds or _handlers.keys())
+    candidate_ids = [row.id for row in db.session.query(IngestionJob.id)
+                     .filter(_claimable(now), IngestionJob.kind.in_(kinds))
+                     .order_by(IngestionJob.run_after, IngestionJob.id)
+                     .limit(CLAIM_BATCH)
+                     .with_for_update(skip_locked=True)
+                     .all()]
+
+    for job_id in candidate_ids:
+        claimed = IngestionJob.query.filter(IngestionJob.id == job_id, _claimable(now)).update({
+            'status': 'running',
+            'locked_by': worker_id,
+            'locked_until': now + timedelta(seconds=LEASE_SECONDS),
+            'attempts': IngestionJob.attempts + 1,
+            'started_at': now
+        }, synchronize_session=False)
+        db.session.commit()
+
+        if claimed:
+            return db.session.get(IngestionJob, job_id)
+
+    db.session.commit()
+    return None
+
+def extend_lease(job_id, worker_id):
+    """
+    Push back the lease on a running job
+
+    Returns:
+        bool: False if the worker no longer holds the job
+    """
+    extended = IngestionJob.query.filter_by(id=job_id, locked_by=worker_id, status='running').update({
+        'locked_until': datetime.utcnow() + timedelta(seconds=LEASE_SECONDS)
+    }, synchronize_session=False)
+    db.session.commit()
+    return bool(extended)
+
+def complete_job(job, worker_id, result=None):
+    """Mark a claimed job as succeeded"""
+    now = datetime.utcnow()
+    values = {
+        'status': 'succeeded',
+        'result': result,
+        'last_error': None,
+        'locked_by': None,
+        'locked_until': None,
+        'finished_at': now
+    }
+    values.update(_stage_values(job, 'done', now))
+    updated = IngestionJob.query.filter_by(id=job.id, locked_by=worker_id, status='running') \
+        .update(values, synchronize_session=False)
+    db.session.commit()
+
+    if not updated:
+        logger.warning(f"Worker {worker_id} finished job {job.id} after losing its lease")
+    with _lock:
+        _stats['succeeded'] += 1
+
+def retry_delay(attempts):
+    """Seconds to wait before the next attempt: exponential backoff with jitter"""
+    delay = min(RETRY_MAX_SECONDS, RETRY_BASE_SECONDS * (2 ** max(0, attempts - 1)))
+    return delay * random.uniform(1.0, 1.2)
+
+def fail_job(job, worker_id, error, permanent=False):
+    """
+    Record a failed attempt, scheduling a retry unless attempts are used up
+
+    Args:
+        job: The claimed IngestionJob
+        worker_id: The worker that ran it
+        error: Error message
+        permanent: Fail immediately without retrying
+    """
+    now = datetime.utcnow()
+    give_up = permanent or job.attempts >= job.max_attempts
+
+    values = {
+        'last_error': str(error)[:2000],
+        'locked_by': None,
+        'locked_until': None
+    }
+    if give_up:
+        values.update({'status': 'failed', 'finished_at': now})
+    else:
+        values.update({'status': 'queued', 'run_after': now + timedelta(seconds=retry_delay(job.attempts))})
+    values.update(_stage_values(job, 'failed' if give_up else 'queued', now))
+
+    IngestionJob.query.filter_by(id=job.id, locked_by=worker_id).update(values, synchronize_session=False)
+    db.session.commit()
+
+    with _lock:
+        _stats['failed' if give_up else 'retried'] += 1
+    logger.error(f"Ingestion job {job.id} ({job.kind}) attempt {job.attempts} failed"
+                 f"{'' if give_up else ', will retry'}: {str(error)}")
+
+def _heartbeat(app, job_id, worker_id, done):
+    """Keep extending the lease while a long job runs"""
+    while not done.wait(LEASE_SECONDS / 3):
+        try:
+            with app.app_context():
+                if not extend_lease(job_id, worker_id):
+                    return
+                db.session.remove()
+        except Exception as e:
+            logger.error(f"Lease heartbeat failed for job {job_id}: {str(e)}")
+
+def run_job(app, job, worker_id):
+    """
+    Run a claimed job through its handler and record the outcome
+
+    Args:
+        app: The Flask application
+        job: The claimed IngestionJob
+        worker_id: The worker running it
+    """
+    handler = _handlers.get(job.kind)
+    if not handler:
+        fail_job(job, worker_id, f"No handler registered for job kind '{job.kind}'", permanent=True)
+        return
+
+    done = threading.Event()
+    threading.Thread(target=_heartbeat, args=(app, job.id, worker_id, done), daemon=True).start()
+    try:
+        result = handler(job)
+        complete_job(job, worker_id, result)
+    except PermanentJobError as e:
+        db.session.rollback()
+        fail_job(job, worker_id, e, permanent=True)
+    except Exception as e:
+        db.session.rollback()
+        fail_job(job, worker_id, e)
+    finally:
+        done.set()
+
+def work_once(app, worker_id, kinds=None):
+    """
+    Claim and run at most one job
+
+    Returns:
+        bool: True if a job was run
+    """
+    with app.app_context():
+        try:
+            job = claim_job(worker_id, kinds)
+            if not job:
+                return False
+            run_job(app, job, worker_id)
+            return True
+        except Exception as e:
+            db.session.rollback()
+            logger.error(f"Ingestion worker {worker_id} error: {str(e)}")
+            return False
+        finally:
+            db.session.remove()
+
+def _run_worker(app, worker_id, kinds):
+    logger.info(f"Ingestion worker {worker_id} started")
+    while not _stop.is_set():
+        if not work_once(app, worker_id, kinds):
+            _wake.wait(POLL_INTERVAL)
+            _wake.clear()
+    logger.info(f"Ingestion worker {worker_id} stopped")
+
+def start_ingest_workers(app, worker_count=2, kinds=None):
+    """
+    Start worker threads that process queued jobs
+
+    Args:
+        app: The Flask application (workers need its app context)
+        worker_count: Number of concurrent workers in this process
+        kinds: Only process these job kinds (default: all registered kinds)
+
+    Returns:
+        list: The started threads
+    """
+    _stop.clear()
+    prefix = f"{socket.gethostname()}:{os.getpid()}"
+    started = []
+
+    with _lock:
+        for index in range(len(_workers), len(_workers) + worker_count):
+            worker = threading.Thread(
+                target=_run_worker,
+                args=(app, f"{prefix}:{index}", kinds),
+                name=f"ingest-worker-{index}",
+                daemon=True
+            )
+            worker.start()
+            _workers.append(worker)
+            started.append(worker)
+
+    if started:
+        logger.info(f"Started {len(started)} ingestion worker threads")
+    return started
+
+def stop_ingest_workers(timeout=None):
+    """
+    Ask workers to stop after their current job and wait for them
+
+    Args:
+        timeout: Seconds to wait for each worker
+    """
+    _stop.set()
+    _wake.set()
+    with _lock:
+        workers = list(_workers)
+    for worker in workers:
+        worker.join(timeout)
+    with _lock:
+        _workers[:] = [worker for worker in _workers if worker.is_alive()]
+
+def get_job(job_id):
+    """Get an ingestion job by id, or None"""
+    return db.session.get(IngestionJob, job_id)
+
+def get_queue_metrics(kinds=None):
+    """
+    Get queue depth by kind and status, the age of the oldest runnable job,
+    and this process's worker counters
+
+    Args:
+        kinds: Only count these job kinds
+
+    Returns:
+        dict: Queue metrics
+    """
+    now = datetime.utcnow()
+    query = db.session.query(IngestionJob.kind, IngestionJob.status, func.count(IngestionJob.id))
+    oldest_query = db.session.query(func.min(IngestionJob.run_after)).filter(
+        IngestionJob.status == 'queued', IngestionJob.run_after <= now
+    )
+    if kinds:
+        query = query.filter(IngestionJob.kind.in_(kinds))
+        oldest_query = oldest_query.filter(IngestionJob.kind.in_(kinds))
+
+    counts = {}
+    for kind, status, count in query.group_by(IngestionJob.kind, IngestionJob.status).all():
+        counts.setdefault(kind, {})[status] = count
+
+    oldest = oldest_query.scalar()
+    with _lock:
+        return {
+            'jobs': counts,
+            'oldest_queued_seconds': round((now - oldest).total_seconds(), 1) if oldest else 0,
+            'workers': sum(1 for worker in _workers if worker.is_alive()),
+            'processed': dict(_stats)
+        }
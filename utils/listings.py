@@ -0,0 +1,275 @@
+"""
+Listings - Visibility-filtered, keyset-paginated listings for the recruiter pages.
+
+This module provides functions to:
+1. Restrict job and candidate queries in SQL to rows a recruiter owns or that are shared with them
+2. Encode and decode keyset cursors over (created_at, id), newest first
+3. Load one page of visible jobs, with owner names and match aggregates from job_match_stats, in a single query
+4. Load one page of visible candidates, projecting only the columns the listing shows
+5. Load one page of a job's matches, best first, joined to the candidate columns the match list shows
+"""
+
+import os
+import base64
+import logging
+from datetime import datetime
+from sqlalchemy import select, func, case, and_, or_, tuple_, true
+from sqlalchemy.orm import aliased
+from models import db, Job, Candidate, JobCandidateMatch, JobMatchStats, Recruiter, RecruiterSharing, job_preview_options
+from utils.match_stats import get_job_match_stats
+
+logger = logging.getLogger(__name__)
+
+# Rows per listing page, and the most a ?limit= may ask for
+LISTING_PAGE_SIZE = int(os.environ.get('LISTING_PAGE_SIZE', 25))
+MAX_PAGE_SIZE = 100
+# Totals above this are shown as "1000+", so counting stays bounded on large tables
+COUNT_CAP = 1000
+
+def page_size(requested=None):
+    """
+    Clamp a requested page size to 1..MAX_PAGE_SIZE
+
+    Args:
+        requested: The ?limit= value, or None for LISTING_PAGE_SIZE
+
+    Returns:
+        int: The page size to use
+    """
+    if not requested:
+        return LISTING_PAGE_SIZE
+    return max(1, min(MAX_PAGE_SIZE, requested))
+
+def encode_cursor(created_at, row_id):
+    """
+    Encode the position after a row as an opaque, URL-safe cursor
+
+    Args:
+        created_at: The row's created_at (or, for match lists, its score)
+        row_id: The row's id
+
+    Returns:
+        str: The cursor
+    """
+    key = created_at.isoformat() if isinstance(created_at, datetime) else repr(float(created_at))
+    raw = f"{key}|{row_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+def decode_cursor(cursor, key_type=datetime.fromisoformat):
+    """
+    Decode a cursor from encode_cursor
+
+    Args:
+        cursor: The ?after= value
+        key_type: Parses the first key (float for score cursors)
+
+    Returns:
+        tuple: (created_at or score, id), or None if the cursor is missing or malformed
+    """
+    if not cursor:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode()
+        key, row_id = raw.rsplit('|', 1)
+        return key_type(key), int(row_id)
+    except (ValueError, UnicodeDecodeError) as e:
+        logger.debug(f"Ignoring malformed listing cursor {cursor!r}: {str(e)}")
+        return None
+
+def visible_to(stmt, owner_column, recruiter, share_column, view_all=False):
+    """
+    Restrict a select to rows the recruiter owns or that their owner shares with them
+
+    recruiter_sharing is outer-joined on (owner, recruiter); its unique constraint
+    means at most one sharing row matches, so rows are never duplicated.
+
+    Args:
+        stmt: The select to filter
+        owner_column: Column holding the owning recruiter id (Job.recruiter_id, Candidate.uploaded_by)
+        recruiter: The recruiter viewing the listing
+        share_column: RecruiterSharing flag granting access (share_jobs, share_candidates)
+        view_all: True if the recruiter may see every row
+
+    Returns:
+        Select: The filtered select
+    """
+    if view_all:
+        return stmt
+    return stmt.outerjoin(RecruiterSharing, and_(
+        RecruiterSharing.owner_id == owner_column,
+        RecruiterSharing.shared_with_id == recruiter.id,
+        share_column == true()
+    )).where(or_(owner_column == recruiter.id, RecruiterSharing.id.isnot(None)))
+
+def capped_count(stmt, cap=COUNT_CAP):
+    """Scalar subquery counting a select's rows, stopping at cap + 1"""
+    limited = stmt.order_by(None).limit(cap + 1).subquery()
+    return select(func.count()).select_from(limited).scalar_subquery()
+
+def count_label(count, cap=COUNT_CAP):
+    """Format a capped_count result, e.g. 1000+"""
+    return f"{cap}+" if count > cap else str(count)
+
+def after_cursor(stmt, created_column, id_column, cursor):
+    """Order a select newest (or highest) first and, given a decoded cursor, start after it"""
+    if cursor:
+        stmt = stmt.where(tuple_(created_column, id_column) < tuple_(*cursor))
+    return stmt.order_by(created_column.desc(), id_column.desc())
+
+def list_visible_jobs(recruiter, view_all=False, after=None, limit=None):
+    """
+    Load one page of the jobs a recruiter can see
+
+    The page is one query: jobs filtered by ownership or sharing, with the
+    owner's name and the match count and score sum from job_match_stats joined
+    in. Totals for the page tabs are a second query.
+
+    Args:
+        recruiter: The recruiter viewing the listing
+        view_all: True if the recruiter may see every job
+        after: Cursor of the last job on the previous page
+        limit: Page size (see page_size)
+
+    Returns:
+        dict: jobs (with match_count, match_score and owner_name set), next_cursor
+              (None on the last page), total and own_total
+    """
+    limit = page_size(limit)
+    owner = aliased(Recruiter)
+
+    stmt = (select(Job, owner.name, JobMatchStats.match_count, JobMatchStats.score_sum)
+            .outerjoin(owner, owner.id == Job.recruiter_id)
+            .outerjoin(JobMatchStats, JobMatchStats.job_id == Job.id)
+            .options(*job_preview_options()))
+    stmt = visible_to(stmt, Job.recruiter_id, recruiter, RecruiterSharing.share_jobs, view_all)
+    stmt = after_cursor(stmt, Job.created_at, Job.id, decode_cursor(after))
+    rows = db.session.execute(stmt.limit(limit + 1)).all()
+
+    jobs = []
+    for job, owner_name, applications, score_sum in rows[:limit]:
+        job.owner_name = owner_name
+        job.match_count = applications or 0
+        job.match_score = round(score_sum / applications * 100) if applications else 0
+        jobs.append(job)
+
+    next_cursor = None
+    if len(rows) > limit:
+        next_cursor = encode_cursor(jobs[-1].created_at, jobs[-1].id)
+
+    totals = select(func.count(Job.id), func.coalesce(func.sum(case((Job.recruiter_id == recruiter.id, 1), else_=0)), 0))
+    totals = visible_to(totals.select_from(Job), Job.recruiter_id, recruiter, RecruiterSharing.share_jobs, view_all)
+    total, own_total = db.session.execute(totals).one()
+
+    return {
+        'jobs': jobs,
+        'next_cursor': next_cursor,
+        'total': total,
+        'own_total': own_total
+    }
+
+def list_visible_candidates(recruiter, view_all=False, after=None, limit=None):
+    """
+    Load one page of the candidates a recruiter can see
+
+    Only the listed columns are selected: skills and experience are extracted
+    from parsed_data in SQL, and embedding, persona and the rest of parsed_data
+    are never loaded. The best match score comes from a correlated subquery and
+    the uploader's name from a join, so the page is one query, plus one for the
+    totals, which are capped at COUNT_CAP.
+
+    Args:
+        recruiter: The recruiter viewing the listing
+        view_all: True if the recruiter may see every candidate
+        after: Cursor of the last candidate on the previous page
+        limit: Page size (see page_size)
+
+    Returns:
+        dict: candidates (rows with id, name, email, phone, resume_file, gcs_url,
+              uploaded_by, created_at, owner_name, skills, experience and
+              best_match), next_cursor, and total, own_total and shared_total
+              (capped counts)
+    """
+    limit = page_size(limit)
+    owner = aliased(Recruiter)
+    best_match = (select(func.max(JobCandidateMatch.score))
+                  .where(JobCandidateMatch.candidate_id == Candidate.id)
+                  .correlate(Candidate).scalar_subquery())
+
+    stmt = (select(
+                Candidate.id, Candidate.name, Candidate.email, Candidate.phone,
+                Candidate.resume_file, Candidate.gcs_url, Candidate.uploaded_by, Candidate.created_at,
+                owner.name.label('owner_name'),
+                Candidate.parsed_data['skills'].label('skills'),
+                Candidate.parsed_data['experience'].label('experience'),
+                best_match.label('best_match'))
+            .select_from(Candidate)
+            .outerjoin(owner, owner.id == Candidate.uploaded_by))
+    stmt = visible_to(stmt, Candidate.uploaded_by, recruiter, RecruiterSharing.share_candidates, view_all)
+    stmt = after_cursor(stmt, Candidate.created_at, Candidate.id, decode_cursor(after))
+    rows = db.session.execute(stmt.limit(limit + 1)).all()
+
+    candidates = rows[:limit]
+    next_cursor = None
+    if len(rows) > limit:
+        next_cursor = encode_cursor(candidates[-1].created_at, candidates[-1].id)
+
+    visible = visible_to(select(Candidate.id), Candidate.uploaded_by, recruiter,
+                         RecruiterSharing.share_candidates, view_all)
+    own = select(Candidate.id).where(Candidate.uploaded_by == recruiter.id)
+    shared = visible.where(or_(Candidate.uploaded_by != recruiter.id, Candidate.uploaded_by.is_(None)))
+    total, own_total, shared_total = db.session.execute(
+        select(capped_count(visible), capped_count(own), capped_count(shared))
+    ).one()
+
+    return {
+        'candidates': candidates,
+        'next_cursor': next_cursor,
+        'total': total,
+        'own_total': own_total,
+        'shared_total': shared_total
+    }
+
+def list_job_matches(job, after=None, limit=None):
+    """
+    Load one page of a job's matches, best first
+
+    The page is one query over the (job_id, score) index, joined to the
+    candidates and projecting only what the match list shows: skills and
+    experience are extracted from parsed_data in SQL. Pages continue after a
+    (score, match id) cursor, so a page costs the same however many matches the
+    job has. The total comes from job_match_stats.
+
+    Args:
+        job: The job
+        after: Cursor of the last match on the previous page
+        limit: Page size (see page_size)
+
+    Returns:
+        dict: matches (rows with match_id, score, id, name, email, phone,
+              resume_url, skills and experience), next_cursor (None on the
+              last page) and total
+    """
+    limit = page_size(limit)
+    stmt = (select(
+                JobCandidateMatch.id.label('match_id'), JobCandidateMatch.score,
+                Candidate.id, Candidate.name, Candidate.email, Candidate.phone,
+                Candidate.gcs_url.label('resume_url'),
+                Candidate.parsed_data['skills'].label('skills'),
+                Candidate.parsed_data['experience'].label('experience'))
+            .join(Candidate, Candidate.id == JobCandidateMatch.candidate_id)
+            .where(JobCandidateMatch.job_id == job.id))
+    stmt = after_cursor(stmt, JobCandidateMatch.score, JobCandidateMatch.id, decode_cursor(after, float))
+    rows = db.session.execute(stmt.limit(limit + 1)).all()
+
+    matches = rows[:limit]
+    next_cursor = None
+    if len(rows) > limit:
+        next_cursor = encode_cursor(matches[-1].score, matches[-1].match_id)
+
+    total = get_job_match_stats(job.id)['match_count']
+
+    return {
+        'matches': matches,
+        'next_cursor': next_cursor,
+        'total': total
+    }
@@ -0,0 +1,178 @@
+"""
+Match Stats - Per-job match aggregates kept in step with the matches.
+
+This module provides functions to:
+1. Rebuild job_match_stats rows (count, score sum, best score, top matches) for some or all jobs
+2. Apply one candidate's re-scored matches to the affected jobs' rows incrementally
+3. Read a job's aggregates without scanning job_candidate_matches
+
+Writers call these before committing their matches, so matches and aggregates
+commit together.
+"""
+
+import logging
+from sqlalchemy import select, delete, insert, func
+from models import db, Job, JobCandidateMatch, JobMatchStats
+from utils.access import IN_CHUNK
+
+logger = logging.getLogger(__name__)
+
+# Best matches remembered per job
+TOP_MATCHES_KEPT = 10
+
+def rebuild_job_match_stats(job_ids=None):
+    """
+    Recompute job_match_stats rows from job_candidate_matches, without committing
+
+    Counts, sums and best scores come from one GROUP BY, and the top matches
+    from one ranked query, per IN_CHUNK jobs. Every job asked for gets a row,
+    with zeros if it has no matches.
+
+    Args:
+        job_ids: Jobs to rebuild (default: every job)
+
+    Returns:
+        int: Number of rows written
+    """
+    if job_ids is None:
+        chunks = [None]
+    else:
+        job_ids = sorted(set(job_ids))
+        chunks = [job_ids[start:start + IN_CHUNK] for start in range(0, len(job_ids), IN_CHUNK)]
+
+    written = 0
+    for chunk in chunks:
+        aggregates = (select(Job.id, func.count(JobCandidateMatch.id),
+                             func.coalesce(func.sum(JobCandidateMatch.score), 0.0), func.max(JobCandidateMatch.score))
+                      .select_from(Job)
+                      .outerjoin(JobCandidateMatch, JobCandidateMatch.job_id == Job.id)
+                      .group_by(Job.id))
+        rank = func.row_number().over(partition_by=JobCandidateMatch.job_id,
+                                      order_by=(JobCandidateMatch.score.desc(), JobCandidateMatch.id))
+        ranked = select(JobCandidateMatch.job_id, JobCandidateMatch.candidate_id, JobCandidateMatch.score,
+                        rank.label('rank'))
+        clear = delete(JobMatchStats)
+        if chunk is not None:
+            aggregates = aggregates.where(Job.id.in_(chunk))
+            ranked = ranked.where(JobCandidateMatch.job_id.in_(chunk))
+            clear = clear.where(JobMatchStats.job_id.in_(chunk))
+        ranked = ranked.subquery()
+
+        top_matches = {}
+        for job_id, candidate_id, score in db.session.execute(
+            select(ranked.c.job_id, ranked.c.candidate_id, ranked.c.score)
+            .where(ranked.c.rank <= TOP_MATCHES_KEPT)
+            .order_by(ranked.c.job_id, ranked.c.rank)
+        ):
+            top_matches.setdefault(job_id, []).append([candidate_id, score])
+
+        rows = [{
+            'job_id': job_id,
+            'match_count': match_count,
+            'score_sum': score_sum,
+            'max_score': max_score,
+            'top_matches': top_matches.get(job_id, [])
+        } for job_id, match_count, score_sum, max_score in db.session.execute(aggregates)]
+
+        db.session.execute(clear, execution_options={'synchronize_session': False})
+        if rows:
+            db.session.execute(insert(JobMatchStats), rows)
+        written += len(rows)
+
+    # Rows loaded before the rebuild must not keep their old values
+    for stats in [obj for obj in db.session.identity_map.values() if isinstance(obj, JobMatchStats)]:
+        db.session.expire(stats)
+    return written
+
+def _merge_top_matches(previous, candidate_id, new_score):
+    """
+    Replace one candidate's entry in a job's top matches
+
+    Returns:
+        tuple: (top matches, complete) where complete is False if the
+               candidate left a full list and the match that moves up is unknown
+    """
+    floor = previous[-1][1] if previous else None
+    was_top = any(entry[0] == candidate_id for entry in previous)
+    top = [entry for entry in previous if entry[0] != candidate_id]
+    if new_score is not None:
+        top.append([candidate_id, new_score])
+    top.sort(key=lambda entry: entry[1], reverse=True)
+
+    if len(previous) >= TOP_MATCHES_KEPT and was_top and (new_score is None or new_score < floor):
+        return top[:TOP_MATCHES_KEPT], False
+    return top[:TOP_MATCHES_KEPT], True
+
+def apply_candidate_match_changes(candidate_id, old_scores, new_scores):
+    """
+    Update the stats of every job whose match with one candidate changed, without committing
+
+    Counts and sums are adjusted by the difference. A job whose row is missing,
+    or which lost a top match it cannot replace from its row, is rebuilt from
+    its matches instead. Rows are locked (FOR UPDATE where the database
+    supports it) so concurrent workers do not lose each other's changes.
+
+    Args:
+        candidate_id: The candidate whose matches were replaced
+        old_scores: job_id -> score before the change
+        new_scores: job_id -> score after the change
+
+    Returns:
+        int: Number of jobs updated
+    """
+    job_ids = sorted(set(old_scores) | set(new_scores))
+    if not job_ids:
+        return 0
+
+    rows = {}
+    for start in range(0, len(job_ids), IN_CHUNK):
+        chunk = job_ids[start:start + IN_CHUNK]
+        for stats in (JobMatchStats.query.filter(JobMatchStats.job_id.in_(chunk))
+                      .order_by(JobMatchStats.job_id).with_for_update()):
+            rows[stats.job_id] = stats
+
+    stale = []
+    for job_id in job_ids:
+        stats = rows.get(job_id)
+        if stats is None:
+            stale.append(job_id)
+            continue
+
+        old_score, new_score = old_scores.get(job_id), new_scores.get(job_id)
+        top, complete = _merge_top_matches(stats.top_matches or [], candidate_id, new_score)
+        match_count = stats.match_count + (new_score is not None) - (old_score is not None)
+        if not complete and match_count > len(top):
+            stale.append(job_id)
+            continue
+
+        stats.match_count = match_count
+        stats.score_sum = (stats.score_sum or 0.0) + (new_score or 0.0) - (old_score or 0.0)
+        stats.top_matches = top
+        stats.max_score = top[0][1] if top else None
+
+    if stale:
+        logger.debug(f"Rebuilding match stats for {len(stale)} jobs")
+        db.session.flush()
+        rebuild_job_match_stats(stale)
+    return len(job_ids)
+
+def get_job_match_stats(job_id):
+    """
+    Get a job's match aggregates
+
+    Args:
+        job_id: The job
+
+    Returns:
+        dict: match_count, average_score, max_score and top_candidate_ids
+              (zeros and empty for a job without a stats row)
+    """
+    stats = db.session.get(JobMatchStats, job_id)
+    if not stats:
+        return {'match_count': 0, 'average_score': None, 'max_score': None, 'top_candidate_ids': []}
+    return {
+        'match_count': stats.match_count,
+        'average_score': stats.average_score,
+        'max_score': stats.max_score,
+        'top_candidate_ids': stats.top_candidate_ids
+    }
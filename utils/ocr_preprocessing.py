@@ -0,0 +1,159 @@
+"""
+OCR Preprocessing - Cleans up scanned pages before they are sent to Tesseract.
+
+This module provides functions to:
+1. Convert pages to grayscale and resample them to the resolution Tesseract works best at
+2. Estimate and correct page skew from the horizontal projection profile
+3. Binarize with a local (adaptive) threshold so uneven lighting and tinted paper drop out
+"""
+
+import os
+import logging
+import numpy as np
+from PIL import Image, ImageFilter, ImageOps
+
+logger = logging.getLogger(__name__)
+
+OCR_PREPROCESS = os.environ.get('OCR_PREPROCESS', 'true').lower() in ('1', 'true', 'yes')
+# Tesseract is trained on text of roughly 300 DPI scans
+OCR_TARGET_DPI = int(os.environ.get('OCR_TARGET_DPI', 300))
+# Side of the neighbourhood (pixels at the target DPI) each pixel is compared with, and how much
+# darker than that neighbourhood it must be to count as ink
+OCR_BINARIZE_WINDOW = int(os.environ.get('OCR_BINARIZE_WINDOW', 31))
+OCR_BINARIZE_OFFSET = int(os.environ.get('OCR_BINARIZE_OFFSET', 10))
+# Largest skew searched for, in degrees (found to within a quarter degree)
+OCR_DESKEW_MAX_ANGLE = float(os.environ.get('OCR_DESKEW_MAX_ANGLE', 5))
+
+# Resumes are letter or A4 portrait, about 8.5 inches wide
+PAGE_WIDTH_INCHES = 8.5
+# Skew is estimated on a copy this wide, which is plenty to see text lines
+SKEW_SAMPLE_WIDTH = 1000
+
+def source_dpi(img):
+    """
+    Get the resolution of a scan
+
+    Args:
+        img: PIL image
+
+    Returns:
+        float: DPI from the image metadata, or estimated from the page width
+    """
+    dpi = img.info.get('dpi', (0, 0))[0]
+    if dpi and dpi >= 50:
+        return float(dpi)
+    return img.width / PAGE_WIDTH_INCHES
+
+def normalize_resolution(img, target_dpi=None):
+    """
+    Resample a page to the target DPI (between half and double the original size)
+
+    Args:
+        img: PIL image
+        target_dpi: Resolution to resample to (default: OCR_TARGET_DPI)
+
+    Returns:
+        Image: The resampled image, or the original if it is already close
+    """
+    scale = (target_dpi or OCR_TARGET_DPI) / source_dpi(img)
+    scale = max(0.5, min(2.0, scale))
+    if 0.9 <= scale <= 1.1:
+        return img
+    size = (max(1, round(img.width * scale)), max(1, round(img.height * scale)))
+    # reducing_gap lets PIL shrink by whole factors first, which is much faster at scan sizes
+    return img.resize(size, Image.BICUBIC, reducing_gap=3.0)
+
+def _profile_sharpness(ink, angle):
+    """Row-to-row change in ink after rotating; highest when text lines are level"""
+    rows = np.asarray(ink.rotate(angle, resample=Image.NEAREST), dtype=np.float32).sum(axis=1)
+    return float(np.square(np.diff(rows)).sum())
+
+def estimate_skew(gray, max_angle=None):
+    """
+    Estimate the rotation that straightens the text lines on a page
+
+    Text lines give sharp peaks in the row sums of ink when they are level, so
+    the angle that maximizes the row-to-row change is the correction. Angles are
+    searched a degree apart, then in quarter degrees around the best one.
+
+    Args:
+        gray: Grayscale PIL image
+        max_angle: Largest correction tried in either direction, in degrees
+
+    Returns:
+        float: Counter-clockwise rotation in degrees to apply to straighten the page
+    """
+    max_angle = OCR_DESKEW_MAX_ANGLE if max_angle is None else max_angle
+    if max_angle <= 0:
+        return 0.0
+
+    sample = ImageOps.autocontrast(gray)
+    if sample.width > SKEW_SAMPLE_WIDTH:
+        sample = sample.resize((SKEW_SAMPLE_WIDTH, max(1, round(sample.height * SKEW_SAMPLE_WIDTH / sample.width))))
+    # Ink is white on black so rotated-in corners add no ink
+    ink = sample.point(lambda value: 255 if value < 128 else 0)
+
+    coarse = [float(angle) for angle in range(-int(max_angle), int(max_angle) + 1)]
+    best_angle = max(coarse, key=lambda angle: _profile_sharpness(ink, angle))
+    fine = [best_angle + offset for offset in (-0.75, -0.5, -0.25, 0.0, 0.25, 0.5, 0.75)]
+    return max(fine, key=lambda angle: _profile_sharpness(ink, angle))
+
+def deskew(gray, max_angle=None):
+    """
+    Straighten a skewed page
+
+    Args:
+        gray: Grayscale PIL image
+        max_angle: Largest correction tried, in degrees
+
+    Returns:
+        Image: The straightened image (unchanged if no skew was found)
+    """
+    angle = estimate_skew(gray, max_angle)
+    if not angle:
+        return gray
+    logger.debug(f"Deskewing page by {angle} degrees")
+    return gray.rotate(angle, resample=Image.BILINEAR, expand=True, fillcolor=255)
+
+def binarize(gray, window=None, offset=None):
+    """
+    Convert a grayscale page to black text on white with a local mean threshold
+
+    Args:
+        gray: Grayscale PIL image
+        window: Neighbourhood size in pixels (default: OCR_BINARIZE_WINDOW)
+        offset: How much darker than the neighbourhood ink must be (default: OCR_BINARIZE_OFFSET)
+
+    Returns:
+        Image: Black and white image in 'L' mode
+    """
+    window = window or OCR_BINARIZE_WINDOW
+    offset = OCR_BINARIZE_OFFSET if offset is None else offset
+
+    local_mean = np.asarray(gray.filter(ImageFilter.BoxBlur(window // 2)), dtype=np.int16)
+    pixels = np.asarray(gray, dtype=np.int16)
+    return Image.fromarray(np.where(pixels < local_mean - offset, 0, 255).astype(np.uint8), 'L')
+
+def preprocess_for_ocr(img, target_dpi=None, window=None, offset=None, max_angle=None):
+    """
+    Prepare a scanned page for Tesseract: grayscale, resample, deskew, binarize
+
+    Args:
+        img: PIL image of one page
+        target_dpi: Resolution to resample to (default: OCR_TARGET_DPI)
+        window: Binarization neighbourhood in pixels (default: OCR_BINARIZE_WINDOW)
+        offset: Binarization offset (default: OCR_BINARIZE_OFFSET)
+        max_angle: Largest skew corrected, in degrees; 0 disables deskewing
+
+    Returns:
+        Image: The cleaned-up page
+    """
+    # Flatten transparency onto white before dropping color
+    if img.mode in ('RGBA', 'LA', 'P'):
+        img = img.convert('RGBA')
+        background = Image.new('RGBA', img.size, (255, 255, 255, 255))
+        img = Image.alpha_composite(background, img)
+
+    gray = normalize_resolution(img.convert('L'), target_dpi)
+    gray = deskew(gray, max_angle)
+    return binarize(gray, window, offset)
@@ -0,0 +1,229 @@
+"""
+OCR Service - Runs Tesseract OCR in a pool of worker processes.
+
+This module provides functions to:
+1. Split multi-page images (e.g. scanned TIFFs) into pages
+2. OCR the pages in parallel in a process pool, off the web and queue threads
+   (each page is cleaned up by utils.ocr_preprocessing first)
+3. Enforce per-page and per-document timeouts, cancelling pages that have not started
+4. Report pool size, queue depth and OCR timings
+"""
+
+import os
+import time
+import logging
+import threading
+import multiprocessing
+from io import BytesIO
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_EXCEPTION
+from concurrent.futures.process import BrokenProcessPool
+from PIL import Image, ImageSequence
+import pytesseract
+from utils.ocr_preprocessing import preprocess_for_ocr, OCR_PREPROCESS
+
+logger = logging.getLogger(__name__)
+
+OCR_WORKERS = int(os.environ.get('OCR_WORKERS', 0)) or os.cpu_count() or 1
+# Tesseract is killed after this many seconds on a single page
+OCR_PAGE_TIMEOUT = float(os.environ.get('OCR_PAGE_TIMEOUT_SECONDS', 30))
+# Longest a whole document may take, including time spent waiting for a free process
+OCR_DOCUMENT_TIMEOUT = float(os.environ.get('OCR_DOCUMENT_TIMEOUT_SECONDS', 120))
+# Pages beyond this are not OCRed (resumes are rarely longer)
+OCR_MAX_PAGES = int(os.environ.get('OCR_MAX_PAGES', 10))
+
+_pool = None
+_pool_lock = threading.Lock()
+_stats_lock = threading.Lock()
+_stats = {'submitted': 0, 'completed': 0, 'failed': 0, 'timed_out': 0, 'cancelled': 0, 'total_ms': 0.0}
+
+class OCRTimeoutError(Exception):
+    """Raised when a page or document takes longer than its OCR timeout"""
+
+def _mp_context():
+    """
+    Start pool processes from a fork server (or spawn them where there is none),
+    never by forking this process: its queue and scheduler threads may hold locks
+    that a forked child would inherit, held forever
+    """
+    if 'forkserver' in multiprocessing.get_all_start_methods():
+        context = multiprocessing.get_context('forkserver')
+        # The server imports the entry script and this module once, and every
+        # pool process is forked from it ready to OCR
+        context.set_forkserver_preload(['__main__', __name__])
+        return context
+    return multiprocessing.get_context('spawn')
+
+def _get_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=OCR_WORKERS, mp_context=_mp_context())
+            logger.info(f"Started OCR pool with {OCR_WORKERS} processes")
+        return _pool
+
+def _reset_pool(broken):
+    """Drop a pool whose processes died so the next call starts a fresh one"""
+    global _pool
+    with _pool_lock:
+        if _pool is broken:
+            _pool = None
+    broken.shutdown(wait=False, cancel_futures=True)
+
+def shutdown_ocr_pool(wait_for_pages=True):
+    """
+    Stop the OCR processes
+
+    Args:
+        wait_for_pages: Wait for pages being OCRed to finish (queued pages are cancelled)
+    """
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool:
+        pool.shutdown(wait=wait_for_pages, cancel_futures=True)
+
+def _ocr_page(page, timeout):
+    """Runs in a pool process: OCR one page and return the text and milliseconds taken"""
+    started = time.perf_counter()
+    img = Image.open(BytesIO(page))
+    if OCR_PREPROCESS:
+        img = preprocess_for_ocr(img)
+    try:
+        text = pytesseract.image_to_string(img, timeout=timeout)
+    except RuntimeError as e:
+        # pytesseract kills Tesseract and raises RuntimeError when the timeout is hit
+        if 'timeout' in str(e).lower():
+            raise OCRTimeoutError(f"OCR timed out after {timeout}s on a page")
+        raise
+    return text, (time.perf_counter() - started) * 1000
+
+def split_pages(content, max_pages=None):
+    """
+    Split an image into the pages to OCR
+
+    Args:
+        content: Raw image bytes
+        max_pages: Most pages to return (default: OCR_MAX_PAGES)
+
+    Returns:
+        list: Image bytes for each page, or None if the content is not an image
+    """
+    try:
+        img = Image.open(BytesIO(content))
+    except Exception:
+        return None
+
+    if getattr(img, 'n_frames', 1) <= 1:
+        return [content]
+
+    pages = []
+    for frame in ImageSequence.Iterator(img):
+        if len(pages) >= (max_pages or OCR_MAX_PAGES):
+            logger.warning(f"Only the first {len(pages)} of {img.n_frames} pages will be OCRed")
+            break
+        buffer = BytesIO()
+        frame.save(buffer, format='PNG')
+        pages.append(buffer.getvalue())
+    return pages
+
+def _record(future):
+    with _stats_lock:
+        if future.cancelled():
+            _stats['cancelled'] += 1
+        elif future.exception() is not None:
+            _stats['timed_out' if isinstance(future.exception(), OCRTimeoutError) else 'failed'] += 1
+        else:
+            _stats['completed'] += 1
+            _stats['total_ms'] += future.result()[1]
+
+def ocr_page_texts(pages, page_timeout=None, document_timeout=None):
+    """
+    OCR pages in parallel
+
+    Args:
+        pages: Image bytes for each page
+        page_timeout: Seconds Tesseract may spend on one page (default: OCR_PAGE_TIMEOUT)
+        document_timeout: Seconds to wait for every page (default: OCR_DOCUMENT_TIMEOUT)
+
+    Returns:
+        list: The text of each page, in page order
+
+    Raises:
+        OCRTimeoutError: If a page or the whole document runs out of time
+    """
+    page_timeout = page_timeout or OCR_PAGE_TIMEOUT
+    document_timeout = document_timeout or OCR_DOCUMENT_TIMEOUT
+    pool = _get_pool()
+
+    try:
+        futures = [pool.submit(_ocr_page, page, page_timeout) for page in pages]
+    except BrokenProcessPool:
+        _reset_pool(pool)
+        raise
+    with _stats_lock:
+        _stats['submitted'] += len(futures)
+    for future in futures:
+        future.add_done_callback(_record)
+
+    done, not_done = wait(futures, timeout=document_timeout, return_when=FIRST_EXCEPTION)
+    failed = next((future for future in done if future.exception() is not None), None)
+    if failed is not None or not_done:
+        # Pages still waiting for a process are dropped; running ones end at their page timeout
+        for future in not_done:
+            future.cancel()
+        if failed is None:
+            raise OCRTimeoutError(f"OCR of {len(pages)} pages did not finish within {document_timeout}s")
+        if isinstance(failed.exception(), BrokenProcessPool):
+            _reset_pool(pool)
+        raise failed.exception()
+
+    return [future.result()[0].strip() for future in futures]
+
+def ocr_pages(pages, page_timeout=None, document_timeout=None):
+    """
+    OCR pages in parallel and join the text in page order
+
+    Returns:
+        str: The text of all pages
+    """
+    return '\n\n'.join(ocr_page_texts(pages, page_timeout, document_timeout))
+
+def ocr_image(content, page_timeout=None, document_timeout=None):
+    """
+    OCR an uploaded image, one process per page
+
+    Args:
+        content: Raw image bytes (PNG, JPEG, multi-page TIFF, ...)
+        page_timeout: Seconds Tesseract may spend on one page
+        document_timeout: Seconds to wait for the whole image
+
+    Returns:
+        str: The extracted text, or None if the content is not an image
+    """
+    pages = split_pages(content)
+    if pages is None:
+        return None
+    return ocr_pages(pages, page_timeout, document_timeout)
+
+def get_ocr_metrics():
+    """
+    Get OCR pool counters
+
+    Returns:
+        dict: Pool size, pages waiting or running, outcome counts and average page time
+    """
+    with _stats_lock:
+        stats = dict(_stats)
+    finished = stats['completed'] + stats['failed'] + stats['timed_out'] + stats['cancelled']
+    in_flight = max(0, stats['submitted'] - finished)
+    return {
+        'workers': OCR_WORKERS,
+        'started': _pool is not None,
+        'in_flight_pages': in_flight,
+        'queued_pages': max(0, in_flight - OCR_WORKERS),
+        'completed': stats['completed'],
+        'failed': stats['failed'],
+        'timed_out': stats['timed_out'],
+        'cancelled': stats['cancelled'],
+        'avg_page_ms': round(stats['total_ms'] / stats['completed'], 1) if stats['completed'] else 0.0
+    }
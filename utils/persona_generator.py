@@ -1,71 +1,82 @@
 import logging
 import os
+import copy
 import json
-from openai import OpenAI
+from utils.http_clients import get_openai_client
+from utils.resume_parser import normalize_resume_data
 
 logger = logging.getLogger(__name__)
 
-def generate_candidate_persona(parsed_data):
+# The newest OpenAI model is "gpt-4o" which was released May 13, 2024.
+# do not change this unless explicitly requested by the user
+PERSONA_MODEL = "gpt-4o"
+
+def default_persona(team_fit="Not analyzed"):
     """
-    Generate a candidate persona profile using OpenAI
+    Build the empty persona used when no analysis is available
     
     Args:
-        parsed_data (dict): The parsed resume data
+        team_fit (str): Text to show in the team_fit field
         
     Returns:
-        dict: A persona object with ideal_roles, key_strengths, growth_areas, and team_fit
+        dict: A persona object with empty lists
     """
-    try:
-        # Check if OpenAI API key is available
-        api_key = os.environ.get('OPENAI_API_KEY')
-        
-        if not api_key:
-            logger.warning("OpenAI API key not found - returning default persona")
-            return {
-                "ideal_roles": [],
-                "key_strengths": [],
-                "growth_areas": [],
-                "team_fit": "Not analyzed"
-            }
-        
-        client = OpenAI(api_key=api_key)
-        
-        # Format the input data
-        skills = parsed_data.get('skills', [])
-        experience = parsed_data.get('experience', [])
-        education = parsed_data.get('education', [])
-        summary = parsed_data.get('summary', '')
-        
-        # Format experience for the prompt
-        experience_text = ""
-        if isinstance(experience, list):
-            for job in experience:
-                if isinstance(job, dict):
-                    title = job.get('title', '')
-                    company = job.get('company', '')
-                    years = job.get('years', '')
-                    experience_text += f"{title} at {company} ({years})\n"
-                else:
-                    experience_text += f"{job}\n"
-        else:
-            experience_text = str(experience)
-        
-        # Format education for the prompt
-        education_text = ""
-        if isinstance(education, list):
-            for edu in education:
-                if isinstance(edu, dict):
-                    degree = edu.get('degree', '')
-                    school = edu.get('school', '')
-                    year = edu.get('year', '')
-                    education_text += f"{degree} from {school} ({year})\n"
-                else:
-                    education_text += f"{edu}\n"
-        else:
-            education_text = str(education)
+    return {
+        "ideal_roles": [],
+        "key_strengths": [],
+        "growth_areas": [],
+        "team_fit": team_fit
+    }
+
+def build_persona_prompt(parsed_data):
+    """
+    Build the persona prompt for a candidate's parsed resume data
+    
+    Args:
+        parsed_data (dict): The parsed resume data
         
-        # Create the prompt
-        prompt = f"""
+    Returns:
+        str: The prompt to send to the chat completions API
+    """
+    # Resumes parsed before both education key spellings were stored may have either one
+    parsed_data = normalize_resume_data(copy.deepcopy(parsed_data or {}))
+    
+    # Format the input data
+    skills = parsed_data.get('skills', [])
+    experience = parsed_data.get('experience', [])
+    education = parsed_data.get('education', [])
+    summary = parsed_data.get('summary', '')
+    
+    # Format experience for the prompt
+    experience_text = ""
+    if isinstance(experience, list):
+        for job in experience:
+            if isinstance(job, dict):
+                title = job.get('title', '')
+                company = job.get('company', '')
+                years = job.get('years', '')
+                experience_text += f"{title} at {company} ({years})\n"
+            else:
+                experience_text += f"{job}\n"
+    else:
+        experience_text = str(experience)
+    
+    # Format education for the prompt
+    education_text = ""
+    if isinstance(education, list):
+        for edu in education:
+            if isinstance(edu, dict):
+                degree = edu.get('degree', '')
+                school = edu.get('school', '')
+                year = edu.get('year', '')
+                education_text += f"{degree} from {school} ({year})\n"
+            else:
+                education_text += f"{edu}\n"
+    else:
+        education_text = str(education)
+    
+    # Create the prompt
+    return f"""
         Based on the following resume information, create a candidate persona profile:
         
         Skills: {', '.join(skills) if isinstance(skills, list) else skills}
@@ -87,32 +98,71 @@ def generate_candidate_persona(parsed_data):
         
         Format your response as a valid JSON object without any additional text.
         """
+
+def parse_persona_response(content):
+    """
+    Turn the model's JSON answer into a persona object
+    
+    Args:
+        content (str): The message content returned by the model
         
-        # Get the response from OpenAI 
-        # the newest OpenAI model is "gpt-4o" which was released May 13, 2024.
-        # do not change this unless explicitly requested by the user
-        response = client.chat.completions.create(
-            model="gpt-4o",
-            messages=[{"role": "user", "content": prompt}],
-            response_format={"type": "json_object"}
-        )
+    Returns:
+        dict: A persona object with ideal_roles, key_strengths, growth_areas, and team_fit
+    """
+    result = json.loads(content)
+    return {
+        "ideal_roles": result.get("ideal_roles", []),
+        "key_strengths": result.get("key_strengths", []),
+        "growth_areas": result.get("growth_areas", []),
+        "team_fit": result.get("team_fit", "")
+    }
+
+def request_candidate_persona(parsed_data):
+    """
+    Ask OpenAI for a candidate persona without swallowing errors
+    
+    Used by the background persona workers, which need to know when a call
+    failed so they can leave the candidate for a retry instead of storing
+    an error persona.
+    
+    Args:
+        parsed_data (dict): The parsed resume data
         
-        # Parse the response
-        result = json.loads(response.choices[0].message.content)
+    Returns:
+        dict: A persona object with ideal_roles, key_strengths, growth_areas, and team_fit
+    """
+    # Check if OpenAI API key is available
+    api_key = os.environ.get('OPENAI_API_KEY')
+    
+    if not api_key:
+        logger.warning("OpenAI API key not found - returning default persona")
+        return default_persona()
+    
+    client = get_openai_client()
+    
+    # Get the response from OpenAI 
+    response = client.chat.completions.create(
+        model=PERSONA_MODEL,
+        messages=[{"role": "user", "content": build_persona_prompt(parsed_data)}],
+        response_format={"type": "json_object"}
+    )
+    
+    # Parse the response
+    return parse_persona_response(response.choices[0].message.content)
+
+def generate_candidate_persona(parsed_data):
+    """
+    Generate a candidate persona profile using OpenAI
+    
+    Args:
+        parsed_data (dict): The parsed resume data
         
-        # Return the persona
-        return {
-            "ideal_roles": result.get("ideal_roles", []),
-            "key_strengths": result.get("key_strengths", []),
-            "growth_areas": result.get("growth_areas", []),
-            "team_fit": result.get("team_fit", "")
-        }
+    Returns:
+        dict: A persona object with ideal_roles, key_strengths, growth_areas, and team_fit
+    """
+    try:
+        return request_candidate_persona(parsed_data)
         
     except Exception as e:
         logger.error(f"Error generating candidate persona: {str(e)}")
-        return {
-            "ideal_roles": [],
-            "key_strengths": [],
-            "growth_areas": [],
-            "team_fit": f"Error during analysis: {str(e)}"
-        }
\ No newline at end of file
+        return default_persona(f"Error during analysis: {str(e)}")
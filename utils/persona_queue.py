@@ -0,0 +1,119 @@
+"""
+Persona Queue - Generates candidate personas in the background.
+
+This module provides functions to:
+1. Queue persona generation when a candidate is ingested
+2. Run the OpenAI persona calls as 'persona' jobs on the durable ingestion queue
+3. Report whether a candidate's persona is ready, pending or failed
+"""
+
+import logging
+from models import db, Candidate, IngestionJob
+from utils.persona_generator import request_candidate_persona, default_persona
+from utils.job_queue import enqueue_job, register_handler, get_queue_metrics as get_job_queue_metrics
+from utils.db_routing import read_from_primary
+
+logger = logging.getLogger(__name__)
+
+def enqueue_persona(candidate_id):
+    """
+    Queue persona generation for a candidate
+
+    Args:
+        candidate_id: The ID of the candidate
+
+    Returns:
+        bool: True if queued, False if the candidate was already waiting
+    """
+    # A job queued moments ago may not have reached the replica yet
+    read_from_primary()
+    waiting = IngestionJob.query.filter(
+        IngestionJob.kind == 'persona',
+        IngestionJob.candidate_id == candidate_id,
+        IngestionJob.status.in_(['queued', 'running'])
+    ).first()
+    if waiting:
+        return False
+
+    enqueue_job('persona', {'candidate_id': candidate_id}, candidate_id=candidate_id)
+    logger.debug(f"Queued persona generation for candidate {candidate_id}")
+    return True
+
+def get_persona_status(candidate):
+    """
+    Get the persona generation status for a candidate
+
+    Args:
+        candidate: The Candidate object
+
+    Returns:
+        str: 'ready', 'pending', 'failed' or 'missing'
+    """
+    if candidate.persona:
+        return 'ready'
+
+    # 'missing' makes callers queue a job, so the persona and its jobs are read from
+    # the primary: a lagging replica may not have the ones written moments ago
+    if read_from_primary():
+        db.session.refresh(candidate, ['persona'])
+        if candidate.persona:
+            return 'ready'
+
+    latest = IngestionJob.query.filter_by(kind='persona', candidate_id=candidate.id) \
+        .order_by(IngestionJob.id.desc()).first()
+    if not latest:
+        # The resume job queues the persona once the resume has been parsed
+        parsing = IngestionJob.query.filter(
+            IngestionJob.kind == 'resume',
+            IngestionJob.candidate_id == candidate.id,
+            IngestionJob.status.in_(['queued', 'running'])
+        ).first()
+        return 'pending' if parsing else 'missing'
+    if latest.status in ('queued', 'running'):
+        return 'pending'
+    if latest.status == 'failed':
+        return 'failed'
+
+    return 'missing'
+
+def pending_persona(status='pending'):
+    """Placeholder persona returned while generation has not finished"""
+    persona = default_persona("Persona is being generated")
+    persona['status'] = status
+    return persona
+
+def get_queue_metrics():
+    """
+    Get counters for persona jobs
+
+    Returns:
+        dict: Persona job counts by status and the age of the oldest waiting job
+    """
+    metrics = get_job_queue_metrics(kinds=['persona'])
+    return {
+        'jobs': metrics['jobs'].get('persona', {}),
+        'oldest_queued_seconds': metrics['oldest_queued_seconds']
+    }
+
+def generate_persona_job(job):
+    """
+    Queue handler for 'persona' jobs
+
+    Errors propagate so the queue retries the job with backoff.
+
+    Args:
+        job: The claimed IngestionJob
+
+    Returns:
+        dict: Whether a persona was generated
+    """
+    candidate = db.session.get(Candidate, job.payload['candidate_id'])
+    if not candidate or candidate.persona:
+        return {'generated': False}
+
+    candidate.persona = request_candidate_persona(candidate.parsed_data)
+    db.session.commit()
+    logger.debug(f"Generated persona for candidate {candidate.id}")
+    return {'generated': True}
+
+register_handler('persona', generate_persona_job)
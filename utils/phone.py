@@ -0,0 +1,56 @@
+"""
+Phone - Normalize phone numbers for duplicate detection.
+
+This module provides functions to:
+1. Normalize a phone number as typed into an E.164-style string (+ and digits only)
+2. Apply a default country code to national numbers, so "555-123-4567" and "+1 555 123 4567" compare equal
+"""
+
+import os
+import re
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Country calling code assumed for numbers written without one
+DEFAULT_PHONE_COUNTRY_CODE = os.environ.get('DEFAULT_PHONE_COUNTRY_CODE', '1').lstrip('+')
+# E.164 allows at most 15 digits; fewer than 7 is not a phone number
+MIN_PHONE_DIGITS = 7
+MAX_PHONE_DIGITS = 15
+# A trailing extension ("x 89", "ext. 89", "#89") is not part of the number
+EXTENSION_PATTERN = re.compile(r'\s*(?:ext\.?|extension|x|#)\s*\d+\s*$', re.IGNORECASE)
+
+def normalize_phone(phone):
+    """
+    Normalize a phone number to +<country code><number>
+
+    Extensions, spaces, dashes, dots and parentheses are dropped. Numbers that
+    start with + or 00 keep their country code; other numbers are national and
+    get DEFAULT_PHONE_COUNTRY_CODE, unless they already start with it and are
+    one code longer than a national number (e.g. 1 555 123 4567).
+
+    Args:
+        phone: The phone number as entered
+
+    Returns:
+        str: The normalized number, or None if it has too few or too many digits
+    """
+    if not phone:
+        return None
+
+    phone = EXTENSION_PATTERN.sub('', phone.strip())
+    digits = re.sub(r'\D', '', phone)
+    if phone.startswith('+'):
+        normalized = digits
+    elif digits.startswith('00'):
+        normalized = digits[2:]
+    elif digits.startswith(DEFAULT_PHONE_COUNTRY_CODE) and len(digits) == 10 + len(DEFAULT_PHONE_COUNTRY_CODE):
+        normalized = digits
+    else:
+        # Drop a national trunk prefix (e.g. 020 ... in the UK)
+        normalized = DEFAULT_PHONE_COUNTRY_CODE + digits.lstrip('0')
+
+    if not MIN_PHONE_DIGITS <= len(normalized) <= MAX_PHONE_DIGITS:
+        logger.debug(f"Not normalizing phone number with {len(digits)} digits")
+        return None
+    return '+' + normalized
@@ -0,0 +1,108 @@
+"""
+Resume Files - Recognizes resumes that have already been processed.
+
+This module provides functions to:
+1. Find the candidate an identical file (same sha256) was already processed into
+2. Record each processed file with its candidate and extracted text
+3. Remove a duplicate upload from disk once it has been recognized, unless a resume still uses the file
+"""
+
+import os
+import logging
+from sqlalchemy.exc import IntegrityError
+from models import db, Candidate, ResumeFile
+
+logger = logging.getLogger(__name__)
+
+def find_resume_file(sha256):
+    """
+    Look up a processed resume by content hash
+
+    Args:
+        sha256: Hex sha256 of the file's bytes
+
+    Returns:
+        ResumeFile: The processed file, or None if these bytes were never processed
+    """
+    if not sha256:
+        return None
+    return ResumeFile.query.filter_by(sha256=sha256).first()
+
+def find_duplicate_candidate(sha256):
+    """
+    Find the candidate an identical file was already processed into
+
+    Args:
+        sha256: Hex sha256 of the file's bytes
+
+    Returns:
+        Candidate: The existing candidate, or None
+    """
+    resume_file = find_resume_file(sha256)
+    if not resume_file or not resume_file.candidate_id:
+        return None
+    return db.session.get(Candidate, resume_file.candidate_id)
+
+def record_resume_file(stored, candidate_id, text, method):
+    """
+    Remember a processed file so identical uploads can skip the pipeline
+
+    Args:
+        stored: Upload details (sha256, size, file_type, filename) from save_upload
+        candidate_id: The candidate the file was processed into
+        text: The extracted text
+        method: How the text was extracted (see extract_document_text)
+
+    Returns:
+        ResumeFile: The stored record, or None if it could not be saved
+    """
+    try:
+        resume_file = find_resume_file(stored['sha256'])
+        if resume_file is None:
+            resume_file = ResumeFile(sha256=stored['sha256'])
+            db.session.add(resume_file)
+
+        resume_file.size = stored.get('size')
+        resume_file.file_type = stored.get('file_type')
+        resume_file.filename = stored.get('filename')
+        resume_file.candidate_id = candidate_id
+        resume_file.extracted_text = text
+        resume_file.extraction_method = method
+        db.session.commit()
+        return resume_file
+    except IntegrityError:
+        # Another worker recorded the same file first
+        db.session.rollback()
+        logger.debug(f"Resume file {stored['sha256'][:12]} was already recorded")
+        return find_resume_file(stored['sha256'])
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"Error recording resume file: {str(e)}")
+        return None
+
+def discard_upload(stored):
+    """
+    Delete an upload that turned out to be a duplicate, unless the file is in use
+
+    An identical upload under the same name reuses the stored file, so the
+    file may be the one a processed resume (and its candidate) points at;
+    such files are kept.
+
+    Args:
+        stored: Upload details from save_upload
+
+    Returns:
+        bool: True if the file was deleted
+    """
+    if stored.get('reused'):
+        return False
+    resume_file = find_resume_file(stored.get('sha256'))
+    if resume_file and resume_file.filename == stored['filename']:
+        return False
+
+    try:
+        os.remove(stored['local_path'])
+        return True
+    except OSError as e:
+        logger.error(f"Error removing duplicate upload {stored['filename']}: {str(e)}")
+        return False
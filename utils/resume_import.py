@@ -0,0 +1,323 @@
+"""
+Resume Import - Imports a directory of resumes through the ingestion queue.
+
+This module provides functions to:
+1. Walk a directory and queue every resume in it as a 'resume' ingestion job
+2. Keep a manifest of queued, done, duplicate, rejected and failed files so an interrupted import resumes
+3. Follow the jobs to completion and summarize throughput and per-stage latency
+"""
+
+import os
+import json
+import time
+import logging
+from datetime import datetime
+from models import db, Candidate, IngestionJob, Recruiter, UploadBatch
+from utils.job_queue import enqueue_job, notify_workers
+from utils.upload_batches import create_batch, PIPELINE_STAGES
+from utils.upload_storage import save_upload_stream, describe_stored_file, UploadRejected, UPLOAD_DIR
+from utils.resume_files import find_duplicate_candidate, discard_upload
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_WORKDIR = 'imports'
+# Jobs enqueued per commit, and job ids per status query
+ENQUEUE_CHUNK = 100
+POLL_CHUNK = 500
+# Upper bounds (ms) of the latency histogram buckets
+HISTOGRAM_BUCKETS = [100, 250, 500, 1000, 2500, 5000, 10000, 30000, 60000]
+
+# Stages with timings; 'queued' is time spent waiting for a worker
+TIMED_STAGES = [stage for stage in PIPELINE_STAGES if stage not in ('done', 'failed')]
+
+def _percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+def latency_histogram(values):
+    """
+    Count latencies into HISTOGRAM_BUCKETS
+
+    Args:
+        values: Latencies in milliseconds
+
+    Returns:
+        list: (label, count) pairs, the last bucket catching everything slower
+    """
+    counts = [0] * (len(HISTOGRAM_BUCKETS) + 1)
+    for value in values:
+        index = next((i for i, bound in enumerate(HISTOGRAM_BUCKETS) if value <= bound), len(HISTOGRAM_BUCKETS))
+        counts[index] += 1
+
+    labels = [f"<= {bound / 1000:g}s" if bound >= 1000 else f"<= {bound}ms" for bound in HISTOGRAM_BUCKETS]
+    labels.append(f"> {HISTOGRAM_BUCKETS[-1] / 1000:g}s")
+    return list(zip(labels, counts))
+
+class ResumeImport:
+    """
+    One import of a directory of resumes.
+
+    State lives in <workdir>/<run_id>/manifest.json, keyed by path relative to
+    the directory. It is rewritten after every step, so calling run() again with
+    the same run_id skips finished files, keeps following jobs that were already
+    queued and picks up new or changed files.
+    """
+
+    def __init__(self, directory, recruiter_email, run_id=None, workdir=None, limit=None, retry_failed=False):
+        self.directory = os.path.abspath(directory)
+        self.run_id = run_id or f"import-{datetime.utcnow().strftime('%Y%m%d%H%M%S')}"
+        self.run_dir = os.path.join(workdir or DEFAULT_WORKDIR, self.run_id)
+        self.manifest_path = os.path.join(self.run_dir, 'manifest.json')
+        self.limit = limit
+        self.retry_failed = retry_failed
+        os.makedirs(self.run_dir, exist_ok=True)
+
+        self.recruiter = Recruiter.query.filter_by(email=recruiter_email).first()
+        if not self.recruiter:
+            raise ValueError(f"No recruiter with email {recruiter_email}")
+
+        self.state = self._load_manifest() or {
+            'run_id': self.run_id,
+            'directory': self.directory,
+            'recruiter_id': self.recruiter.id,
+            'batch_id': None,
+            'created_at': datetime.utcnow().isoformat(),
+            'files': {}
+        }
+        self.session_started = time.time()
+        self.session_finished = 0
+
+    def _load_manifest(self):
+        if not os.path.exists(self.manifest_path):
+            return None
+        with open(self.manifest_path) as f:
+            return json.load(f)
+
+    def save_manifest(self):
+        tmp_path = self.manifest_path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(self.state, f, indent=2)
+        os.replace(tmp_path, self.manifest_path)
+
+    def _finish(self, entry, status, **fields):
+        entry.update(status=status, finished_at=datetime.utcnow().isoformat(), **fields)
+        self.session_finished += 1
+
+    def scan(self):
+        """
+        Add new and changed files to the manifest as pending
+
+        Returns:
+            int: Number of files pending
+        """
+        files = self.state['files']
+        for root, dirs, names in os.walk(self.directory):
+            # Hidden directories and in-progress uploads are skipped
+            dirs[:] = sorted(name for name in dirs if not name.startswith('.'))
+            for name in sorted(names):
+                if name.startswith('.'):
+                    continue
+                path = os.path.join(root, name)
+                relative = os.path.relpath(path, self.directory)
+                stat = os.stat(path)
+                entry = files.get(relative)
+                if entry and entry['size'] == stat.st_size and entry['mtime'] == stat.st_mtime:
+                    if entry['status'] == 'failed' and self.retry_failed:
+                        entry.update(status='pending', error=None)
+                    continue
+                files[relative] = {'status': 'pending', 'size': stat.st_size, 'mtime': stat.st_mtime}
+
+        self.save_manifest()
+        return sum(1 for entry in files.values() if entry['status'] == 'pending')
+
+    def _stored_file(self, relative):
+        """
+        Hash a file in place if it is already in the uploads directory, or copy it there
+
+        Returns:
+            tuple: (stored, in_place)
+        """
+        path = os.path.join(self.directory, relative)
+        if os.path.dirname(os.path.realpath(path)) == os.path.realpath(UPLOAD_DIR):
+            return describe_stored_file(os.path.join(UPLOAD_DIR, os.path.basename(path))), True
+        with open(path, 'rb') as f:
+            return save_upload_stream(f, os.path.basename(path)), False
+
+    def enqueue(self):
+        """
+        Queue pending files as 'resume' jobs in this import's upload batch
+
+        Returns:
+            int: Number of files queued
+        """
+        files = self.state['files']
+        pending = [relative for relative, entry in files.items() if entry['status'] == 'pending']
+        if self.limit is not None:
+            pending = pending[:self.limit]
+        if not pending:
+            return 0
+
+        # Files that existing candidates were created from, before resumes were hashed
+        existing = dict(db.session.query(Candidate.resume_file, Candidate.id).filter(Candidate.resume_file.isnot(None)))
+        # sha256 -> path of files already queued or processed by this import
+        seen = {entry['sha256']: relative for relative, entry in files.items()
+                if entry.get('sha256') and entry['status'] in ('queued', 'done')}
+
+        batch = db.session.get(UploadBatch, self.state['batch_id']) if self.state['batch_id'] else None
+        queued = 0
+        for index, relative in enumerate(pending, 1):
+            entry = files[relative]
+            try:
+                stored, in_place = self._stored_file(relative)
+            except UploadRejected as e:
+                self._finish(entry, 'rejected', error=str(e))
+                continue
+            except OSError as e:
+                self._finish(entry, 'failed', error=str(e))
+                continue
+            entry['sha256'] = stored['sha256']
+
+            duplicate = find_duplicate_candidate(stored['sha256'])
+            if duplicate is None and in_place and stored['filename'] in existing:
+                duplicate = db.session.get(Candidate, existing[stored['filename']])
+            if duplicate is not None or stored['sha256'] in seen:
+                discard_upload(stored)
+                if duplicate is not None:
+                    self._finish(entry, 'duplicate', candidate_id=duplicate.id)
+                else:
+                    self._finish(entry, 'duplicate', duplicate_of=seen[stored['sha256']])
+                continue
+            seen[stored['sha256']] = relative
+
+            if batch is None:
+                batch = create_batch(self.recruiter.id, 0)
+                self.state['batch_id'] = batch.id
+            job = enqueue_job('resume', stored, recruiter_id=self.recruiter.id, batch_id=batch.id, commit=False)
+            db.session.flush()
+            entry.update(status='queued', job_id=job.id, filename=stored['filename'])
+            batch.total_files += 1
+            queued += 1
+
+            # Commit before the manifest records the job ids, so they always exist
+            if index % ENQUEUE_CHUNK == 0:
+                db.session.commit()
+                notify_workers()
+                self.save_manifest()
+
+        db.session.commit()
+        notify_workers()
+        self.save_manifest()
+        return queued
+
+    def poll(self):
+        """
+        Record the outcome of queued jobs that have finished
+
+        Returns:
+            int: Number of files still queued
+        """
+        files = self.state['files']
+        by_job = {entry['job_id']: entry for entry in files.values() if entry['status'] == 'queued'}
+        job_ids = list(by_job)
+
+        found = set()
+        for start in range(0, len(job_ids), POLL_CHUNK):
+            rows = db.session.query(
+                IngestionJob.id, IngestionJob.status, IngestionJob.result, IngestionJob.timings,
+                IngestionJob.last_error, IngestionJob.candidate_id
+            ).filter(IngestionJob.id.in_(job_ids[start:start + POLL_CHUNK])).all()
+            for job_id, status, result, timings, last_error, candidate_id in rows:
+                found.add(job_id)
+                entry = by_job[job_id]
+                if status == 'succeeded':
+                    result = result or {}
+                    self._finish(
+                        entry, 'duplicate' if result.get('duplicate') else 'done',
+                        candidate_id=result.get('candidate_id', candidate_id),
+                        extraction=result.get('extraction'),
+                        parse_source=result.get('parse_source'),
+                        timings=timings or {}
+                    )
+                elif status == 'failed':
+                    self._finish(entry, 'failed', error=last_error, timings=timings or {})
+
+        # A job that no longer exists (for example a reset database) is queued again
+        for job_id in set(job_ids) - found:
+            by_job[job_id].update(status='pending', job_id=None)
+
+        db.session.remove()
+        self.save_manifest()
+        return sum(1 for entry in files.values() if entry['status'] == 'queued')
+
+    def wait(self, poll_interval=2.0, progress=None):
+        """
+        Poll until every queued file has finished
+
+        Args:
+            poll_interval: Seconds between polls
+            progress: Optional callable given the counts by status after each poll
+        """
+        while True:
+            remaining = self.poll()
+            if progress:
+                progress(self.counts())
+            if not remaining:
+                return
+            time.sleep(poll_interval)
+
+    def counts(self):
+        """Number of files in the manifest by status"""
+        counts = {}
+        for entry in self.state['files'].values():
+            counts[entry['status']] = counts.get(entry['status'], 0) + 1
+        return counts
+
+    def report(self):
+        """
+        Summarize the import: counts by status, this session's throughput and
+        per-stage latency over every processed file ('processing' is all stages
+        after the queue)
+
+        Returns:
+            dict: The report
+        """
+        elapsed = time.time() - self.session_started
+        processed = [entry for entry in self.state['files'].values() if entry['status'] == 'done']
+
+        stages = {}
+        for stage in TIMED_STAGES + ['processing']:
+            if stage == 'processing':
+                values = [sum(ms for name, ms in entry['timings'].items() if name != 'queued')
+                          for entry in processed if entry.get('timings')]
+            else:
+                values = [entry['timings'][stage] for entry in processed if stage in (entry.get('timings') or {})]
+            if not values:
+                continue
+            stages[stage] = {
+                'files': len(values),
+                'avg_ms': round(sum(values) / len(values), 1),
+                'p50_ms': round(_percentile(values, 0.5), 1),
+                'p95_ms': round(_percentile(values, 0.95), 1),
+                'max_ms': round(max(values), 1),
+                'histogram': latency_histogram(values)
+            }
+
+        return {
+            'run_id': self.run_id,
+            'batch_id': self.state['batch_id'],
+            'counts': self.counts(),
+            'session_seconds': round(elapsed, 1),
+            'session_files': self.session_finished,
+            'files_per_minute': round(self.session_finished / elapsed * 60, 1) if elapsed > 0 else None,
+            'extraction': self._tally(processed, 'extraction'),
+            'parse_source': self._tally(processed, 'parse_source'),
+            'stages': stages
+        }
+
+    @staticmethod
+    def _tally(entries, key):
+        tally = {}
+        for entry in entries:
+            value = entry.get(key) or 'unknown'
+            tally[value] = tally.get(value, 0) + 1
+        return tally
@@ -1,34 +1,35 @@
 # utils/resume_parser.py
+import time
 import logging
-from io import BytesIO
+import threading
 import json
-import openai
-from PIL import Image
-import pytesseract
+from utils.http_clients import get_openai_client
+from utils.text_compaction import compact_text, compact_for_embedding
+from utils.heuristic_parser import parse_resume_locally, HEURISTIC_PARSE_THRESHOLD
+from utils.document_text import extract_document_text
 
 logger = logging.getLogger(__name__)
 
-def extract_text_from_file(file_content, file_type):
-    """Extract text from various file types"""
-    text = ""
-    
+# Settings for the resume parsing calls made while ingesting uploads
+RESUME_PARSER_MODEL = "gpt-3.5-turbo"  # Use cheaper model to avoid rate limits
+RESUME_PARSER_MAX_TOKENS = 500
+RESUME_PARSER_PROMPT = "You are a resume parser. Extract the following information from the resume text and return it as JSON: skills (list), experience (list of jobs with company, title, years), education (list of degrees with school, degree, field, year), summary (brief overview). Format all text properly and ensure lists are well-structured."
+EMBEDDING_MODEL = "text-embedding-3-small"
+
+# Parse counts and latency per source ('heuristic', 'llm' or 'fallback')
+_parse_lock = threading.Lock()
+_parse_stats = {}
+
+def extract_text_from_file(file_content, file_type=None):
+    """
+    Extract text from various file types
+
+    The type is detected from the content; file_type (the upload's extension)
+    is only used in log messages.
+    """
     try:
-        if file_type in ['png', 'jpg', 'jpeg']:
-            # Extract text from image using OCR
-            img = Image.open(BytesIO(file_content))
-            text = pytesseract.image_to_string(img)
-        elif file_type == 'pdf':
-            # For PDF, we'd normally use PyPDF2 or similar
-            # Since we can't install additional packages, we'll return a placeholder
-            text = "PDF content extraction requires additional libraries."
-        elif file_type == 'docx':
-            # For DOCX, we'd normally use python-docx
-            # Since we can't install additional packages, we'll return a placeholder
-            text = "DOCX content extraction requires additional libraries."
-        else:
-            # Assume it's text
-            text = file_content.decode('utf-8', errors='ignore')
-            
+        text, method = extract_document_text(file_content)
+        logger.debug(f"Extracted text from {file_type or 'file'} ({method})")
     except Exception as e:
         logger.error(f"Text extraction failed: {str(e)}")
         text = "Failed to extract text from file."
@@ -40,7 +41,7 @@ def analyze_resume(text):
     try:
         # The newest OpenAI model is "gpt-4o" which was released May 13, 2024.
         # do not change this unless explicitly requested by the user
-        analysis = openai.chat.completions.create(
+        analysis = get_openai_client().chat.completions.create(
             model="gpt-4o",
             messages=[{
                 "role": "system",
@@ -55,13 +56,13 @@ def analyze_resume(text):
                 """
             }, {
                 "role": "user",
-                "content": text
+                "content": compact_text(text)
             }],
             response_format={"type": "json_object"}
         )
         
         resume_data = json.loads(analysis.choices[0].message.content)
-        return resume_data
+        return normalize_resume_data(resume_data)
         
     except Exception as e:
         logger.error(f"Resume analysis failed: {str(e)}")
@@ -75,9 +76,9 @@ def analyze_resume(text):
 def generate_embedding(text):
     """Generate embedding vector for the text using OpenAI"""
     try:
-        embedding_response = openai.embeddings.create(
-            input=text,
-            model="text-embedding-3-small"
+        embedding_response = get_openai_client().embeddings.create(
+            input=compact_for_embedding(text),
+            model=EMBEDDING_MODEL
         )
         
         return embedding_response.data[0].embedding
@@ -85,3 +86,111 @@ def generate_embedding(text):
     except Exception as e:
         logger.error(f"Embedding generation failed: {str(e)}")
         return []
+
+def _record_parse(source, started):
+    elapsed_ms = (time.time() - started) * 1000
+    with _parse_lock:
+        stats = _parse_stats.setdefault(source, {'count': 0, 'total_ms': 0.0, 'max_ms': 0.0})
+        stats['count'] += 1
+        stats['total_ms'] += elapsed_ms
+        stats['max_ms'] = max(stats['max_ms'], elapsed_ms)
+
+def request_resume_analysis(text):
+    """
+    Parse resume text with OpenAI
+
+    Args:
+        text: The resume text
+
+    Returns:
+        dict: The parsed resume data
+
+    Raises:
+        Exception: If the API call fails or returns invalid JSON
+    """
+    analysis = get_openai_client().chat.completions.create(
+        model=RESUME_PARSER_MODEL,
+        messages=[{
+            "role": "system",
+            "content": RESUME_PARSER_PROMPT
+        }, {
+            "role": "user",
+            "content": compact_text(text)
+        }],
+        response_format={"type": "json_object"},
+        max_tokens=RESUME_PARSER_MAX_TOKENS
+    )
+    return json.loads(analysis.choices[0].message.content)
+
+# Education keys written by one parse source and read under the other's name:
+# the local parser writes institution/years, the LLM school/year
+EDUCATION_KEY_ALIASES = (('institution', 'school'), ('years', 'year'))
+
+def normalize_resume_data(resume_data):
+    """
+    Give every education entry both spellings of its school and year keys,
+    so the candidate page (institution, years) and persona prompts (school, year)
+    read the same entries whichever source parsed them
+
+    Args:
+        resume_data: Parsed resume data, changed in place
+
+    Returns:
+        dict: The same resume data
+    """
+    education = resume_data.get('education') if isinstance(resume_data, dict) else None
+    if isinstance(education, list):
+        for entry in education:
+            if not isinstance(entry, dict):
+                continue
+            for first, second in EDUCATION_KEY_ALIASES:
+                value = entry.get(first) or entry.get(second)
+                entry[first] = entry[second] = value
+    return resume_data
+
+def parse_resume_text(text):
+    """
+    Parse resume text locally and only escalate to OpenAI when the local parse is unsure
+
+    Args:
+        text: The resume text
+
+    Returns:
+        tuple: (resume_data, source) where source is 'heuristic', 'llm', or
+               'fallback' when the OpenAI call failed and the local parse was used
+    """
+    started = time.time()
+    local = parse_resume_locally(text)
+
+    if local['confidence'] >= HEURISTIC_PARSE_THRESHOLD:
+        logger.debug(f"Parsed resume locally (confidence {local['confidence']})")
+        _record_parse('heuristic', started)
+        return normalize_resume_data(local['resume_data']), 'heuristic'
+
+    try:
+        logger.debug(f"Escalating resume to OpenAI (local confidence {local['confidence']})")
+        resume_data = request_resume_analysis(text)
+        _record_parse('llm', started)
+        return normalize_resume_data(resume_data), 'llm'
+
+    except Exception as e:
+        logger.error(f"OpenAI resume analysis failed: {str(e)}")
+        _record_parse('fallback', started)
+        return normalize_resume_data(local['resume_data']), 'fallback'
+
+def get_parser_metrics():
+    """
+    Get resume parse counts and latency by source since startup
+
+    Returns:
+        dict: Per-source count, average and maximum latency in milliseconds
+    """
+    with _parse_lock:
+        return {
+            source: {
+                'count': stats['count'],
+                'avg_ms': round(stats['total_ms'] / stats['count'], 1),
+                'max_ms': round(stats['max_ms'], 1)
+            }
+            for source, stats in _parse_stats.items()
+        }
@@ -49,6 +49,7 @@ PERMISSIONS = {
     # System
     'audits:view': 'View audit logs',
     'settings:edit': 'Edit system settings',
+    'system:metrics': 'View system performance metrics',
 }
 
 # Default role definitions
@@ -62,7 +63,7 @@ DEFAULT_ROLES = {
             'candidates:delete', 'candidates:rate', 'candidates:generate_persona',
             'matches:refresh',
             'notes:create', 'notes:view', 'notes:edit', 'notes:delete', 'notes:delete_any',
-            'audits:view', 'settings:edit'
+            'audits:view', 'settings:edit', 'system:metrics'
         ],
         'inherits': None
     },
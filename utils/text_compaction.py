@@ -0,0 +1,227 @@
+"""
+Text Compaction - Shrinks resume and job text before it is sent to OpenAI.
+
+This module provides functions to:
+1. Estimate token counts offline, without calling a tokenizer service
+2. Normalize whitespace and strip OCR noise, boilerplate and duplicate lines
+3. Fit the remaining sections into a token budget instead of slicing by characters
+"""
+
+import os
+import re
+import math
+import logging
+import unicodedata
+
+logger = logging.getLogger(__name__)
+
+# Token budgets for each kind of call (override through the environment)
+RESUME_TOKEN_BUDGET = int(os.environ.get('RESUME_TOKEN_BUDGET', 2000))
+JOB_TOKEN_BUDGET = int(os.environ.get('JOB_TOKEN_BUDGET', 1500))
+EMBEDDING_TOKEN_BUDGET = int(os.environ.get('EMBEDDING_TOKEN_BUDGET', 300))
+
+# Word pieces and punctuation runs, roughly the units a BPE tokenizer splits on
+TOKEN_PATTERN = re.compile(r"[A-Za-z]+|\d+|[^\sA-Za-z\d]")
+
+SECTION_HEADERS = re.compile(
+    r"^(professional\s+|work\s+|technical\s+|key\s+|core\s+|career\s+)?"
+    r"(summary|profile|objective|experience|employment(\s+history)?|history|education|"
+    r"qualifications|skills|competencies|projects|certifications?|achievements|"
+    r"accomplishments|awards|publications|languages|interests|training|courses|"
+    r"responsibilities|expertise)\s*:?$",
+    re.IGNORECASE
+)
+
+BOILERPLATE_PATTERNS = [
+    re.compile(r"^(page\s*)?\d+\s*(of|/)\s*\d+$", re.IGNORECASE),
+    re.compile(r"^page\s*\d+$", re.IGNORECASE),
+    re.compile(r"^(curriculum\s+vitae|resume|résumé|cv)$", re.IGNORECASE),
+    re.compile(r"^references?( are)? available (up)?on request\.?$", re.IGNORECASE),
+    re.compile(r"^confidential$", re.IGNORECASE),
+    re.compile(r"^i hereby declare\b.*", re.IGNORECASE),
+    re.compile(r"^(date|place)\s*:.*$", re.IGNORECASE),
+]
+
+# Characters that OCR tends to emit for rules, bullets and table borders
+NOISE_LINE = re.compile(r"^[\W_]{1,}$")
+REPEATED_PUNCTUATION = re.compile(r"([^\w\s])\1{2,}")
+INLINE_WHITESPACE = re.compile(r"[ \t\f\v ]+")
+
+def estimate_tokens(text):
+    """
+    Approximate the number of tokens OpenAI models will count for the text
+
+    Letter runs cost about one token per four characters, digit runs one per
+    three, and each punctuation mark one token. It is meant for budgeting
+    prompts, not as an exact tokenizer.
+
+    Args:
+        text: The text to measure
+
+    Returns:
+        int: Estimated token count
+    """
+    if not text:
+        return 0
+
+    tokens = 0
+    for piece in TOKEN_PATTERN.findall(text):
+        if piece[0].isalpha():
+            tokens += max(1, math.ceil(len(piece) / 4))
+        elif piece[0].isdigit():
+            tokens += max(1, math.ceil(len(piece) / 3))
+        else:
+            tokens += 1
+    return tokens
+
+def normalize_text(text):
+    """
+    Clean up whitespace and OCR artifacts line by line
+
+    Args:
+        text: Raw extracted text
+
+    Returns:
+        list: Cleaned, non-empty lines
+    """
+    text = unicodedata.normalize('NFKC', text or '')
+    text = text.replace('\r\n', '\n').replace('\r', '\n')
+
+    lines = []
+    for raw_line in text.split('\n'):
+        # Drop control characters left behind by binary decodes and OCR
+        line = ''.join(ch for ch in raw_line if ch == '\t' or unicodedata.category(ch)[0] != 'C')
+        line = REPEATED_PUNCTUATION.sub(r'\1', line)
+        line = INLINE_WHITESPACE.sub(' ', line).strip()
+
+        if not line or NOISE_LINE.match(line):
+            continue
+        lines.append(line)
+
+    return lines
+
+def is_boilerplate(line):
+    """Check whether a line carries no information for parsing or matching"""
+    return any(pattern.match(line) for pattern in BOILERPLATE_PATTERNS)
+
+def remove_duplicates(lines):
+    """
+    Drop repeated lines such as page headers and footers, keeping the first occurrence
+
+    Args:
+        lines: List of cleaned lines
+
+    Returns:
+        list: Lines with duplicates removed
+    """
+    seen = set()
+    unique = []
+    for line in lines:
+        key = re.sub(r'\W+', ' ', line).strip().lower()
+        if key in seen and not SECTION_HEADERS.match(line):
+            continue
+        seen.add(key)
+        unique.append(line)
+    return unique
+
+def split_sections(lines):
+    """
+    Group lines under the resume section header that precedes them
+
+    Args:
+        lines: List of cleaned lines
+
+    Returns:
+        list: (header, lines) tuples; the first header is None for the contact block
+    """
+    sections = [(None, [])]
+    for line in lines:
+        if len(line) <= 40 and SECTION_HEADERS.match(line):
+            sections.append((line, []))
+        else:
+            sections[-1][1].append(line)
+    return [(header, body) for header, body in sections if header or body]
+
+def _allocate(sizes, budget):
+    """Share a budget so small sections stay whole and large ones split the rest evenly"""
+    allocation = [0] * len(sizes)
+    remaining = list(range(len(sizes)))
+    while remaining:
+        share = budget / len(remaining)
+        small = [i for i in remaining if sizes[i] <= share]
+        if not small:
+            for i in remaining:
+                allocation[i] = int(share)
+            break
+        for i in small:
+            allocation[i] = sizes[i]
+            budget -= sizes[i]
+            remaining.remove(i)
+    return allocation
+
+def _fit_lines(lines, budget):
+    """Keep whole lines from the top of a section until the budget runs out"""
+    kept = []
+    used = 0
+    for line in lines:
+        cost = estimate_tokens(line) + 1
+        if used + cost > budget:
+            # Partially keep a long line rather than dropping the whole thing
+            if not kept and budget > 0:
+                words = line.split()
+                while words and estimate_tokens(' '.join(words)) + 1 > budget:
+                    words = words[:max(1, len(words) * 3 // 4)] if len(words) > 1 else []
+                if words:
+                    kept.append(' '.join(words))
+            break
+        kept.append(line)
+        used += cost
+    return kept
+
+def compact_text(text, max_tokens=RESUME_TOKEN_BUDGET):
+    """
+    Normalize text and fit it into a token budget
+
+    Args:
+        text: Raw resume or job description text
+        max_tokens: Token budget for the result
+
+    Returns:
+        str: The compacted text
+    """
+    lines = remove_duplicates([line for line in normalize_text(text) if not is_boilerplate(line)])
+    sections = split_sections(lines)
+
+    # Header lines are always kept; the rest of the budget is shared by section bodies
+    header_cost = sum(estimate_tokens(header) + 1 for header, _ in sections if header)
+    body_sizes = [sum(estimate_tokens(line) + 1 for line in body) for _, body in sections]
+
+    if header_cost + sum(body_sizes) > max_tokens:
+        allocation = _allocate(body_sizes, max(0, max_tokens - header_cost))
+        sections = [
+            (header, _fit_lines(body, allocation[index]))
+            for index, (header, body) in enumerate(sections)
+        ]
+
+    output = []
+    for header, body in sections:
+        if header:
+            output.append(header)
+        output.extend(body)
+
+    compacted = '\n'.join(output)
+    logger.debug(f"Compacted text from ~{estimate_tokens(text)} to ~{estimate_tokens(compacted)} tokens")
+    return compacted
+
+def compact_for_embedding(text, max_tokens=EMBEDDING_TOKEN_BUDGET):
+    """
+    Compact text for an embeddings call
+
+    Args:
+        text: Raw resume or job description text
+        max_tokens: Token budget for the embedding input
+
+    Returns:
+        str: The compacted text
+    """
+    return compact_text(text, max_tokens)
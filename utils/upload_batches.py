@@ -0,0 +1,162 @@
+"""
+Upload Batches - Progress tracking for bulk resume uploads.
+
+This module provides functions to:
+1. Create an upload batch that groups the ingestion jobs of one bulk upload
+2. Summarize a batch: files per stage, per-file status, throughput and stage timings
+3. Stream batch progress as server-sent events until every file has finished
+"""
+
+import os
+import json
+import time
+import logging
+from datetime import datetime
+from models import db, UploadBatch, IngestionJob
+
+logger = logging.getLogger(__name__)
+
+# Seconds between database polls while streaming progress
+PROGRESS_POLL_INTERVAL = float(os.environ.get('UPLOAD_PROGRESS_POLL_INTERVAL', 1.0))
+# Longest a single progress stream stays open; the browser reconnects after this.
+# Each open stream holds a server worker thread, so keep this short
+PROGRESS_STREAM_SECONDS = int(os.environ.get('UPLOAD_PROGRESS_STREAM_SECONDS', 30))
+# Seconds of silence before a keepalive comment is sent to hold the connection open
+KEEPALIVE_SECONDS = 15
+
+PIPELINE_STAGES = ['queued', 'extracting', 'parsing', 'embedding', 'matching', 'done', 'failed']
+
+def create_batch(recruiter_id, total_files):
+    """
+    Create a batch for a bulk upload (committed with the jobs that reference it)
+
+    Args:
+        recruiter_id: The recruiter uploading the files
+        total_files: Number of files that were queued
+
+    Returns:
+        UploadBatch: The new batch, flushed so it has an id
+    """
+    batch = UploadBatch(recruiter_id=recruiter_id, total_files=total_files)
+    db.session.add(batch)
+    db.session.flush()
+    return batch
+
+def get_batch_status(batch):
+    """
+    Summarize the progress of an upload batch
+
+    Args:
+        batch: The UploadBatch object
+
+    Returns:
+        dict: Stage counts, per-file progress, throughput and average stage timings
+    """
+    jobs = IngestionJob.query.filter_by(batch_id=batch.id).order_by(IngestionJob.id).all()
+
+    counts = {stage: 0 for stage in PIPELINE_STAGES}
+    stage_totals = {}
+    files = []
+    for job in jobs:
+        stage = job.stage or 'queued'
+        counts[stage] = counts.get(stage, 0) + 1
+        for name, ms in (job.timings or {}).items():
+            stage_totals.setdefault(name, []).append(ms)
+
+        files.append({
+            'job_id': job.id,
+            'filename': (job.payload or {}).get('filename'),
+            'stage': stage,
+            'attempts': job.attempts,
+            'candidate_id': job.candidate_id,
+            'error': job.last_error if stage == 'failed' else None,
+            'timings': job.timings or {}
+        })
+
+    finished = counts['done'] + counts['failed']
+    complete = finished >= len(jobs)
+
+    # Throughput from the first file picked up to the last one finished (or now)
+    started = [job.started_at for job in jobs if job.started_at]
+    ended = [job.finished_at for job in jobs if job.finished_at]
+    elapsed = 0.0
+    if started:
+        end = max(ended) if complete and ended else datetime.utcnow()
+        elapsed = max(0.0, (end - min(started)).total_seconds())
+
+    return {
+        'batch_id': batch.id,
+        'total_files': len(jobs),
+        'finished': finished,
+        'succeeded': counts['done'],
+        'failed': counts['failed'],
+        'progress': round(finished / len(jobs), 3) if jobs else 1.0,
+        'complete': complete,
+        'counts': counts,
+        'files': files,
+        'elapsed_seconds': round(elapsed, 1),
+        'files_per_minute': round(finished / elapsed * 60, 1) if elapsed > 0 else 0.0,
+        'avg_stage_ms': {name: int(sum(values) / len(values)) for name, values in stage_totals.items()},
+        'created_at': batch.created_at.isoformat() if batch.created_at else None
+    }
+
+def _event(name, data):
+    return f"event: {name}\ndata: {json.dumps(data)}\n\n"
+
+def stream_batch_events(batch_id, poll_interval=None, max_seconds=None):
+    """
+    Generate server-sent events for a batch until it completes
+
+    A 'progress' event is sent whenever a file changes stage, then a single
+    'done' event once every file has finished. Each poll uses a fresh session
+    so the stream sees commits made by the workers.
+
+    Args:
+        batch_id: The ID of the upload batch
+        poll_interval: Seconds between polls (default: UPLOAD_PROGRESS_POLL_INTERVAL)
+        max_seconds: Close the stream after this long (default: UPLOAD_PROGRESS_STREAM_SECONDS)
+
+    Yields:
+        str: Server-sent event frames
+    """
+    poll_interval = poll_interval or PROGRESS_POLL_INTERVAL
+    max_seconds = max_seconds or PROGRESS_STREAM_SECONDS
+    opened = time.monotonic()
+    last_sent = opened
+    last_state = None
+
+    # Tell EventSource how quickly to reconnect if the stream drops
+    yield f"retry: {int(poll_interval * 3000)}\n\n"
+
+    while True:
+        try:
+            batch = db.session.get(UploadBatch, batch_id)
+            if not batch:
+                yield _event('stream_error', {'error': 'Upload batch not found'})
+                return
+            status = get_batch_status(batch)
+        except Exception as e:
+            logger.error(f"Error reading upload batch {batch_id}: {str(e)}")
+            yield _event('stream_error', {'error': 'Could not read upload progress'})
+            return
+        finally:
+            db.session.remove()
+
+        state = [(f['job_id'], f['stage'], f['attempts']) for f in status['files']]
+        if state != last_state:
+            yield _event('progress', status)
+            last_state = state
+            last_sent = time.monotonic()
+        elif time.monotonic() - last_sent >= KEEPALIVE_SECONDS:
+            yield ": keepalive\n\n"
+            last_sent = time.monotonic()
+
+        if status['complete']:
+            yield _event('done', status)
+            return
+
+        if time.monotonic() - opened >= max_seconds:
+            # EventSource reconnects on its own and picks up from the current state
+            return
+
+        time.sleep(poll_interval)
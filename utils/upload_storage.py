@@ -0,0 +1,268 @@
+"""
+Upload Storage - Streams uploaded resumes to disk.
+
+This module provides functions to:
+1. Copy uploads to static/uploads in fixed-size chunks, so memory use does not grow with file size
+2. Compute each file's sha256 and size while it is written
+3. Sniff the real file type from the first bytes and reject files that are not resumes
+4. Never overwrite a stored file: same-name uploads with other contents get their own name, identical ones reuse it
+5. Describe a file already in the uploads directory the same way, for offline imports
+"""
+
+import os
+import errno
+import shutil
+import hashlib
+import logging
+import zipfile
+import tempfile
+from io import BytesIO
+from werkzeug.utils import secure_filename
+
+logger = logging.getLogger(__name__)
+
+UPLOAD_DIR = os.path.join('static', 'uploads')
+UPLOAD_CHUNK_SIZE = 64 * 1024
+UPLOAD_MAX_FILE_BYTES = int(float(os.environ.get('UPLOAD_MAX_FILE_MB', 10)) * 1024 * 1024)
+
+# os.link errors meaning the filesystem cannot hard-link the file (copied instead)
+LINK_UNSUPPORTED_ERRNOS = {errno.EPERM, errno.EXDEV, errno.EMLINK, errno.ENOSYS, errno.ENOTSUP, errno.EOPNOTSUPP}
+
+# Leading bytes of the binary formats accepted as resumes
+FILE_SIGNATURES = [
+    (b'%PDF-', 'pdf'),
+    (b'PK\x03\x04', 'docx'),
+    (b'\x89PNG\r\n\x1a\n', 'image'),
+    (b'\xff\xd8\xff', 'image'),
+    (b'II*\x00', 'image'),
+    (b'MM\x00*', 'image'),
+]
+
+class UploadRejected(Exception):
+    """Raised when an upload is too large or is not a supported resume format"""
+
+def sniff_file_type(head):
+    """
+    Detect a file's type from its first bytes
+
+    Args:
+        head: The first chunk of the file
+
+    Returns:
+        str: 'pdf', 'docx', 'image' or 'text', or None if it is none of these
+    """
+    for signature, file_type in FILE_SIGNATURES:
+        if head.startswith(signature):
+            return file_type
+    # Some PDF writers put a few bytes of junk before the header
+    if b'%PDF-' in head[:1024]:
+        return 'pdf'
+
+    # Text in any encoding: no NUL bytes and hardly any control characters
+    if b'\x00' in head:
+        return None
+    control = sum(1 for byte in head if byte < 32 and byte not in (9, 10, 12, 13))
+    return 'text' if control <= len(head) * 0.01 else None
+
+def _is_docx(path):
+    try:
+        with zipfile.ZipFile(path) as archive:
+            return 'word/document.xml' in archive.namelist()
+    except zipfile.BadZipFile:
+        return False
+
+def _hash_stream(stream, max_bytes, out=None):
+    """
+    Read a stream in chunks, hashing and sniffing it and optionally copying it to out
+
+    Returns:
+        tuple: (sha256, size, file_type)
+    """
+    digest = hashlib.sha256()
+    size = 0
+    file_type = None
+    while True:
+        chunk = stream.read(UPLOAD_CHUNK_SIZE)
+        if not chunk:
+            break
+        if size == 0:
+            file_type = sniff_file_type(chunk)
+            if file_type is None:
+                raise UploadRejected('File is not a PDF, DOCX, image or text document')
+        size += len(chunk)
+        if size > max_bytes:
+            raise UploadRejected(f'File is larger than {max_bytes // (1024 * 1024)} MB')
+        digest.update(chunk)
+        if out is not None:
+            out.write(chunk)
+    return digest.hexdigest(), size, file_type
+
+def _check_complete(path, size, file_type):
+    """Reject empty files and ZIP archives that are not DOCX documents"""
+    if size == 0:
+        raise UploadRejected('File is empty')
+    if file_type == 'docx' and not _is_docx(path):
+        raise UploadRejected('File is a ZIP archive, not a DOCX document')
+
+def _file_sha256(path):
+    """Hex sha256 of a file on disk"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(UPLOAD_CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def _place_file(temp_path, path):
+    """
+    Move a temporary file to path, failing rather than overwrite a file already there
+
+    Raises:
+        FileExistsError: If path exists
+    """
+    try:
+        # Linking fails rather than overwrite, even when two uploads race for a name
+        os.link(temp_path, path)
+    except OSError as e:
+        if e.errno not in LINK_UNSUPPORTED_ERRNOS:
+            raise
+        # No hard links here; creating the file exclusively fails the same way
+        with open(path, 'xb') as out:
+            try:
+                with open(temp_path, 'rb') as f:
+                    shutil.copyfileobj(f, out, UPLOAD_CHUNK_SIZE)
+            except Exception:
+                out.close()
+                os.remove(path)
+                raise
+    os.remove(temp_path)
+
+def _move_into_place(temp_path, filename, sha256):
+    """
+    Give a finished upload its own name, or the name plus part of its hash
+    (and a counter, if needed) if another file already has it
+
+    A stored file is never overwritten. If a file with the chosen name already
+    holds the same bytes, it is reused and the temporary file dropped.
+
+    Returns:
+        tuple: (stored filename, True if an existing identical file was reused)
+    """
+    stem, extension = os.path.splitext(filename)
+    attempt = 0
+    while True:
+        if attempt == 0:
+            name = filename
+        elif attempt == 1:
+            name = f"{stem}-{sha256[:8]}{extension}"
+        else:
+            name = f"{stem}-{sha256[:8]}-{attempt - 1}{extension}"
+        attempt += 1
+        path = os.path.join(UPLOAD_DIR, name)
+        try:
+            _place_file(temp_path, path)
+            return name, False
+        except FileExistsError:
+            if _file_sha256(path) == sha256:
+                os.remove(temp_path)
+                return name, True
+
+def save_upload_stream(stream, filename, max_bytes=None):
+    """
+    Stream an upload into the uploads directory
+
+    The file is written to a temporary name first and moved into place once
+    it is complete, so workers never see a partial file.
+
+    Args:
+        stream: File-like object to read from
+        filename: Name the client gave the file
+        max_bytes: Largest accepted size (default: UPLOAD_MAX_FILE_BYTES)
+
+    Returns:
+        dict: filename, local_path, sha256, size and file_type of the stored file, and
+              reused (True if an identical file already stored under that name was kept)
+
+    Raises:
+        UploadRejected: If the file is empty, too large or not a supported type
+    """
+    max_bytes = max_bytes or UPLOAD_MAX_FILE_BYTES
+    filename = secure_filename(filename) or 'resume'
+    os.makedirs(UPLOAD_DIR, exist_ok=True)
+
+    handle, temp_path = tempfile.mkstemp(dir=UPLOAD_DIR, prefix='.upload-')
+    try:
+        with os.fdopen(handle, 'wb') as out:
+            sha256, size, file_type = _hash_stream(stream, max_bytes, out)
+        _check_complete(temp_path, size, file_type)
+
+        stored_name, reused = _move_into_place(temp_path, filename, sha256)
+        local_path = os.path.join(UPLOAD_DIR, stored_name)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+    logger.debug(f"{'Reused' if reused else 'Stored'} upload {stored_name} ({size} bytes, {file_type}, sha256 {sha256[:12]})")
+    return {
+        'filename': stored_name,
+        'local_path': local_path,
+        'sha256': sha256,
+        'size': size,
+        'file_type': file_type,
+        'reused': reused
+    }
+
+def describe_stored_file(path, max_bytes=None):
+    """
+    Hash and sniff a file that is already on disk, without copying it
+
+    Args:
+        path: Path to the file
+        max_bytes: Largest accepted size (default: UPLOAD_MAX_FILE_BYTES)
+
+    Returns:
+        dict: See save_upload_stream; local_path is the given path, and reused is
+              always True since the file was there before
+
+    Raises:
+        UploadRejected: If the file is empty, too large or not a supported type
+    """
+    max_bytes = max_bytes or UPLOAD_MAX_FILE_BYTES
+    with open(path, 'rb') as f:
+        sha256, size, file_type = _hash_stream(f, max_bytes)
+    _check_complete(path, size, file_type)
+
+    return {
+        'filename': os.path.basename(path),
+        'local_path': path,
+        'sha256': sha256,
+        'size': size,
+        'file_type': file_type,
+        'reused': True
+    }
+
+def save_upload(file_storage, max_bytes=None):
+    """
+    Stream a werkzeug FileStorage (an uploaded form file) to disk
+
+    Args:
+        file_storage: The uploaded file from request.files
+        max_bytes: Largest accepted size (default: UPLOAD_MAX_FILE_BYTES)
+
+    Returns:
+        dict: See save_upload_stream
+    """
+    return save_upload_stream(file_storage.stream, file_storage.filename, max_bytes)
+
+def save_text_upload(text, filename):
+    """
+    Store pasted resume text as a .txt upload
+
+    Args:
+        text: The resume text
+        filename: Name to store it under
+
+    Returns:
+        dict: See save_upload_stream
+    """
+    return save_upload_stream(BytesIO(text.encode('utf-8')), filename)
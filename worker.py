@@ -0,0 +1,53 @@
+#!/usr/bin/env python
+"""
+Script to run ingestion queue workers (resume processing and personas) in their own process.
+Run the web process with INGEST_WORKERS=0 and start as many of these as throughput needs.
+"""
+
+import os
+import time
+import signal
+import argparse
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+# Import after environment variables are loaded
+from app import create_app
+from utils.job_queue import start_ingest_workers, stop_ingest_workers
+from utils.ocr_service import shutdown_ocr_pool
+
+def run_workers(args):
+    """Start the worker threads and keep them running until SIGINT/SIGTERM"""
+    app = create_app(start_workers=False)
+    start_ingest_workers(app, args.concurrency, kinds=args.kinds)
+    print(f"Ingestion worker running with {args.concurrency} threads "
+          f"({', '.join(args.kinds) if args.kinds else 'all job kinds'})")
+
+    stopping = []
+
+    def handle_signal(signum, frame):
+        stopping.append(signum)
+
+    signal.signal(signal.SIGINT, handle_signal)
+    signal.signal(signal.SIGTERM, handle_signal)
+
+    while not stopping:
+        time.sleep(1)
+
+    # Let running jobs finish; anything cut off is retried once its lease expires
+    print("Stopping ingestion workers...")
+    stop_ingest_workers(timeout=args.shutdown_timeout)
+    shutdown_ocr_pool()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run AI Recruiter Pro ingestion queue workers")
+    parser.add_argument("--concurrency", type=int, default=int(os.environ.get('INGEST_WORKERS', 4)),
+                        help="Number of jobs processed at the same time (default: INGEST_WORKERS or 4)")
+    parser.add_argument("--kinds", nargs="+", choices=['resume', 'persona'],
+                        help="Only process these job kinds")
+    parser.add_argument("--shutdown-timeout", type=int, default=60,
+                        help="Seconds to wait for running jobs when stopping (default: 60)")
+
+    run_workers(parser.parse_args())